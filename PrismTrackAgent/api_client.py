@@ -3,15 +3,26 @@ API Client for PrismTrack Agent
 """
 import requests
 import sys
-from typing import List, Dict, Optional
+import json
+import gzip
+import time
+import zlib
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Callable
 from datetime import datetime, timezone
 
 class ApiClient:
     """Handles all API communication with PrismTrack backend"""
     
-    def __init__(self, api_base: str, agent_token: str):
+    def __init__(self, api_base: str, agent_token: str, compress_threshold_bytes: int = 1024,
+                 telemetry_format: str = "columnar", telemetry_retries: int = 3,
+                 last_batch_seq: int = 0, save_batch_seq: Optional[Callable[[int], bool]] = None):
         self.api_base = api_base
         self.agent_token = agent_token
+        self.compress_threshold_bytes = compress_threshold_bytes
+        self.telemetry_format = telemetry_format
+        self.telemetry_retries = telemetry_retries
+        self.last_batch_seq = last_batch_seq
+        self.save_batch_seq = save_batch_seq
         self.headers = {
             'X-Agent-Token': agent_token,
             'Content-Type': 'application/json'
@@ -44,10 +55,144 @@ class ApiClient:
             print(f"Error sending heartbeat: {e}")
             return False
     
+    def _encode_body(self, payload: Dict) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Serialize payload to JSON, gzip-compressing it above the threshold
+        
+        Returns:
+            Tuple[bytes, Dict[str, str]]: (body, headers)
+        """
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        headers = dict(self.headers)
+        
+        if self.compress_threshold_bytes >= 0 and len(body) >= self.compress_threshold_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return body, headers
+    
+    def _to_columnar(self, telemetry_data: List[Dict]) -> Dict:
+        """
+        Encode telemetry records as a columnar-v1 batch
+        
+        Parallel arrays, epoch-millisecond timestamps delta-encoded from base_ts,
+        and a per-batch string dictionary for titles, process names and URLs.
+        """
+        strings: List[str] = []
+        string_index: Dict[str, int] = {}
+        
+        def intern(value: Optional[str]) -> Optional[int]:
+            if value is None:
+                return None
+            index = string_index.get(value)
+            if index is None:
+                index = string_index[value] = len(strings)
+                strings.append(value)
+            return index
+        
+        timestamps = []
+        for record in telemetry_data:
+            ts = record['timestamp']
+            if isinstance(ts, str):
+                ts = datetime.fromisoformat(ts)
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            timestamps.append(int(ts.timestamp() * 1000))
+        
+        base_ts = timestamps[0] if timestamps else 0
+        previous = base_ts
+        ts_delta = []
+        for ts in timestamps:
+            ts_delta.append(ts - previous)
+            previous = ts
+        
+        batch = {
+            "agent_token": self.agent_token,
+            "format": "columnar-v1",
+            "base_ts": base_ts,
+            "ts_delta": ts_delta,
+            "window_title": [intern(r.get('window_title')) for r in telemetry_data],
+            "process_name": [intern(r.get('process_name')) for r in telemetry_data],
+            "is_idle": [bool(r.get('is_idle', False)) for r in telemetry_data]
+        }
+        if any(r.get('screenshot_url') for r in telemetry_data):
+            batch["screenshot_url"] = [intern(r.get('screenshot_url')) for r in telemetry_data]
+        batch["strings"] = strings
+        
+        return batch
+    
+    def next_batch_seq(self) -> int:
+        """
+        Allocate the next telemetry batch sequence number
+        
+        The last sequence is persisted (save_batch_seq) before the batch is
+        sent, so sequences keep increasing across restarts even if the clock
+        steps backwards; a sequence at or below the backend's last one would
+        be reported as a duplicate and the batch silently dropped. The clock
+        (microseconds) is only a floor, which keeps agents that used
+        clock-based sequences before increasing.
+        
+        Raises:
+            RuntimeError: If the sequence could not be persisted
+        """
+        seq = max(self.last_batch_seq + 1, time.time_ns() // 1000)
+        if self.save_batch_seq is not None and not self.save_batch_seq(seq):
+            raise RuntimeError("Could not persist the telemetry batch sequence")
+        self.last_batch_seq = seq
+        return seq
+    
+    def _post_with_retry(self, url: str, body: bytes, headers: Dict[str, str]) -> requests.Response:
+        """
+        POST a telemetry batch, retrying timeouts, connection errors and 5xx
+        
+        The body (and so its batch_seq) is identical on every attempt; the
+        backend ignores a batch it already stored, so retrying is safe.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = requests.post(url, data=body, headers=headers, timeout=30)
+                if response.status_code < 500 or attempt >= self.telemetry_retries:
+                    return response
+                delay = float(response.headers.get('Retry-After', 2 ** attempt))
+            except (requests.Timeout, requests.ConnectionError):
+                if attempt >= self.telemetry_retries:
+                    raise
+                delay = 2 ** attempt
+            attempt += 1
+            print(f"Telemetry upload failed, retrying in {delay:.0f}s (attempt {attempt}/{self.telemetry_retries})")
+            time.sleep(delay)
+    
+    @staticmethod
+    def _rejects_columnar_format(response: requests.Response) -> bool:
+        """
+        Check whether a 422 means the backend does not know the columnar format
+        
+        A backend that supports columnar-v1 only reports the format discriminator
+        when the version is unknown to it; an older backend that only knows rows
+        reports the missing "telemetry" list. Errors in the columnar fields
+        themselves mean this batch is invalid, not the format.
+        """
+        try:
+            errors = response.json().get('detail')
+        except (ValueError, AttributeError):
+            return False
+        if not isinstance(errors, list) or not errors:
+            return False
+        
+        locations = [[str(part) for part in error.get('loc', [])] for error in errors if isinstance(error, dict)]
+        columnar = [loc for loc in locations if "TelemetryColumnarSubmit" in loc]
+        if columnar:
+            return all(loc[-1] == "format" for loc in columnar)
+        return any(loc and loc[-1] in ("format", "telemetry") for loc in locations)
+    
     def submit_telemetry(self, telemetry_data: List[Dict]) -> bool:
         """
         Submit telemetry data to backend
         
+        Each batch carries a batch_seq, so it is retried with the same sequence
+        after a timeout and stored at most once.
+        
         Args:
             telemetry_data: List of telemetry records, each containing:
                 - window_title: str
@@ -61,21 +206,33 @@ class ApiClient:
         """
         url = f"{self.api_base}/agent/telemetry"
         
-        payload = {
-            "telemetry": telemetry_data,
-            "agent_token": self.agent_token  # Include in body for compatibility
-        }
+        if self.telemetry_format == "columnar":
+            payload = self._to_columnar(telemetry_data)
+        else:
+            payload = {
+                "telemetry": telemetry_data,
+                "agent_token": self.agent_token  # Include in body for compatibility
+            }
         
         try:
-            response = requests.post(
-                url,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+            payload["batch_seq"] = self.next_batch_seq()
+            body, headers = self._encode_body(payload)
+            response = self._post_with_retry(url, body, headers)
+            
+            # Older backends reject the columnar format; fall back to rows for good.
+            # Any other 422 is a problem with this batch and is reported below.
+            if (response.status_code == 422 and self.telemetry_format == "columnar"
+                    and self._rejects_columnar_format(response)):
+                print("Backend does not accept columnar telemetry, falling back to row format")
+                self.telemetry_format = "rows"
+                return self.submit_telemetry(telemetry_data)
+            
             response.raise_for_status()
             
             data = response.json()
+            if data.get('duplicate'):
+                print(f"Telemetry batch {payload['batch_seq']} was already stored")
+                return True
             records_count = data.get('records_count', len(telemetry_data))
             print(f"Telemetry submitted: {records_count} records")
             return True
@@ -89,4 +246,51 @@ class ApiClient:
                 except:
                     pass
             return False
-
+    
+    def backfill_telemetry(self, telemetry_data: Iterable[Dict]) -> Optional[Dict]:
+        """
+        Upload a large telemetry backlog as a streamed, gzip-compressed NDJSON body
+        
+        Records are serialized and compressed one at a time while the request
+        is being sent, so the backlog never has to be held in memory.
+        
+        Args:
+            telemetry_data: Iterable of telemetry records (same fields as submit_telemetry)
+        
+        Returns:
+            Optional[Dict]: Backend summary (records_count, invalid_count, ...) or None on failure.
+                After a failure partway through, the backend reports committed_lines:
+                resend only the records after that many.
+        """
+        url = f"{self.api_base}/agent/telemetry/stream"
+        headers = dict(self.headers)
+        headers['Content-Type'] = 'application/x-ndjson'
+        headers['Content-Encoding'] = 'gzip'
+        
+        def body() -> Iterator[bytes]:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for record in telemetry_data:
+                line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+                chunk = compressor.compress(line.encode('utf-8'))
+                if chunk:
+                    yield chunk
+            yield compressor.flush()
+        
+        try:
+            response = requests.post(url, data=body(), headers=headers, timeout=300)
+            response.raise_for_status()
+            summary = response.json()
+            print(f"Telemetry backfilled: {summary.get('records_count')} records, "
+                  f"{summary.get('invalid_count')} invalid")
+            return summary
+        except Exception as e:
+            print(f"Error backfilling telemetry: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    detail = e.response.json().get('detail')
+                    if isinstance(detail, dict) and 'committed_lines' in detail:
+                        print(f"  {detail.get('message')}; the first {detail['committed_lines']} records "
+                              f"were processed, resend only the ones after them")
+                except ValueError:
+                    pass
+            return None
@@ -12,13 +12,19 @@ class Config:
     
     def __init__(self, org_id: str, api_base: str, agent_token: Optional[str] = None,
                  heartbeat_interval: int = 30, telemetry_interval: int = 30,
-                 idle_threshold_seconds: int = 300):
+                 idle_threshold_seconds: int = 300, compress_threshold_bytes: int = 1024,
+                 telemetry_format: str = "columnar", telemetry_retries: int = 3,
+                 last_batch_seq: int = 0):
         self.org_id = org_id
         self.api_base = api_base
         self.agent_token = agent_token
         self.heartbeat_interval = heartbeat_interval
         self.telemetry_interval = telemetry_interval
         self.idle_threshold_seconds = idle_threshold_seconds
+        self.compress_threshold_bytes = compress_threshold_bytes
+        self.telemetry_format = telemetry_format
+        self.telemetry_retries = telemetry_retries
+        self.last_batch_seq = last_batch_seq  # Last telemetry batch_seq handed out (survives restarts)
     
     @staticmethod
     def get_config_path() -> Path:
@@ -50,7 +56,11 @@ class Config:
                     agent_token=data.get('agent_token'),
                     heartbeat_interval=data.get('heartbeat_interval', 30),
                     telemetry_interval=data.get('telemetry_interval', 30),
-                    idle_threshold_seconds=data.get('idle_threshold_seconds', 300)
+                    idle_threshold_seconds=data.get('idle_threshold_seconds', 300),
+                    compress_threshold_bytes=data.get('compress_threshold_bytes', 1024),
+                    telemetry_format=data.get('telemetry_format', 'columnar'),
+                    telemetry_retries=data.get('telemetry_retries', 3),
+                    last_batch_seq=data.get('last_batch_seq', 0)
                 )
             except Exception as e:
                 print(f"Error loading config: {e}")
@@ -72,12 +82,24 @@ class Config:
             'agent_token': self.agent_token,
             'heartbeat_interval': self.heartbeat_interval,
             'telemetry_interval': self.telemetry_interval,
-            'idle_threshold_seconds': self.idle_threshold_seconds
+            'idle_threshold_seconds': self.idle_threshold_seconds,
+            'compress_threshold_bytes': self.compress_threshold_bytes,
+            'telemetry_format': self.telemetry_format,
+            'telemetry_retries': self.telemetry_retries,
+            'last_batch_seq': self.last_batch_seq
         }
         
+        # Written before every telemetry batch: replace atomically so a crash
+        # mid-write cannot lose the agent token
+        tmp_path = config_path.with_suffix('.json.tmp')
         try:
-            with open(config_path, 'w') as f:
+            with open(tmp_path, 'w') as f:
                 json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, config_path)
+            return True
         except Exception as e:
             print(f"Error saving config: {e}")
+            return False
 
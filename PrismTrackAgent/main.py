@@ -66,8 +66,21 @@ async def main():
             print("Using existing agent token")
             print()
         
+        # Batch sequences are stored in config.json before each upload
+        def save_batch_seq(seq: int) -> bool:
+            config.last_batch_seq = seq
+            return config.save()
+        
         # Initialize API client
-        api_client = ApiClient(config.api_base, config.agent_token)
+        api_client = ApiClient(
+            config.api_base,
+            config.agent_token,
+            compress_threshold_bytes=config.compress_threshold_bytes,
+            telemetry_format=config.telemetry_format,
+            telemetry_retries=config.telemetry_retries,
+            last_batch_seq=config.last_batch_seq,
+            save_batch_seq=save_batch_seq
+        )
         
         # Start productivity tracker
         print("Starting productivity tracking...")
@@ -1,46 +1,73 @@
 """
 Agent Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Header, Request
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime, timezone
 from backend.core.database import get_db
 from backend.core.security import generate_api_key
-from backend.models.agent import Agent, OrgType, AgentStatus
-from backend.models.tenant import Tenant
-from backend.models.company import Company
-from backend.models.branch import Branch
-from backend.models.telemetry import Telemetry
+from backend.core.config import settings
+from backend.core.agent_cache import AgentPrincipal, agent_token_cache
+from backend.core.telemetry_ingest import (
+    build_telemetry_rows,
+    build_columnar_rows,
+    bulk_insert_telemetry,
+    iter_ndjson_lines,
+    NDJSONLineTooLong
+)
+from backend.core.telemetry_buffer import telemetry_buffer, TelemetryBufferFull
+from backend.core.presence import presence_recorder
+from backend.core.presence_tracker import presence_tracker
+from backend.core.tenant_events import publish_telemetry_summary
+from backend.core.batch_sequence import batch_sequences
+from backend.core.compression import DecompressingRoute
+from backend.core.org_directory import lookup_org
+from backend.core.pagination import MAX_PAGE_LIMIT, decode_cursor, page_with_cursor
+from backend.core.count_cache import count_cache
+from backend.models.agent import Agent, AgentStatus
 from backend.schemas.agent import (
     AgentRegister,
     AgentRegisterResponse,
     AgentHeartbeat,
     TelemetrySubmit,
+    TelemetryColumnarSubmit,
     TelemetryData,
+    TelemetryStreamResponse,
     AgentResponse,
     AgentListResponse
 )
 
-router = APIRouter()
+# Agent uploads may be sent with Content-Encoding: gzip/zstd
+router = APIRouter(route_class=DecompressingRoute)
 
 def get_agent_from_token(
     x_agent_token: str = Header(..., alias="X-Agent-Token"),
     db: Session = Depends(get_db)
-) -> Agent:
+) -> AgentPrincipal:
     """
-    Verify agent token and return agent instance
+    Verify agent token and return the agent principal
+    
+    Tokens are resolved through a bounded TTL cache; the agents table is only
+    queried on a cache miss.
     
     Args:
         x_agent_token: Agent token from X-Agent-Token header
         db: Database session
         
     Returns:
-        Agent instance
+        AgentPrincipal (id, org_id, status, agent_token)
         
     Raises:
         HTTPException: If token is invalid or agent not found
     """
+    principal = agent_token_cache.get(x_agent_token)
+    if principal is not None:
+        return principal
+    
     agent = db.query(Agent).filter(Agent.agent_token == x_agent_token).first()
     
     if not agent:
@@ -49,10 +76,13 @@ def get_agent_from_token(
             detail="Invalid agent token"
         )
     
-    return agent
+    principal = AgentPrincipal.from_agent(agent)
+    agent_token_cache.put(principal)
+    
+    return principal
 
 @router.post("/register", response_model=AgentRegisterResponse, tags=["agent"])
-async def register_agent(
+def register_agent(
     agent_data: AgentRegister,
     db: Session = Depends(get_db)
 ):
@@ -62,44 +92,15 @@ async def register_agent(
     Validates the org_id and creates an agent record with a unique agent_token.
     The agent uses this token for all subsequent API calls.
     """
-    # Verify org_id exists and get org_type
-    org_type = None
-    org_id_valid = False
-    
-    # Check tenant org_id
-    tenant = db.query(Tenant).filter(
-        Tenant.tenant_org_id == agent_data.org_id,
-        Tenant.is_active == True
-    ).first()
-    if tenant:
-        org_type = OrgType.TENANT
-        org_id_valid = True
-    
-    # Check company org_id
-    if not org_id_valid:
-        company = db.query(Company).filter(
-            Company.company_org_id == agent_data.org_id,
-            Company.is_active == True
-        ).first()
-        if company:
-            org_type = OrgType.COMPANY
-            org_id_valid = True
-    
-    # Check branch org_id
-    if not org_id_valid:
-        branch = db.query(Branch).filter(
-            Branch.branch_org_id == agent_data.org_id,
-            Branch.is_active == True
-        ).first()
-        if branch:
-            org_type = OrgType.BRANCH
-            org_id_valid = True
-    
-    if not org_id_valid:
+    # Resolve org_id (tenant, company or branch) with one directory lookup
+    org = lookup_org(db, agent_data.org_id)
+    
+    if org is None or not org.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invalid org_id. Org ID not found or inactive."
         )
+    org_type = org.org_type
     
     # Check if agent with same hardware_uuid already exists
     existing_agent = db.query(Agent).filter(
@@ -109,7 +110,8 @@ async def register_agent(
     if existing_agent:
         # Update existing agent
         existing_agent.org_id = agent_data.org_id
-        existing_agent.org_type = org_type or existing_agent.org_type
+        existing_agent.org_type = org_type
+        existing_agent.tenant_id = org.tenant_id
         existing_agent.machine_name = agent_data.machine_name
         existing_agent.last_seen = datetime.now(timezone.utc)
         existing_agent.status = AgentStatus.ONLINE
@@ -117,6 +119,10 @@ async def register_agent(
         db.commit()
         db.refresh(existing_agent)
         
+        # Cached principal carries the old org_id
+        agent_token_cache.invalidate(existing_agent.agent_token)
+        presence_tracker.touch(existing_agent.id, existing_agent.tenant_id)
+        
         return {
             "agent_id": existing_agent.id,
             "agent_token": existing_agent.agent_token,
@@ -130,27 +136,12 @@ async def register_agent(
     while db.query(Agent).filter(Agent.agent_token == agent_token).first():
         agent_token = generate_api_key()
     
-    # Use detected org_type or fallback to provided one
-    # Ensure we have a valid OrgType enum value
-    if org_type:
-        final_org_type = org_type
-    else:
-        # Convert string to enum if needed
-        if isinstance(agent_data.org_type, str):
-            # Convert to uppercase to match database enum
-            try:
-                final_org_type = OrgType(agent_data.org_type.upper())
-            except ValueError:
-                # If invalid, default to tenant
-                final_org_type = OrgType.TENANT
-        else:
-            final_org_type = agent_data.org_type
-    
     # Create new agent
     try:
         agent = Agent(
             org_id=agent_data.org_id,
-            org_type=final_org_type,
+            org_type=org_type,
+            tenant_id=org.tenant_id,
             machine_name=agent_data.machine_name,
             hardware_uuid=agent_data.hardware_uuid,
             agent_token=agent_token,
@@ -175,6 +166,7 @@ async def register_agent(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error saving agent to database: {str(e)}\n{error_details}"
         )
+    presence_tracker.touch(agent.id, agent.tenant_id)
     
     return {
         "agent_id": agent.id,
@@ -183,25 +175,21 @@ async def register_agent(
     }
 
 @router.post("/heartbeat", tags=["agent"])
-async def agent_heartbeat(
+def agent_heartbeat(
     heartbeat_data: AgentHeartbeat,
     db: Session = Depends(get_db),
-    agent: Agent = Depends(get_agent_from_token)
+    agent: AgentPrincipal = Depends(get_agent_from_token)
 ):
     """
     Agent heartbeat endpoint
     
-    Updates agent's last_seen timestamp and status.
-    Agents should call this endpoint periodically (every 30-60 seconds).
+    Records the agent's last_seen timestamp and status in the presence map;
+    they are written to the agents table in one batched UPDATE every
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS.
+    Agents should call this endpoint periodically (every 30-60 seconds);
+    agents silent for AGENT_OFFLINE_AFTER_SECONDS are marked OFFLINE.
     """
-    agent.last_seen = datetime.utcnow()
-    
-    if heartbeat_data.status:
-        agent.status = heartbeat_data.status
-    else:
-        agent.status = AgentStatus.ONLINE
-    
-    db.commit()
+    presence_recorder.record(agent.id, heartbeat_data.status or AgentStatus.ONLINE, tenant_id=agent.tenant_id)
     
     return {
         "status": "ok",
@@ -209,11 +197,21 @@ async def agent_heartbeat(
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+def _duplicate_batch_response(seq: int) -> dict:
+    """Acknowledge a replayed batch without storing it again"""
+    return {
+        "status": "ok",
+        "message": f"Duplicate batch {seq} ignored",
+        "records_count": 0,
+        "duplicate": True,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
 @router.post("/telemetry", tags=["agent"])
-async def submit_telemetry(
-    telemetry_data: TelemetrySubmit,
+def submit_telemetry(
+    telemetry_data: Union[TelemetryColumnarSubmit, TelemetrySubmit],
     db: Session = Depends(get_db),
-    agent: Agent = Depends(get_agent_from_token)
+    agent: AgentPrincipal = Depends(get_agent_from_token)
 ):
     """
     Submit telemetry data from agent
@@ -221,6 +219,15 @@ async def submit_telemetry(
     Accepts multiple telemetry records in a single request.
     Each record includes window title, process name, timestamp, idle status, and optional screenshot URL.
     
+    Two payload formats are accepted: the row format (TelemetrySubmit) and the
+    compact columnar format (TelemetryColumnarSubmit, "format": "columnar-v1").
+    
+    Batches carrying a batch_seq are idempotent: a batch whose sequence is not
+    greater than the agent's last accepted one is acknowledged with
+    duplicate=true and not stored again, so agents can safely retry. In
+    write-behind mode a replay of a batch that is not stored yet is queued
+    and skipped when the buffer flushes.
+    
     Note: Agent token is verified via X-Agent-Token header, but can also be included in body for compatibility.
     """
     # Verify agent token matches (if provided in body)
@@ -230,60 +237,182 @@ async def submit_telemetry(
             detail="Agent token mismatch"
         )
     
-    # Create telemetry records
-    telemetry_records = []
-    for tel_data in telemetry_data.telemetry:
-        telemetry = Telemetry(
-            agent_id=agent.id,
-            window_title=tel_data.window_title,
-            process_name=tel_data.process_name,
-            timestamp=tel_data.timestamp,
-            is_idle=tel_data.is_idle,
-            screenshot_url=tel_data.screenshot_url
-        )
-        telemetry_records.append(telemetry)
-        db.add(telemetry)
+    if isinstance(telemetry_data, TelemetryColumnarSubmit):
+        rows = build_columnar_rows(agent.id, telemetry_data)
+    else:
+        rows = build_telemetry_rows(agent.id, telemetry_data.telemetry)
+    presence_recorder.record(agent.id, AgentStatus.ONLINE, tenant_id=agent.tenant_id)
+    seq = telemetry_data.batch_seq
+    
+    # Write-behind: queue rows for the background flusher and acknowledge immediately
+    if settings.TELEMETRY_WRITE_BEHIND:
+        # Replays not known to this worker are skipped when the buffer flushes
+        if seq is not None and batch_sequences.is_known_duplicate(agent.id, seq):
+            return _duplicate_batch_response(seq)
+        try:
+            telemetry_buffer.submit(rows, batch_seq=(agent.id, seq) if seq is not None else None)
+        except TelemetryBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Telemetry buffer is full, retry later",
+                headers={"Retry-After": "5"}
+            )
+        publish_telemetry_summary(agent.tenant_id, agent.id, rows)
+        
+        return {
+            "status": "ok",
+            "message": f"Telemetry data queued: {len(rows)} records",
+            "records_count": len(rows),
+            "queued": True,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
     
-    # Update agent last_seen
-    agent.last_seen = datetime.now(timezone.utc)
-    agent.status = AgentStatus.ONLINE
+    if seq is not None and not batch_sequences.claim(db, agent.id, seq):
+        db.rollback()
+        return _duplicate_batch_response(seq)
     
+    # Insert telemetry records as multi-row Core inserts (no ORM objects)
+    insert_stats = bulk_insert_telemetry(db, rows)
     db.commit()
+    if seq is not None:
+        batch_sequences.accept(agent.id, seq)
+    publish_telemetry_summary(agent.tenant_id, agent.id, rows)
+    
+    return {
+        "status": "ok",
+        "message": f"Telemetry data received: {insert_stats['rows']} records",
+        "records_count": insert_stats["rows"],
+        "insert_ms": insert_stats["insert_ms"],
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+MAX_STREAM_ERRORS_REPORTED = 20
+
+def _insert_stream_chunk(db: Session, rows: List[dict]) -> None:
+    """Insert and commit one chunk of streamed telemetry (runs in a worker thread)"""
+    try:
+        bulk_insert_telemetry(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+@router.post("/telemetry/stream", response_model=TelemetryStreamResponse, tags=["agent"])
+async def stream_telemetry(
+    request: Request,
+    db: Session = Depends(get_db),
+    agent: AgentPrincipal = Depends(get_agent_from_token)
+):
+    """
+    Backfill telemetry from a newline-delimited JSON (NDJSON) body
+    
+    Intended for large offline backlogs. The body holds one TelemetryData
+    object per line and may be gzip/zstd compressed. It is read incrementally
+    and inserted in chunks of TELEMETRY_STREAM_CHUNK_ROWS, each committed on
+    its own, so memory use does not grow with the backlog size. Invalid lines
+    are skipped and reported; everything before a fatal error stays committed.
+    Rows are always inserted directly, even in write-behind mode.
+    
+    A fatal error (line too long, body too large, corrupt compression) keeps
+    its status code; its detail is an object with the message, records_stored
+    and committed_lines: every line up to committed_lines was stored or
+    reported invalid, so a retry resends only the lines after it.
+    """
+    chunk_rows = max(1, settings.TELEMETRY_STREAM_CHUNK_ROWS)
+    records: List[TelemetryData] = []
+    inserted = 0
+    chunks = 0
+    invalid = 0
+    errors = []
+    line_number = 0
+    committed_lines = 0
+    
+    async def flush() -> None:
+        nonlocal inserted, chunks, committed_lines
+        rows = build_telemetry_rows(agent.id, records)
+        await asyncio.to_thread(_insert_stream_chunk, db, rows)
+        publish_telemetry_summary(agent.tenant_id, agent.id, rows)
+        inserted += len(rows)
+        chunks += 1
+        committed_lines = line_number
+        records.clear()
+    
+    def fatal(status_code: int, message: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail={"message": message, "records_stored": inserted, "committed_lines": committed_lines}
+        )
+    
+    lines = iter_ndjson_lines(request.stream_decompressed(), settings.TELEMETRY_STREAM_MAX_LINE_BYTES)
+    try:
+        async for line_number, line in lines:
+            try:
+                records.append(TelemetryData.model_validate(json.loads(line)))
+            except (ValueError, ValidationError) as e:
+                invalid += 1
+                if len(errors) < MAX_STREAM_ERRORS_REPORTED:
+                    errors.append({"line": line_number, "detail": str(e).splitlines()[0]})
+                continue
+            if len(records) >= chunk_rows:
+                await flush()
+    except NDJSONLineTooLong as e:
+        raise fatal(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, str(e))
+    except HTTPException as e:
+        # Raised while decompressing: body too large (413) or corrupt (400)
+        raise fatal(e.status_code, e.detail)
+    
+    if records:
+        await flush()
+    if inserted:
+        presence_recorder.record(agent.id, AgentStatus.ONLINE, tenant_id=agent.tenant_id)
     
     return {
         "status": "ok",
-        "message": f"Telemetry data received: {len(telemetry_records)} records",
-        "records_count": len(telemetry_records),
+        "records_count": inserted,
+        "invalid_count": invalid,
+        "chunks": chunks,
+        "errors": errors,
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 @router.get("/agents", response_model=AgentListResponse, tags=["agent"])
-async def list_agents(
+def list_agents(
     org_id: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
     """
     List all agents (for platform/tenant admin use)
     
-    Can filter by org_id if provided.
+    Can filter by org_id if provided. Agents are ordered by id; pass the
+    returned next_cursor as cursor to page without OFFSET (skip is ignored
+    when a cursor is given).
     """
     query = db.query(Agent)
     
     if org_id:
         query = query.filter(Agent.org_id == org_id)
+    total, approximate = count_cache.total(("agents", org_id), query, include_total)
     
-    agents = query.offset(skip).limit(limit).all()
-    total = query.count()
+    page = query.order_by(Agent.id)
+    if cursor:
+        page = page.filter(Agent.id > decode_cursor(cursor)[1])
+    else:
+        page = page.offset(skip)
+    agents, next_cursor = page_with_cursor(page.limit(limit + 1).all(), limit, "id")
     
     return {
         "agents": agents,
-        "total": total
+        "total": total,
+        "approximate": approximate,
+        "next_cursor": next_cursor
     }
 
 @router.get("/agents/{agent_id}", response_model=AgentResponse, tags=["agent"])
-async def get_agent(
+def get_agent(
     agent_id: int,
     db: Session = Depends(get_db)
 ):
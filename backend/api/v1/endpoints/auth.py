@@ -5,8 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from backend.core.database import get_db
+from backend.core.password_pool import password_pool
 from backend.core.security import (
-    verify_password,
     create_access_token,
     create_refresh_token,
     verify_token
@@ -23,7 +23,7 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 @router.post("/platform-admin/login", response_model=Token, tags=["authentication"])
-async def platform_admin_login(
+def platform_admin_login(
     credentials: PlatformAdminLogin,
     db: Session = Depends(get_db)
 ):
@@ -45,7 +45,7 @@ async def platform_admin_login(
         )
     
     # Verify password
-    if not verify_password(credentials.password, admin.password_hash):
+    if not password_pool.verify(credentials.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -78,7 +78,7 @@ async def platform_admin_login(
     }
 
 @router.post("/tenant/login", response_model=Token, tags=["authentication"])
-async def tenant_login(
+def tenant_login(
     credentials: TenantLogin,
     db: Session = Depends(get_db)
 ):
@@ -99,7 +99,7 @@ async def tenant_login(
         )
     
     # Verify password
-    if not verify_password(credentials.password, tenant.admin_password_hash):
+    if not password_pool.verify(credentials.password, tenant.admin_password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -132,7 +132,7 @@ async def tenant_login(
     }
 
 @router.post("/refresh", response_model=Token, tags=["authentication"])
-async def refresh_token(
+def refresh_token(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
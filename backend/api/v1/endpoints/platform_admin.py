@@ -5,37 +5,69 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from backend.core.database import get_db
-from backend.core.dependencies import get_current_platform_admin
-from backend.core.security import hash_password, generate_api_key
+from backend.core.dependencies import get_current_platform_admin, platform_list_version
+from backend.core.security import generate_api_key
+from backend.core.password_pool import password_pool
+from backend.core.count_cache import count_cache
+from backend.core.tenant_stats import tenant_stats_cache
 from backend.core.utils import generate_org_id
 from backend.models.platform_admin import PlatformAdmin
 from backend.models.tenant import Tenant
-from backend.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse, TenantListResponse
+from backend.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse, TenantListResponse, TenantStatsListResponse
 
 router = APIRouter()
 
 @router.get("/tenants", response_model=TenantListResponse, tags=["platform-admin"])
-async def list_tenants(
+def list_tenants(
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = True,
+    version: int = Depends(platform_list_version("tenants")),
     db: Session = Depends(get_db),
     current_admin: PlatformAdmin = Depends(get_current_platform_admin)
 ):
     """
     List all tenants
     
-    Returns paginated list of all tenants in the system
+    Returns paginated list of all tenants in the system. Sends an ETag; a
+    matching If-None-Match is answered 304 without querying the list.
     """
-    tenants = db.query(Tenant).offset(skip).limit(limit).all()
-    total = db.query(Tenant).count()
+    query = db.query(Tenant)
+    tenants = query.order_by(Tenant.id).offset(skip).limit(limit).all()
+    total, approximate = count_cache.total(("tenants", version), query, include_total, versioned=True)
     
     return {
         "tenants": tenants,
-        "total": total
+        "total": total,
+        "approximate": approximate
+    }
+
+# Declared before /tenants/{tenant_id} so "stats" is not parsed as a tenant id
+@router.get("/tenants/stats", response_model=TenantStatsListResponse, tags=["platform-admin"])
+def list_tenant_stats(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_admin: PlatformAdmin = Depends(get_current_platform_admin)
+):
+    """
+    Get statistics for a page of tenants in one request
+    
+    Pages the same way as GET /tenants (by tenant id), so the dashboard can
+    fetch both in parallel. Counts may be up to TENANT_STATS_CACHE_TTL_SECONDS old.
+    """
+    tenant_ids = [row[0] for row in db.query(Tenant.id).order_by(Tenant.id).offset(skip).limit(limit).all()]
+    stats = tenant_stats_cache.get_many(db, tenant_ids)
+    
+    return {
+        "stats": [
+            {"tenant_id": tenant_id, "statistics": stats[tenant_id]}
+            for tenant_id in tenant_ids if tenant_id in stats
+        ]
     }
 
 @router.get("/tenants/{tenant_id}", response_model=TenantResponse, tags=["platform-admin"])
-async def get_tenant(
+def get_tenant(
     tenant_id: int,
     db: Session = Depends(get_db),
     current_admin: PlatformAdmin = Depends(get_current_platform_admin)
@@ -54,7 +86,7 @@ async def get_tenant(
     return tenant
 
 @router.post("/tenants", response_model=TenantResponse, tags=["platform-admin"])
-async def create_tenant(
+def create_tenant(
     tenant_data: TenantCreate,
     db: Session = Depends(get_db),
     current_admin: PlatformAdmin = Depends(get_current_platform_admin)
@@ -83,7 +115,7 @@ async def create_tenant(
     tenant_org_id = generate_org_id(prefix="", length=None, db=db)
     
     # Hash the admin password
-    admin_password_hash = hash_password(tenant_data.admin_password)
+    admin_password_hash = password_pool.hash(tenant_data.admin_password)
     
     # Generate admin API key
     admin_api_key = generate_api_key()
@@ -106,7 +138,7 @@ async def create_tenant(
     return tenant
 
 @router.put("/tenants/{tenant_id}", response_model=TenantResponse, tags=["platform-admin"])
-async def update_tenant(
+def update_tenant(
     tenant_id: int,
     tenant_data: TenantUpdate,
     db: Session = Depends(get_db),
@@ -140,6 +172,9 @@ async def update_tenant(
         tenant.admin_email = tenant_data.admin_email
     if tenant_data.is_active is not None:
         tenant.is_active = tenant_data.is_active
+    if tenant_data.telemetry_retention_days is not None:
+        # 0 keeps raw telemetry forever for this tenant
+        tenant.telemetry_retention_days = tenant_data.telemetry_retention_days
     
     db.commit()
     db.refresh(tenant)
@@ -147,7 +182,7 @@ async def update_tenant(
     return tenant
 
 @router.delete("/tenants/{tenant_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["platform-admin"])
-async def delete_tenant(
+def delete_tenant(
     tenant_id: int,
     db: Session = Depends(get_db),
     current_admin: PlatformAdmin = Depends(get_current_platform_admin)
@@ -170,7 +205,7 @@ async def delete_tenant(
     return None
 
 @router.get("/tenants/{tenant_id}/stats", tags=["platform-admin"])
-async def get_tenant_stats(
+def get_tenant_stats(
     tenant_id: int,
     db: Session = Depends(get_db),
     current_admin: PlatformAdmin = Depends(get_current_platform_admin)
@@ -183,13 +218,8 @@ async def get_tenant_stats(
     - Number of companies
     - Number of branches
     - Number of users
-    - Number of agents
+    - Number of agents (registered to the tenant or any of its companies/branches)
     """
-    from backend.models.company import Company
-    from backend.models.branch import Branch
-    from backend.models.user import User
-    from backend.models.agent import Agent
-    
     tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
     
     if not tenant:
@@ -198,28 +228,7 @@ async def get_tenant_stats(
             detail="Tenant not found"
         )
     
-    # Count companies
-    companies_count = db.query(Company).filter(
-        Company.tenant_id == tenant_id,
-        Company.is_active == True
-    ).count()
-    
-    # Count branches (through companies)
-    branches_count = db.query(Branch).join(Company).filter(
-        Company.tenant_id == tenant_id,
-        Branch.is_active == True
-    ).count()
-    
-    # Count users
-    users_count = db.query(User).filter(
-        User.tenant_id == tenant_id,
-        User.is_active == True
-    ).count()
-    
-    # Count agents (by org_id matching tenant_org_id)
-    agents_count = db.query(Agent).filter(
-        Agent.org_id == tenant.tenant_org_id
-    ).count()
+    statistics = tenant_stats_cache.get_many(db, [tenant_id])[tenant_id]
     
     return {
         "tenant": {
@@ -230,11 +239,6 @@ async def get_tenant_stats(
             "created_at": tenant.created_at,
             "is_active": tenant.is_active
         },
-        "statistics": {
-            "companies": companies_count,
-            "branches": branches_count,
-            "users": users_count,
-            "agents": agents_count
-        }
+        "statistics": statistics
     }
 
@@ -1,13 +1,27 @@
 """
 Tenant Admin (Client Admin) Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from typing import List
-from backend.core.database import get_db
-from backend.core.dependencies import get_current_tenant
-from backend.core.security import hash_password
+from sqlalchemy import func
+from typing import List, Optional
+from datetime import datetime, timedelta
+from backend.core.database import get_db, SessionLocal
+from backend.core.dependencies import get_current_tenant, tenant_list_version, security
+from backend.core.security import verify_token
+from backend.core.password_pool import password_pool
 from backend.core.utils import generate_org_id
+from backend.core.tenant_scope import tenant_scope_cache, tenant_agent_criteria
+from backend.core.pagination import MAX_PAGE_LIMIT, after_cursor_desc, page_with_cursor
+from backend.core.count_cache import count_cache
+from backend.core.presence_tracker import presence_tracker
+from backend.core.tenant_events import tenant_events
+from backend.core.config import settings
 from backend.models.tenant import Tenant
 from backend.models.company import Company
 from backend.models.branch import Branch
@@ -15,39 +29,45 @@ from backend.models.user import User
 from backend.schemas.company import CompanyCreate, CompanyUpdate, CompanyResponse, CompanyListResponse
 from backend.schemas.branch import BranchCreate, BranchUpdate, BranchResponse, BranchListResponse
 from backend.schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
-from backend.schemas.agent import AgentResponse, AgentListResponse, TelemetryListResponse
+from backend.schemas.agent import AgentResponse, AgentListResponse, OnlineAgentsResponse, TelemetryListResponse
+from backend.schemas.activity import Granularity, AgentActivityResponse, ActivityReportResponse
+from backend.core.rollups import ROLLUP_MODELS, bucket_start
 
 router = APIRouter()
 
 # ==================== Company Management ====================
 
 @router.get("/companies", response_model=CompanyListResponse, tags=["tenant"])
-async def list_companies(
+def list_companies(
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = True,
+    version: int = Depends(tenant_list_version("orgs")),
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
     """
     List all companies for the current tenant
-    """
-    companies = db.query(Company).filter(
-        Company.tenant_id == current_tenant.id,
-        Company.is_active == True
-    ).offset(skip).limit(limit).all()
     
-    total = db.query(Company).filter(
+    Sends an ETag; a matching If-None-Match is answered 304 without querying the list.
+    """
+    query = db.query(Company).filter(
         Company.tenant_id == current_tenant.id,
         Company.is_active == True
-    ).count()
+    )
+    companies = query.offset(skip).limit(limit).all()
+    total, approximate = count_cache.total(
+        ("companies", current_tenant.id, version), query, include_total, versioned=True
+    )
     
     return {
         "companies": companies,
-        "total": total
+        "total": total,
+        "approximate": approximate
     }
 
 @router.get("/companies/{company_id}", response_model=CompanyResponse, tags=["tenant"])
-async def get_company(
+def get_company(
     company_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -69,7 +89,7 @@ async def get_company(
     return company
 
 @router.post("/companies", response_model=CompanyResponse, tags=["tenant"])
-async def create_company(
+def create_company(
     company_data: CompanyCreate,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -97,7 +117,7 @@ async def create_company(
     return company
 
 @router.put("/companies/{company_id}", response_model=CompanyResponse, tags=["tenant"])
-async def update_company(
+def update_company(
     company_id: int,
     company_data: CompanyUpdate,
     db: Session = Depends(get_db),
@@ -128,7 +148,7 @@ async def update_company(
     return company
 
 @router.delete("/companies/{company_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tenant"])
-async def delete_company(
+def delete_company(
     company_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -155,7 +175,7 @@ async def delete_company(
 # ==================== Branch Management ====================
 
 @router.get("/companies/{company_id}/branches", response_model=BranchListResponse, tags=["tenant"])
-async def list_branches(
+def list_branches(
     company_id: int,
     skip: int = 0,
     limit: int = 100,
@@ -193,7 +213,7 @@ async def list_branches(
     }
 
 @router.get("/branches/{branch_id}", response_model=BranchResponse, tags=["tenant"])
-async def get_branch(
+def get_branch(
     branch_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -215,7 +235,7 @@ async def get_branch(
     return branch
 
 @router.post("/companies/{company_id}/branches", response_model=BranchResponse, tags=["tenant"])
-async def create_branch(
+def create_branch(
     company_id: int,
     branch_data: BranchCreate,
     db: Session = Depends(get_db),
@@ -258,7 +278,7 @@ async def create_branch(
     return branch
 
 @router.put("/branches/{branch_id}", response_model=BranchResponse, tags=["tenant"])
-async def update_branch(
+def update_branch(
     branch_id: int,
     branch_data: BranchUpdate,
     db: Session = Depends(get_db),
@@ -293,7 +313,7 @@ async def update_branch(
     return branch
 
 @router.delete("/branches/{branch_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tenant"])
-async def delete_branch(
+def delete_branch(
     branch_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -320,32 +340,36 @@ async def delete_branch(
 # ==================== User Management ====================
 
 @router.get("/users", response_model=UserListResponse, tags=["tenant"])
-async def list_users(
+def list_users(
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = True,
+    version: int = Depends(tenant_list_version("users")),
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
     """
     List all users for the current tenant
-    """
-    users = db.query(User).filter(
-        User.tenant_id == current_tenant.id,
-        User.is_active == True
-    ).offset(skip).limit(limit).all()
     
-    total = db.query(User).filter(
+    Sends an ETag; a matching If-None-Match is answered 304 without querying the list.
+    """
+    query = db.query(User).filter(
         User.tenant_id == current_tenant.id,
         User.is_active == True
-    ).count()
+    )
+    users = query.offset(skip).limit(limit).all()
+    total, approximate = count_cache.total(
+        ("users", current_tenant.id, version), query, include_total, versioned=True
+    )
     
     return {
         "users": users,
-        "total": total
+        "total": total,
+        "approximate": approximate
     }
 
 @router.get("/users/{user_id}", response_model=UserResponse, tags=["tenant"])
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -367,7 +391,7 @@ async def get_user(
     return user
 
 @router.post("/users", response_model=UserResponse, tags=["tenant"])
-async def create_user(
+def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -384,7 +408,7 @@ async def create_user(
         )
     
     # Hash password
-    password_hash = hash_password(user_data.password)
+    password_hash = password_pool.hash(user_data.password)
     
     # Create user
     user = User(
@@ -403,7 +427,7 @@ async def create_user(
     return user
 
 @router.put("/users/{user_id}", response_model=UserResponse, tags=["tenant"])
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
@@ -438,7 +462,7 @@ async def update_user(
             )
         user.email = user_data.email
     if user_data.password is not None:
-        user.password_hash = hash_password(user_data.password)
+        user.password_hash = password_pool.hash(user_data.password)
     if user_data.role is not None:
         user.role = user_data.role
     if user_data.is_active is not None:
@@ -450,7 +474,7 @@ async def update_user(
     return user
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["tenant"])
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -477,51 +501,128 @@ async def delete_user(
 # ==================== Agent Management ====================
 
 @router.get("/agents", response_model=AgentListResponse, tags=["tenant"])
-async def list_tenant_agents(
-    skip: int = 0,
-    limit: int = 100,
+def list_tenant_agents(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
     """
     List all agents for the current tenant
     
-    Returns agents for tenant org_id, all company org_ids, and all branch org_ids.
+    Returns agents for tenant org_id, all company org_ids, and all branch org_ids,
+    most recently seen first. Pass the returned next_cursor as cursor to page
+    without OFFSET (skip is ignored when a cursor is given).
     """
     from backend.models.agent import Agent
     
-    # Get all org_ids for this tenant
-    tenant_org_id = current_tenant.tenant_org_id
+    # Denormalized tenant_id: served by the (tenant_id, last_seen) index
+    query = db.query(Agent).filter(*tenant_agent_criteria(current_tenant.id))
+    total, approximate = count_cache.total(("tenant_agents", current_tenant.id), query, include_total)
     
-    # Get company org_ids
-    companies = db.query(Company).filter(
-        Company.tenant_id == current_tenant.id,
-        Company.is_active == True
-    ).all()
-    company_org_ids = [c.company_org_id for c in companies]
+    page = query.order_by(Agent.last_seen.desc(), Agent.id.desc())
+    if cursor:
+        page = page.filter(after_cursor_desc(Agent.last_seen, Agent.id, cursor, nulls_last=True))
+    else:
+        page = page.offset(skip)
+    agents, next_cursor = page_with_cursor(page.limit(limit + 1).all(), limit, "last_seen")
     
-    # Get branch org_ids
-    branches = db.query(Branch).join(Company).filter(
-        Company.tenant_id == current_tenant.id,
-        Branch.is_active == True
-    ).all()
-    branch_org_ids = [b.branch_org_id for b in branches]
+    return {
+        "agents": agents,
+        "total": total,
+        "approximate": approximate,
+        "next_cursor": next_cursor
+    }
+
+# Declared before /agents/{agent_id} so "online" is not parsed as an agent id
+@router.get("/agents/online", response_model=OnlineAgentsResponse, tags=["tenant"])
+def count_online_agents(
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Number of the tenant's agents currently online
     
-    # Get all agents matching any of these org_ids
-    all_org_ids = [tenant_org_id] + company_org_ids + branch_org_ids
+    Served from the in-memory presence tracker; no agents query is run.
+    """
+    return {
+        "online": presence_tracker.online_count(current_tenant.id),
+        "offline_after_seconds": presence_tracker.offline_after
+    }
+
+def _tenant_is_active(tenant_id: int) -> bool:
+    """Fresh is_active lookup on a short-lived session (for long-lived streams)"""
+    db = SessionLocal()
+    try:
+        return bool(db.query(Tenant.is_active).filter(Tenant.id == tenant_id).scalar())
+    finally:
+        db.close()
+
+@router.get("/events", tags=["tenant"])
+async def stream_tenant_events(
+    request: Request,
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Live dashboard updates as Server-Sent Events
     
-    query = db.query(Agent).filter(Agent.org_id.in_(all_org_ids))
+    Events:
+    - hello: {"online"} sent on connect
+    - agent_status: {"agent_id", "status", "online"} when an agent comes online or goes offline
+    - telemetry: {"agent_id", "records", "active", "idle", "latest"} per accepted telemetry batch
+    - resync: the connection fell behind and dropped events; refetch the current view
     
-    agents = query.order_by(Agent.last_seen.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    Events come from the ingestion path, not the database. A comment line is
+    sent every EVENT_STREAM_KEEPALIVE_SECONDS to keep proxies from closing an
+    idle stream.
     
-    return {
-        "agents": agents,
-        "total": total
-    }
+    The stream ends when the access token expires or, checked once per
+    keepalive interval, the tenant is deactivated; the client reconnects
+    with a refreshed token.
+    """
+    tenant_id = current_tenant.id
+    # get_current_tenant already verified the token
+    expires_at = verify_token(credentials.credentials).get("exp")
+    # Authentication is done: do not hold a pooled connection for the life of the stream
+    db.close()
+    
+    async def events():
+        keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+        next_active_check = time.monotonic() + keepalive
+        queue = tenant_events.subscribe(tenant_id)
+        try:
+            hello = {"online": presence_tracker.online_count(tenant_id)}
+            yield f"event: hello\ndata: {json.dumps(hello)}\n\n"
+            while not await request.is_disconnected():
+                timeout = keepalive
+                if expires_at is not None:
+                    timeout = min(timeout, expires_at - time.time())
+                    if timeout <= 0:
+                        break
+                if time.monotonic() >= next_active_check:
+                    if not await asyncio.to_thread(_tenant_is_active, tenant_id):
+                        break
+                    next_active_check = time.monotonic() + keepalive
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            tenant_events.unsubscribe(tenant_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/agents/{agent_id}", response_model=AgentResponse, tags=["tenant"])
-async def get_tenant_agent(
+def get_tenant_agent(
     agent_id: int,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -541,25 +642,7 @@ async def get_tenant_agent(
         )
     
     # Verify agent belongs to tenant
-    tenant_org_id = current_tenant.tenant_org_id
-    
-    # Get company org_ids
-    companies = db.query(Company).filter(
-        Company.tenant_id == current_tenant.id,
-        Company.is_active == True
-    ).all()
-    company_org_ids = [c.company_org_id for c in companies]
-    
-    # Get branch org_ids
-    branches = db.query(Branch).join(Company).filter(
-        Company.tenant_id == current_tenant.id,
-        Branch.is_active == True
-    ).all()
-    branch_org_ids = [b.branch_org_id for b in branches]
-    
-    all_org_ids = [tenant_org_id] + company_org_ids + branch_org_ids
-    
-    if agent.org_id not in all_org_ids:
+    if not tenant_scope_cache.get(db, current_tenant).sees(agent):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Agent does not belong to this tenant"
@@ -568,10 +651,14 @@ async def get_tenant_agent(
     return agent
 
 @router.get("/agents/{agent_id}/telemetry", response_model=TelemetryListResponse, tags=["tenant"])
-async def get_agent_telemetry(
+def get_agent_telemetry(
     agent_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
@@ -579,6 +666,10 @@ async def get_agent_telemetry(
     Get telemetry data for a specific agent
     
     Returns recent telemetry records ordered by timestamp (newest first).
+    Optional start/end (inclusive/exclusive) bound the time range; the telemetry
+    table is partitioned on timestamp, so a bounded range only reads the
+    matching partitions. Pass the returned next_cursor as cursor to page by
+    (timestamp, id) instead of OFFSET (skip is ignored when a cursor is given).
     """
     from backend.models.agent import Agent
     from backend.models.telemetry import Telemetry
@@ -593,45 +684,218 @@ async def get_agent_telemetry(
         )
     
     # Verify agent belongs to tenant
-    tenant_org_id = current_tenant.tenant_org_id
+    if not tenant_scope_cache.get(db, current_tenant).sees(agent):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Agent does not belong to this tenant"
+        )
     
-    companies = db.query(Company).filter(
+    # Filter on the bare timestamp column so MySQL can prune partitions
+    query = db.query(Telemetry).filter(Telemetry.agent_id == agent_id)
+    if start is not None:
+        query = query.filter(Telemetry.timestamp >= start)
+    if end is not None:
+        query = query.filter(Telemetry.timestamp < end)
+    
+    # Counting is a range scan over every matching row: reuse it across page views
+    total, approximate = count_cache.total(("telemetry", agent_id, start, end), query, include_total)
+    
+    # Keyset pagination: deep pages cost the same index range read as the first
+    page = query.order_by(Telemetry.timestamp.desc(), Telemetry.id.desc())
+    if cursor:
+        page = page.filter(after_cursor_desc(Telemetry.timestamp, Telemetry.id, cursor))
+    else:
+        page = page.offset(skip)
+    telemetry, next_cursor = page_with_cursor(page.limit(limit + 1).all(), limit, "timestamp")
+    
+    return {
+        "agent_id": agent_id,
+        "telemetry": telemetry,
+        "total": total,
+        "approximate": approximate,
+        "next_cursor": next_cursor
+    }
+
+# ==================== Activity Reports ====================
+
+def _report_range(start: Optional[datetime], end: Optional[datetime], granularity: str, default_days: int):
+    """Normalize a report range to naive UTC bucket boundaries (rollups are stored in UTC)"""
+    if end is None:
+        end = datetime.utcnow()
+    if start is None:
+        start = end - timedelta(days=default_days)
+    return bucket_start(start, granularity), bucket_start(end, granularity)
+
+def _org_scope_org_ids(db: Session, current_tenant: Tenant, org_id: Optional[str]) -> List[str]:
+    """
+    Resolve a report scope to the org_ids whose agents it covers
+    
+    Tenant (or no org_id): every org of the tenant. Company: the company and its
+    branches. Branch: just the branch.
+    """
+    if org_id is None or org_id == current_tenant.tenant_org_id:
+        return list(tenant_scope_cache.get(db, current_tenant).org_ids)
+    
+    company = db.query(Company).filter(
+        Company.company_org_id == org_id,
         Company.tenant_id == current_tenant.id,
         Company.is_active == True
-    ).all()
-    company_org_ids = [c.company_org_id for c in companies]
+    ).first()
+    if company:
+        branches = db.query(Branch.branch_org_id).filter(
+            Branch.company_id == company.id,
+            Branch.is_active == True
+        ).all()
+        return [company.company_org_id] + [b[0] for b in branches]
     
-    branches = db.query(Branch).join(Company).filter(
+    branch = db.query(Branch).join(Company).filter(
+        Branch.branch_org_id == org_id,
         Company.tenant_id == current_tenant.id,
         Branch.is_active == True
-    ).all()
-    branch_org_ids = [b.branch_org_id for b in branches]
+    ).first()
+    if branch:
+        return [branch.branch_org_id]
+    
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Org ID not found or does not belong to this tenant"
+    )
+
+@router.get("/agents/{agent_id}/activity", response_model=AgentActivityResponse, tags=["tenant"])
+def get_agent_activity(
+    agent_id: int,
+    granularity: Granularity = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Get active/idle sample counts for an agent per time bucket
+    
+    Served from the activity rollup tables (never from raw telemetry).
+    Defaults to the last 24 hours.
+    """
+    from backend.models.agent import Agent
     
-    all_org_ids = [tenant_org_id] + company_org_ids + branch_org_ids
+    agent = db.query(Agent).filter(Agent.id == agent_id).first()
     
-    if agent.org_id not in all_org_ids:
+    if not agent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found"
+        )
+    
+    if not tenant_scope_cache.get(db, current_tenant).sees(agent):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Agent does not belong to this tenant"
         )
     
-    # Get telemetry data
-    telemetry = db.query(Telemetry).filter(
-        Telemetry.agent_id == agent_id
-    ).order_by(Telemetry.timestamp.desc()).offset(skip).limit(limit).all()
+    start, end = _report_range(start, end, granularity, default_days=1)
+    rollup = ROLLUP_MODELS[granularity]
     
-    total = db.query(Telemetry).filter(Telemetry.agent_id == agent_id).count()
+    rows = db.query(
+        rollup.bucket_start,
+        func.sum(rollup.active_count),
+        func.sum(rollup.idle_count)
+    ).filter(
+        rollup.agent_id == agent_id,
+        rollup.bucket_start >= start,
+        rollup.bucket_start <= end
+    ).group_by(rollup.bucket_start).order_by(rollup.bucket_start).all()
     
     return {
         "agent_id": agent_id,
-        "telemetry": telemetry,
-        "total": total
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "buckets": [
+            {"bucket_start": bucket, "active_samples": int(active or 0), "idle_samples": int(idle or 0)}
+            for bucket, active, idle in rows
+        ]
+    }
+
+@router.get("/reports/activity", response_model=ActivityReportResponse, tags=["tenant"])
+def get_activity_report(
+    org_id: Optional[str] = None,
+    granularity: Granularity = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """
+    Activity report for a tenant, company or branch
+    
+    Returns totals, per-application usage and a time series, aggregated from the
+    activity rollup tables. Defaults to the whole tenant over the last 30 days.
+    """
+    from backend.models.agent import Agent
+    from backend.models.process import Process
+    
+    scope_org_ids = _org_scope_org_ids(db, current_tenant, org_id)
+    start, end = _report_range(start, end, granularity, default_days=30)
+    rollup = ROLLUP_MODELS[granularity]
+    
+    if org_id is None or org_id == current_tenant.tenant_org_id:
+        agent_filter = tenant_agent_criteria(current_tenant.id)
+    else:
+        agent_filter = [Agent.org_id.in_(scope_org_ids)]
+    agent_ids = [a[0] for a in db.query(Agent.id).filter(*agent_filter).all()]
+    
+    applications = []
+    buckets = []
+    if agent_ids:
+        in_range = [
+            rollup.agent_id.in_(agent_ids),
+            rollup.bucket_start >= start,
+            rollup.bucket_start <= end
+        ]
+        
+        applications = db.query(
+            rollup.process_id,
+            Process.name,
+            func.sum(rollup.active_count).label("active"),
+            func.sum(rollup.idle_count)
+        ).outerjoin(Process, Process.id == rollup.process_id).filter(
+            *in_range
+        ).group_by(rollup.process_id, Process.name).order_by(func.sum(rollup.active_count).desc()).all()
+        
+        buckets = db.query(
+            rollup.bucket_start,
+            func.sum(rollup.active_count),
+            func.sum(rollup.idle_count)
+        ).filter(*in_range).group_by(rollup.bucket_start).order_by(rollup.bucket_start).all()
+    
+    return {
+        "org_id": org_id or current_tenant.tenant_org_id,
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "agents": len(agent_ids),
+        "active_samples": sum(int(a or 0) for _, _, a, _ in applications),
+        "idle_samples": sum(int(i or 0) for _, _, _, i in applications),
+        "applications": [
+            {
+                "process_id": process_id,
+                "process_name": name,
+                "active_samples": int(active or 0),
+                "idle_samples": int(idle or 0)
+            }
+            for process_id, name, active, idle in applications
+        ],
+        "buckets": [
+            {"bucket_start": bucket, "active_samples": int(active or 0), "idle_samples": int(idle or 0)}
+            for bucket, active, idle in buckets
+        ]
     }
 
 # ==================== Agent Download ====================
 
 @router.get("/org-ids", tags=["tenant"])
-async def list_org_ids(
+def list_org_ids(
+    version: int = Depends(tenant_list_version("orgs")),
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
 ):
@@ -642,6 +906,8 @@ async def list_org_ids(
     - Tenant org_id
     - All company org_ids
     - All branch org_ids
+    
+    Sends an ETag; a matching If-None-Match is answered 304 without querying the list.
     """
     # Get tenant org_id
     tenant_org = {
@@ -692,7 +958,7 @@ async def list_org_ids(
     }
 
 @router.get("/download-agent/{org_id}", tags=["tenant"])
-async def download_agent(
+def download_agent(
     org_id: str,
     db: Session = Depends(get_db),
     current_tenant: Tenant = Depends(get_current_tenant)
@@ -0,0 +1,142 @@
+"""
+Agent Token Cache
+
+Bounded LRU cache with TTL mapping agent tokens to a lightweight agent
+principal, so heartbeat and telemetry requests do not hit the agents table
+on every call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.core.commit_hooks import invalidate_on_commit
+from backend.core.config import settings
+from backend.models.agent import Agent, AgentStatus
+
+@dataclass(frozen=True)
+class AgentPrincipal:
+    """Authenticated agent identity (detached from any DB session)"""
+    id: int
+    org_id: str
+    status: AgentStatus
+    agent_token: str
+    tenant_id: Optional[int] = None
+
+    @classmethod
+    def from_agent(cls, agent: Agent) -> "AgentPrincipal":
+        return cls(
+            id=agent.id,
+            org_id=agent.org_id,
+            status=agent.status,
+            agent_token=agent.agent_token,
+            tenant_id=agent.tenant_id
+        )
+
+class AgentTokenCache:
+    """Thread-safe LRU + TTL cache of agent_token -> AgentPrincipal"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[AgentPrincipal]:
+        """Return the cached principal for a token, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def put(self, principal: AgentPrincipal) -> None:
+        """Cache a principal under its token"""
+        if self.max_size == 0:
+            return
+        with self._lock:
+            old_token = self._tokens_by_id.get(principal.id)
+            if old_token is not None and old_token != principal.agent_token:
+                self._remove(old_token)
+            self._entries[principal.agent_token] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(principal.agent_token)
+            self._tokens_by_id[principal.id] = principal.agent_token
+            while len(self._entries) > self.max_size:
+                token, (evicted, _) = self._entries.popitem(last=False)
+                self._tokens_by_id.pop(evicted.id, None)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        """Drop a token from the cache"""
+        with self._lock:
+            if self._remove(token):
+                self.invalidations += 1
+
+    def invalidate_agent(self, agent_id: int) -> None:
+        """Drop whatever token is cached for an agent ID"""
+        with self._lock:
+            token = self._tokens_by_id.get(agent_id)
+            if token is not None and self._remove(token):
+                self.invalidations += 1
+
+    def invalidate_agents_on_commit(self, session: Optional[Session], agent_ids: Iterable[int]) -> None:
+        """Invalidate agents now and again after the session commits (see commit_hooks)"""
+        for agent_id in agent_ids:
+            invalidate_on_commit(session, self.invalidate_agent, agent_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_id.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+    def _remove(self, token: str) -> bool:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return False
+        principal, _ = entry
+        if self._tokens_by_id.get(principal.id) == token:
+            del self._tokens_by_id[principal.id]
+        return True
+
+agent_token_cache = AgentTokenCache(
+    max_size=settings.AGENT_TOKEN_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AGENT_TOKEN_CACHE_TTL_SECONDS
+)
+
+@event.listens_for(Agent, "after_delete")
+def _invalidate_deleted_agent(mapper, connection, target):
+    """Evict deleted agents so their token stops authenticating immediately"""
+    agent_token_cache.invalidate_agent(target.id)
@@ -0,0 +1,168 @@
+"""
+Telemetry Batch Sequences
+
+Agents tag each telemetry batch with a strictly increasing, agent-scoped
+batch_seq. The last accepted sequence per agent is kept in memory (LRU) and
+persisted in agents.last_batch_seq, so a batch retried after a lost response
+is recognized as a replay without querying the telemetry table.
+
+A sequence is only ever advanced in the transaction that stores the batch's
+rows: by claim() in the synchronous ingest transaction, or by claim_many() in
+the write-behind flush transaction. A batch that is never stored (crash,
+failed flush) is therefore accepted again when the agent retries it, and a
+retry that lands on another API worker is rejected by the row lock on the
+agent. The in-memory copy only short-cuts known replays.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Set, Tuple
+from sqlalchemy import select, update, case
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.models.agent import Agent
+
+class BatchSequenceTracker:
+    """Last accepted batch sequence per agent"""
+
+    def __init__(self, max_agents: int):
+        self.max_agents = max(1, max_agents)
+        self._last: "OrderedDict[int, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.accepted = 0
+        self.duplicates = 0
+
+    def _remember(self, agent_id: int, seq: int) -> None:
+        """Record seq as accepted for agent_id (caller holds the lock)"""
+        if seq > self._last.get(agent_id, -1):
+            self._last[agent_id] = seq
+        self._last.move_to_end(agent_id)
+        while len(self._last) > self.max_agents:
+            self._last.popitem(last=False)
+
+    def _is_known_duplicate(self, agent_id: int, seq: int) -> bool:
+        last = self._last.get(agent_id)
+        return last is not None and seq <= last
+
+    def is_known_duplicate(self, agent_id: int, seq: int) -> bool:
+        """
+        Reject a replay of an already stored batch from memory alone
+
+        Used before queueing a write-behind batch; replays that are not known
+        here are still rejected by claim_many() when the buffer flushes.
+        """
+        with self._lock:
+            if self._is_known_duplicate(agent_id, seq):
+                self.duplicates += 1
+                return True
+        return False
+
+    # ==================== Synchronous ingestion ====================
+
+    def claim(self, db: Session, agent_id: int, seq: int) -> bool:
+        """
+        Claim seq inside the caller's ingest transaction
+
+        Known replays are rejected from memory. Otherwise a conditional UPDATE
+        advances agents.last_batch_seq; it matches no row if another worker
+        already accepted this sequence, and it locks the agent row until the
+        caller commits, so concurrent retries of one batch cannot both pass.
+        Call accept() after the transaction commits.
+
+        Args:
+            db: Session of the ingest transaction
+            agent_id: Agent ID
+            seq: Batch sequence number
+
+        Returns:
+            bool: False if the batch is a replay and must not be inserted
+        """
+        if self.is_known_duplicate(agent_id, seq):
+            return False
+
+        if not self._advance(db, agent_id, seq):
+            with self._lock:
+                self.duplicates += 1
+            return False
+        return True
+
+    @staticmethod
+    def _advance(db: Session, agent_id: int, seq: int) -> bool:
+        """Move agents.last_batch_seq up to seq; False if it is already there or beyond"""
+        result = db.execute(
+            update(Agent)
+            .where(Agent.id == agent_id, Agent.last_batch_seq < seq)
+            .values(last_batch_seq=seq)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def accept(self, agent_id: int, seq: int) -> None:
+        """Record a committed batch sequence in memory"""
+        with self._lock:
+            self._remember(agent_id, seq)
+            self.accepted += 1
+
+    # ==================== Write-behind ingestion ====================
+
+    def claim_many(self, db: Session, batches: Iterable[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        """
+        Claim the sequences of many buffered batches inside a flush transaction
+
+        Locks the agents' rows (SELECT ... FOR UPDATE), keeps every batch whose
+        sequence is above agents.last_batch_seq (each (agent_id, seq) once) and
+        advances the column with one UPDATE. A concurrent flush of the same
+        batch on another worker waits for the lock and then sees the new value.
+        Call accept() for the returned batches after the transaction commits.
+
+        Args:
+            db: Session of the flush transaction
+            batches: (agent_id, seq) pairs
+
+        Returns:
+            The (agent_id, seq) pairs whose rows must be inserted
+        """
+        pairs = sorted(set(batches))
+        if not pairs:
+            return set()
+        agent_ids = sorted({agent_id for agent_id, _ in pairs})
+        last = dict(db.execute(
+            select(Agent.id, Agent.last_batch_seq).where(Agent.id.in_(agent_ids)).with_for_update()
+        ).all())
+
+        accepted: Set[Tuple[int, int]] = set()
+        advanced: Dict[int, int] = {}
+        for agent_id, seq in pairs:
+            if agent_id in last and seq > last[agent_id]:
+                accepted.add((agent_id, seq))
+                last[agent_id] = advanced[agent_id] = seq
+        with self._lock:
+            self.duplicates += len(pairs) - len(accepted)
+
+        if advanced:
+            db.execute(
+                update(Agent)
+                .where(Agent.id.in_(list(advanced.keys())))
+                .values(last_batch_seq=case(advanced, value=Agent.id))
+                .execution_options(synchronize_session=False)
+            )
+        return accepted
+
+    def last(self, agent_id: int) -> Optional[int]:
+        """Last accepted sequence held in memory for agent_id"""
+        with self._lock:
+            return self._last.get(agent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sequence tracking counters for monitoring"""
+        with self._lock:
+            size = len(self._last)
+        return {
+            "size": size,
+            "max_size": self.max_agents,
+            "accepted": self.accepted,
+            "duplicates": self.duplicates
+        }
+
+batch_sequences = BatchSequenceTracker(max_agents=settings.BATCH_SEQUENCE_CACHE_SIZE)
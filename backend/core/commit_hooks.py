@@ -0,0 +1,45 @@
+"""
+Session Commit Hooks
+
+In-process caches that mirror database rows must not keep state from a
+transaction that is still open: another request may reload an entry from
+the not-yet-committed change, or the change may be rolled back. The helpers
+here queue a callback on the session and run it once the session commits;
+callbacks are deduplicated per session and discarded on rollback.
+"""
+from typing import Callable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_INFO_KEY = "after_commit_callbacks"
+
+def on_commit(session: Optional[Session], callback: Callable, *args) -> None:
+    """
+    Run callback(*args) after the session commits (nothing without a session)
+
+    Args:
+        session: Session of the pending change
+        callback: Hashable callable (e.g. a bound cache method)
+        args: Hashable arguments
+    """
+    if session is not None:
+        session.info.setdefault(_INFO_KEY, set()).add((callback, args))
+
+def invalidate_on_commit(session: Optional[Session], invalidate: Callable, *args) -> None:
+    """
+    Run a cache invalidation now and again after the session commits
+
+    The second call drops an entry another request may have reloaded from
+    the not-yet-committed state in between.
+    """
+    invalidate(*args)
+    on_commit(session, invalidate, *args)
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session):
+    for callback, args in session.info.pop(_INFO_KEY, ()):
+        callback(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_commit_callbacks(session):
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,303 @@
+"""
+Compressed Request Body Support
+
+Route class that transparently decompresses request bodies sent with
+Content-Encoding: gzip (or zstd, when the zstandard package is installed),
+with guards on the compressed and decompressed sizes to protect against
+oversized uploads and compression bombs. Buffered bodies are decompressed in
+the threadpool so a large upload does not stall the event loop.
+"""
+import asyncio
+import queue
+import zlib
+from typing import AsyncIterator, Callable, Optional
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from backend.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+_CHUNK_SIZE = 64 * 1024
+
+def _too_large(max_size: Optional[int] = None) -> HTTPException:
+    if max_size is None:
+        max_size = settings.MAX_DECOMPRESSED_BODY_BYTES
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Decompressed request body exceeds {max_size} bytes"
+    )
+
+def gunzip_limited(data: bytes, max_size: int) -> bytes:
+    """
+    Decompress a gzip body, refusing to produce more than max_size bytes
+
+    Raises:
+        HTTPException: 413 if the limit is exceeded, 400 if the body is not valid gzip
+    """
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    output = bytearray()
+    try:
+        for start in range(0, len(data), _CHUNK_SIZE):
+            chunk = data[start:start + _CHUNK_SIZE]
+            while chunk:
+                output += decompressor.decompress(chunk, max_size + 1 - len(output))
+                if len(output) > max_size:
+                    raise _too_large()
+                chunk = decompressor.unconsumed_tail
+        output += decompressor.flush()
+    except zlib.error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid gzip request body"
+        )
+    if len(output) > max_size:
+        raise _too_large()
+    return bytes(output)
+
+def unzstd_limited(data: bytes, max_size: int) -> bytes:
+    """
+    Decompress a zstd body, refusing to produce more than max_size bytes
+
+    Raises:
+        HTTPException: 415 if zstandard is not installed, 413 if the limit is exceeded,
+            400 if the body is not valid zstd
+    """
+    if zstandard is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="zstd Content-Encoding is not supported by this server"
+        )
+    reader = zstandard.ZstdDecompressor().stream_reader(data)
+    output = bytearray()
+    try:
+        while True:
+            chunk = reader.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            output += chunk
+            if len(output) > max_size:
+                raise _too_large()
+    except zstandard.ZstdError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid zstd request body"
+        )
+    return bytes(output)
+
+class _ChunkFeed:
+    """
+    Blocking file-like view of body chunks pushed from the event loop
+
+    zstandard's decompressobj() cannot bound its output per call, but its
+    stream_reader() can. The reader pulls from this object in a worker thread
+    while the event loop pushes the received chunks; the small queue keeps at
+    most a few compressed chunks in memory.
+    """
+
+    _POLL_SECONDS = 0.5
+
+    def __init__(self):
+        self._chunks: "queue.Queue[bytes]" = queue.Queue(maxsize=4)
+        self._pending = b""
+        self._eof = False
+        self._closed = False
+
+    def push(self, chunk: bytes) -> None:
+        """Queue a compressed chunk; b"" marks the end of the body (blocking)"""
+        while not self._closed:
+            try:
+                self._chunks.put(chunk, timeout=self._POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._pending and not self._eof:
+            if self._closed:
+                self._eof = True
+                break
+            try:
+                chunk = self._chunks.get(timeout=self._POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if chunk:
+                self._pending = chunk
+            else:
+                self._eof = True
+        if size is None or size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self) -> None:
+        """Unblock both sides once the consumer stops"""
+        self._closed = True
+
+class DecompressingRequest(Request):
+    """Request whose body() is decompressed according to Content-Encoding"""
+
+    async def _read_compressed(self) -> bytes:
+        """
+        Read a compressed body, refusing more than MAX_COMPRESSED_BODY_BYTES
+
+        A declared Content-Length over the limit is rejected before reading.
+
+        Raises:
+            HTTPException: 413 if the compressed body exceeds the limit
+        """
+        max_size = settings.MAX_COMPRESSED_BODY_BYTES
+        too_large = HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Compressed request body exceeds {max_size} bytes"
+        )
+        try:
+            declared = int(self.headers.get("content-length", "0"))
+        except ValueError:
+            declared = 0
+        if declared > max_size:
+            raise too_large
+        body = bytearray()
+        async for chunk in self.stream():
+            body += chunk
+            if len(body) > max_size:
+                raise too_large
+        return bytes(body)
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            encoding = self.headers.get("content-encoding", "identity").strip().lower()
+            max_size = settings.MAX_DECOMPRESSED_BODY_BYTES
+            # Decompression is CPU-bound: keep it off the event loop
+            if encoding == "gzip":
+                body = await run_in_threadpool(gunzip_limited, await self._read_compressed(), max_size)
+            elif encoding == "zstd":
+                body = await run_in_threadpool(unzstd_limited, await self._read_compressed(), max_size)
+            elif encoding in ("", "identity"):
+                body = await super().body()
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail=f"Unsupported Content-Encoding: {encoding}"
+                )
+            self._body = body
+        return self._body
+
+    async def stream_decompressed(self) -> AsyncIterator[bytes]:
+        """
+        Yield the request body incrementally, decompressing it on the fly
+
+        Unlike body(), nothing is buffered: every yielded piece is at most
+        _CHUNK_SIZE bytes and the consumer is expected to process the data
+        chunk by chunk. The decompressed total is capped at
+        MAX_DECOMPRESSED_STREAM_BYTES.
+
+        Raises:
+            HTTPException: 415 for an unsupported encoding, 413 if the decompressed
+                total exceeds the limit, 400 for a corrupt body
+        """
+        encoding = self.headers.get("content-encoding", "identity").strip().lower()
+        if encoding == "gzip":
+            pieces = self._stream_gunzip()
+        elif encoding == "zstd":
+            if zstandard is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="zstd Content-Encoding is not supported by this server"
+                )
+            pieces = self._stream_unzstd()
+        elif encoding in ("", "identity"):
+            async for chunk in self.stream():
+                if chunk:
+                    yield chunk
+            return
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Encoding: {encoding}"
+            )
+
+        max_size = settings.MAX_DECOMPRESSED_STREAM_BYTES
+        total = 0
+        try:
+            async for output in pieces:
+                total += len(output)
+                if total > max_size:
+                    raise _too_large(max_size)
+                yield output
+        finally:
+            await pieces.aclose()
+
+    async def _stream_gunzip(self) -> AsyncIterator[bytes]:
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            async for chunk in self.stream():
+                # Bound each output piece so a highly compressed chunk cannot balloon
+                while chunk:
+                    output = decompressor.decompress(chunk, _CHUNK_SIZE)
+                    if output:
+                        yield output
+                    chunk = decompressor.unconsumed_tail
+            output = decompressor.flush()
+            if output:
+                yield output
+        except zlib.error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid gzip request body"
+            )
+
+    async def _stream_unzstd(self) -> AsyncIterator[bytes]:
+        feed = _ChunkFeed()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            feed, read_size=_CHUNK_SIZE, read_across_frames=True
+        )
+
+        async def pump() -> None:
+            try:
+                async for chunk in self.stream():
+                    if chunk:
+                        await asyncio.to_thread(feed.push, chunk)
+                await asyncio.to_thread(feed.push, b"")
+            except BaseException:
+                # Client went away: let the reader see the end instead of waiting forever
+                feed.close()
+                raise
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            while True:
+                # read() returns at most _CHUNK_SIZE bytes however well the input compresses
+                output = await asyncio.to_thread(reader.read, _CHUNK_SIZE)
+                if not output:
+                    break
+                yield output
+            await pump_task
+        except zstandard.ZstdError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid zstd request body"
+            )
+        finally:
+            feed.close()
+            if not pump_task.done():
+                pump_task.cancel()
+                try:
+                    await pump_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+class DecompressingRoute(APIRoute):
+    """APIRoute that accepts gzip/zstd compressed request bodies"""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            request = DecompressingRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return custom_route_handler
@@ -37,6 +37,90 @@ class Settings(BaseSettings):
     # Application
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     API_V1_PREFIX: str = os.getenv("API_V1_PREFIX", "/api/v1")
+    # Client addresses (comma-separated) that may read /metrics without a platform admin token
+    METRICS_ALLOWED_IPS: str = os.getenv("METRICS_ALLOWED_IPS", "")
+    
+    # Database connection pool (size it against THREADPOOL_SIZE; see pool stats at /metrics)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "300"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    
+    # Request threadpool (sync endpoints and dependencies run here, off the event loop)
+    THREADPOOL_SIZE: int = int(os.getenv("THREADPOOL_SIZE", "40"))
+    
+    # Password hashing pool (bcrypt runs on these workers, not on request threads)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+    
+    # Agent token cache
+    AGENT_TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("AGENT_TOKEN_CACHE_MAX_SIZE", "50000"))
+    AGENT_TOKEN_CACHE_TTL_SECONDS: float = float(os.getenv("AGENT_TOKEN_CACHE_TTL_SECONDS", "300"))
+    
+    # Tenant org scope cache (invalidated on company/branch writes; TTL bounds cross-worker staleness)
+    TENANT_SCOPE_CACHE_MAX_SIZE: int = int(os.getenv("TENANT_SCOPE_CACHE_MAX_SIZE", "10000"))
+    TENANT_SCOPE_CACHE_TTL_SECONDS: float = float(os.getenv("TENANT_SCOPE_CACHE_TTL_SECONDS", "60"))
+    
+    # List totals cache (COUNT(*) results reused for this long; responses flag them as approximate)
+    COUNT_CACHE_MAX_SIZE: int = int(os.getenv("COUNT_CACHE_MAX_SIZE", "10000"))
+    COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+    
+    # Platform admin tenant statistics cache
+    TENANT_STATS_CACHE_MAX_SIZE: int = int(os.getenv("TENANT_STATS_CACHE_MAX_SIZE", "10000"))
+    TENANT_STATS_CACHE_TTL_SECONDS: float = float(os.getenv("TENANT_STATS_CACHE_TTL_SECONDS", "30"))
+    
+    # Heartbeat coalescing (agents.last_seen is flushed in batches at this interval)
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("HEARTBEAT_FLUSH_INTERVAL_SECONDS", "5"))
+    HEARTBEAT_FLUSH_BATCH_SIZE: int = int(os.getenv("HEARTBEAT_FLUSH_BATCH_SIZE", "1000"))
+    
+    # Presence tracking (agents with no check-in for this long are marked OFFLINE; agent heartbeat is 30s)
+    AGENT_OFFLINE_AFTER_SECONDS: float = float(os.getenv("AGENT_OFFLINE_AFTER_SECONDS", "90"))
+    PRESENCE_TICK_SECONDS: float = float(os.getenv("PRESENCE_TICK_SECONDS", "5"))
+    
+    # Dashboard push channel (GET /tenant/events)
+    EVENT_STREAM_QUEUE_SIZE: int = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "256"))
+    EVENT_STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("EVENT_STREAM_KEEPALIVE_SECONDS", "15"))
+    
+    # Compressed agent uploads (guard against decompression bombs)
+    MAX_DECOMPRESSED_BODY_BYTES: int = int(os.getenv("MAX_DECOMPRESSED_BODY_BYTES", str(16 * 1024 * 1024)))
+    # Compressed bytes read before a buffered body is decompressed
+    MAX_COMPRESSED_BODY_BYTES: int = int(os.getenv("MAX_COMPRESSED_BODY_BYTES", str(8 * 1024 * 1024)))
+    # Total decompressed size accepted by streaming endpoints (telemetry backfill)
+    MAX_DECOMPRESSED_STREAM_BYTES: int = int(os.getenv("MAX_DECOMPRESSED_STREAM_BYTES", str(1024 * 1024 * 1024)))
+    
+    # Telemetry ingestion
+    TELEMETRY_INSERT_CHUNK_SIZE: int = int(os.getenv("TELEMETRY_INSERT_CHUNK_SIZE", "1000"))
+    # Write-behind acknowledges batches before they are stored: rows still in memory are
+    # lost on a crash or OOM (set TELEMETRY_SPILL_DIR so overflow and shutdown survive)
+    TELEMETRY_WRITE_BEHIND: bool = os.getenv("TELEMETRY_WRITE_BEHIND", "False").lower() == "true"
+    TELEMETRY_BUFFER_MAX_ROWS: int = int(os.getenv("TELEMETRY_BUFFER_MAX_ROWS", "200000"))
+    TELEMETRY_FLUSH_ROWS: int = int(os.getenv("TELEMETRY_FLUSH_ROWS", "5000"))
+    TELEMETRY_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("TELEMETRY_FLUSH_INTERVAL_SECONDS", "2"))
+    TELEMETRY_SPILL_DIR: str = os.getenv("TELEMETRY_SPILL_DIR", "")
+    # Failed flushes before a batch is bisected and rows that cannot be inserted are dead-lettered
+    TELEMETRY_FLUSH_MAX_RETRIES: int = int(os.getenv("TELEMETRY_FLUSH_MAX_RETRIES", "3"))
+    PROCESS_DICTIONARY_CACHE_SIZE: int = int(os.getenv("PROCESS_DICTIONARY_CACHE_SIZE", "20000"))
+    WINDOW_TITLE_DICTIONARY_CACHE_SIZE: int = int(os.getenv("WINDOW_TITLE_DICTIONARY_CACHE_SIZE", "200000"))
+    TELEMETRY_STREAM_CHUNK_ROWS: int = int(os.getenv("TELEMETRY_STREAM_CHUNK_ROWS", "5000"))
+    TELEMETRY_STREAM_MAX_LINE_BYTES: int = int(os.getenv("TELEMETRY_STREAM_MAX_LINE_BYTES", str(64 * 1024)))
+    BATCH_SEQUENCE_CACHE_SIZE: int = int(os.getenv("BATCH_SEQUENCE_CACHE_SIZE", "100000"))
+    ACTIVITY_ROLLUPS_ENABLED: bool = os.getenv("ACTIVITY_ROLLUPS_ENABLED", "True").lower() == "true"
+    
+    # Telemetry partitioning (maintained by scripts/manage_partitions.py)
+    TELEMETRY_PARTITION_GRANULARITY: str = os.getenv("TELEMETRY_PARTITION_GRANULARITY", "day")  # day | month
+    TELEMETRY_PARTITIONS_AHEAD: int = int(os.getenv("TELEMETRY_PARTITIONS_AHEAD", "7"))
+    TELEMETRY_PARTITION_RETENTION_DAYS: int = int(os.getenv("TELEMETRY_PARTITION_RETENTION_DAYS", "0"))
+    
+    # Retention (per-tenant tenants.telemetry_retention_days overrides TELEMETRY_RETENTION_DAYS; 0 keeps forever)
+    TELEMETRY_RETENTION_DAYS: int = int(os.getenv("TELEMETRY_RETENTION_DAYS", "0"))
+    ROLLUP_MINUTE_RETENTION_DAYS: int = int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "14"))
+    ROLLUP_HOUR_RETENTION_DAYS: int = int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "400"))
+    # In-process retention loop; enable on one worker only (or run scripts/run_retention.py from cron)
+    RETENTION_JOB_ENABLED: bool = os.getenv("RETENTION_JOB_ENABLED", "False").lower() == "true"
+    RETENTION_JOB_INTERVAL_SECONDS: float = float(os.getenv("RETENTION_JOB_INTERVAL_SECONDS", "3600"))
+    RETENTION_DELETE_CHUNK_SIZE: int = int(os.getenv("RETENTION_DELETE_CHUNK_SIZE", "5000"))
+    RETENTION_CHUNK_PAUSE_SECONDS: float = float(os.getenv("RETENTION_CHUNK_PAUSE_SECONDS", "0.1"))
     
     # CORS - parse from comma-separated string
     CORS_ORIGINS_STR: str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8000")
@@ -69,6 +153,10 @@ class Settings(BaseSettings):
             origins.append("http://127.0.0.1:8080")
         return origins
     
+    def get_metrics_allowed_ips(self) -> List[str]:
+        """Parse the /metrics scraper allowlist from comma-separated string"""
+        return [ip.strip() for ip in self.METRICS_ALLOWED_IPS.split(",") if ip.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,100 @@
+"""
+List Totals Cache
+
+List endpoints report the total number of matching rows next to each page.
+Running COUNT(*) on every page request is a full index range scan (on
+telemetry, over every row of the agent), so totals are cached for a short
+TTL, keyed by the list and its filters. A cached total may be up to
+COUNT_CACHE_TTL_SECONDS old; responses flag it as approximate, except for
+lists whose key carries their list version (backend/core/list_versions.py):
+every write changes the key, so those cached totals are exact. Clients that
+do not need the total can skip it entirely with include_total=false.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple
+from sqlalchemy.orm import Query
+from backend.core.config import settings
+
+class CountCache:
+    """Thread-safe LRU + TTL cache of list key -> row count"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def total(
+        self,
+        key: Hashable,
+        query: Query,
+        include_total: bool = True,
+        versioned: bool = False
+    ) -> Tuple[Optional[int], bool]:
+        """
+        Return the row count of a list query, from the cache when fresh
+
+        Args:
+            key: Identifies the list and its filters (e.g. ("telemetry", agent_id, start, end))
+            query: Filtered (unpaged) query to count on a miss
+            include_total: False skips counting and returns no total
+            versioned: The key includes a list version bumped on every write, so a
+                cached total is never stale
+
+        Returns:
+            (total or None, approximate) - approximate is True when served from the
+            cache for a key that is not versioned
+        """
+        if not include_total:
+            with self._lock:
+                self.skipped += 1
+            return None, False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], not versioned
+            self.misses += 1
+
+        total = query.order_by(None).count()
+
+        if self.max_size:
+            with self._lock:
+                self._entries[key] = (total, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return total, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "skipped": self.skipped
+        }
+
+count_cache = CountCache(
+    max_size=settings.COUNT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS
+)
@@ -5,12 +5,20 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from backend.core.config import settings
+from backend.core.pool_metrics import InstrumentedQueuePool
 
 # Create database engine
 engine = create_engine(
     settings.database_url,  # Use property that handles password encoding
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=InstrumentedQueuePool,  # Per-route checkout metrics, see /metrics
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,  # Keep below MySQL wait_timeout
+    pool_pre_ping=settings.DB_POOL_PRE_PING,  # One extra round trip per checkout
+    # The app writes naive UTC datetimes; a UTC session keeps TIMESTAMP columns
+    # from being shifted by the server time zone (rollup rebuilds read in UTC too)
+    connect_args={"init_command": "SET time_zone = '+00:00'"},
     echo=settings.DEBUG
 )
 
@@ -1,17 +1,20 @@
 """
 Dependencies for FastAPI routes (authentication, database, etc.)
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
+from backend.core.config import settings
 from backend.core.database import get_db
+from backend.core.list_versions import list_versions
 from backend.core.security import verify_token
 from backend.models.platform_admin import PlatformAdmin
 from backend.models.tenant import Tenant
 from backend.models.user import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def get_current_platform_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -71,6 +74,32 @@ def get_current_platform_admin(
     
     return admin
 
+def require_metrics_access(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> None:
+    """
+    Allow /metrics to addresses in METRICS_ALLOWED_IPS and to platform admins
+    
+    Args:
+        request: Incoming request (client address)
+        credentials: HTTP Bearer token credentials, if any
+        db: Database session
+        
+    Raises:
+        HTTPException: If the client is not allowlisted and the token is missing or not a platform admin's
+    """
+    if request.client is not None and request.client.host in settings.get_metrics_allowed_ips():
+        return
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    get_current_platform_admin(credentials, db)
+
 def get_current_tenant(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -187,3 +216,42 @@ def get_current_user(
     
     return user
 
+# ==================== Conditional list requests ====================
+
+def _conditional(db: Session, request: Request, response: Response, key) -> int:
+    version, etag, not_modified = list_versions.check(db, key, request.headers.get("if-none-match"))
+    # Browsers keep the response but revalidate it on every use
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if not_modified:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return version
+
+def tenant_list_version(kind: str):
+    """
+    Dependency answering If-None-Match for a tenant list ("orgs" or "users")
+
+    The tenant is authenticated (and checked to be active) first; an unchanged
+    list is then answered 304 Not Modified before it is queried. Otherwise the
+    ETag is set on the response and the list version returned (e.g. to key
+    cached totals).
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_tenant: Tenant = Depends(get_current_tenant)
+    ) -> int:
+        return _conditional(db, request, response, (kind, current_tenant.id))
+    return dependency
+
+def platform_list_version(kind: str):
+    """Dependency answering If-None-Match for a platform-wide list (e.g. "tenants")"""
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_admin: PlatformAdmin = Depends(get_current_platform_admin)
+    ) -> int:
+        return _conditional(db, request, response, (kind,))
+    return dependency
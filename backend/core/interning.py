@@ -0,0 +1,153 @@
+"""
+String Dictionary Interning
+
+Maps repetitive telemetry strings (process names, window titles) to integer
+IDs in their lookup tables, with an in-process LRU cache so the ingestion path
+only touches the dictionary tables for values it has never seen.
+
+Lookups and inserts run on the caller's connection, inside its transaction:
+a second pooled connection per ingest request would deadlock the pool once
+every connection is held by an ingest waiting for another one. IDs of
+entries inserted by the transaction are cached only after it commits.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Any
+from sqlalchemy import select, insert, Column
+from sqlalchemy.orm import Session
+from backend.core.commit_hooks import on_commit
+from backend.core.config import settings
+from backend.models.process import Process
+from backend.models.window_title import WindowTitle
+
+class StringDictionary:
+    """Interns strings of one lookup-table column into integer IDs"""
+
+    def __init__(self, column: Column, max_length: int, max_cache: int):
+        self.column = column
+        self.table = column.table
+        self.id_column = self.table.c.id
+        self.max_length = max_length
+        self.max_cache = max(0, max_cache)
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.inserted = 0
+
+    def _key(self, value: str) -> str:
+        # Trailing spaces are insignificant to MySQL's PAD SPACE collations
+        return value[:self.max_length].rstrip(" ")
+
+    def ids_for(self, db: Session, values: Iterable[Optional[str]]) -> Dict[str, int]:
+        """
+        Resolve strings to dictionary IDs, creating missing entries
+
+        New entries are inserted in the caller's transaction and their IDs
+        are cached once it commits, so cached IDs never refer to rows that
+        were rolled back.
+
+        Args:
+            db: Session of the ingest transaction
+            values: Strings to resolve (None values are ignored)
+
+        Returns:
+            Dict mapping each given string to its ID
+        """
+        wanted = {value for value in values if value is not None}
+        if not wanted:
+            return {}
+
+        result: Dict[str, int] = {}
+        missing = set()
+        with self._lock:
+            for value in wanted:
+                key = self._key(value)
+                id_ = self._cache.get(key)
+                if id_ is None:
+                    missing.add(key)
+                else:
+                    self._cache.move_to_end(key)
+                    result[value] = id_
+            self.hits += len(wanted) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            resolved, existing = self._resolve(db.connection(), missing)
+            with self._lock:
+                for key in existing:
+                    self._remember(key, resolved[key])
+            for key, id_ in resolved.items():
+                if key not in existing:
+                    on_commit(db, self.remember, key, id_)
+            for value in wanted:
+                if value not in result:
+                    result[value] = resolved[self._key(value)]
+
+        return result
+
+    def _resolve(self, conn, keys: set) -> tuple:
+        """
+        Look up keys, inserting the ones that do not exist yet
+
+        Returns:
+            (key -> ID for all keys, set of keys that already existed)
+        """
+        found = self._select(conn, list(keys))
+        existing = set(found)
+        # Sorted so concurrent transactions lock new entries in the same order
+        new = sorted(key for key in keys if key not in found)
+        if new:
+            # INSERT IGNORE: concurrent workers may intern the same value
+            conn.execute(
+                insert(self.table).prefix_with("IGNORE"),
+                [{self.column.name: key} for key in new]
+            )
+            found.update(self._select(conn, new))
+            self.inserted += len(new)
+        return found, existing
+
+    def _select(self, conn, keys) -> Dict[str, int]:
+        rows = conn.execute(
+            select(self.column, self.id_column).where(self.column.in_(keys))
+        )
+        return {value: id_ for value, id_ in rows}
+
+    def remember(self, key: str, id_: int) -> None:
+        """Cache an ID whose entry is committed"""
+        with self._lock:
+            self._remember(key, id_)
+
+    def _remember(self, key: str, id_: int) -> None:
+        if self.max_cache == 0:
+            return
+        self._cache[key] = id_
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Interning counters for monitoring"""
+        with self._lock:
+            size = len(self._cache)
+        return {
+            "size": size,
+            "max_size": self.max_cache,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inserted": self.inserted
+        }
+
+process_dictionary = StringDictionary(
+    Process.__table__.c.name,
+    max_length=255,
+    max_cache=settings.PROCESS_DICTIONARY_CACHE_SIZE
+)
+
+window_title_dictionary = StringDictionary(
+    WindowTitle.__table__.c.title,
+    max_length=500,
+    max_cache=settings.WINDOW_TITLE_DICTIONARY_CACHE_SIZE
+)
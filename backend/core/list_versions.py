@@ -0,0 +1,119 @@
+"""
+List Version Stamps
+
+Dashboards poll the tenant lists (companies, org_ids, users) and the platform
+tenant list far more often than they change. Each list has a version counter
+in the list_versions table, bumped by ORM flush listeners in the transaction
+that writes a row behind it, and the list endpoints send an ETag derived from
+it. A request whose If-None-Match still matches is answered 304 Not Modified
+after authentication and one primary-key lookup, before the list is queried
+or serialized.
+
+Keys:
+    ("orgs", tenant_id)   companies and org_ids (tenant, company and branch rows)
+    ("users", tenant_id)  users
+    ("tenants",)          platform tenant list
+
+The version lives in the database, so every API worker answers with the same
+ETag and a write served by one worker is seen by all of them at commit.
+"""
+import threading
+from typing import Dict, Any, Hashable, Optional, Tuple
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+from backend.models.list_version import ListVersion
+from backend.models.tenant import Tenant
+from backend.models.user import User
+
+def _opaque_tag(tag: str) -> str:
+    """Entity tag without its weak prefix (If-None-Match uses weak comparison)"""
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _key_name(key: Tuple[Hashable, ...]) -> str:
+    return ":".join(str(part) for part in key)
+
+class ListVersions:
+    """Database-backed list version counters with hit counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # Counters
+        self.bumps = 0
+        self.not_modified = 0
+        self.modified = 0
+
+    @staticmethod
+    def version(db: Session, key: Tuple[Hashable, ...]) -> int:
+        """Current version of a list (0 until it is first changed)"""
+        version = db.execute(
+            select(ListVersion.version).where(ListVersion.list_key == _key_name(key))
+        ).scalar()
+        return version or 0
+
+    def bump(self, connection, key: Tuple[Hashable, ...]) -> None:
+        """Mark a list as changed, in the transaction of the change (call from flush listeners)"""
+        table = ListVersion.__table__
+        stmt = mysql_insert(table).values(list_key=_key_name(key), version=1)
+        connection.execute(stmt.on_duplicate_key_update(version=table.c.version + 1))
+        with self._lock:
+            self.bumps += 1
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'W/"{version}"'
+
+    def check(self, db: Session, key: Tuple[Hashable, ...], if_none_match: Optional[str]) -> Tuple[int, str, bool]:
+        """
+        Compare a request's If-None-Match with the current version of a list
+
+        Args:
+            db: Database session
+            key: List key (see module docstring)
+            if_none_match: Raw If-None-Match header, or None
+
+        Returns:
+            (version, etag, not_modified)
+        """
+        version = self.version(db, key)
+        etag = self.etag(version)
+        candidates = {_opaque_tag(tag.strip()) for tag in (if_none_match or "").split(",")}
+        not_modified = "*" in candidates or _opaque_tag(etag) in candidates
+        with self._lock:
+            if not_modified:
+                self.not_modified += 1
+            else:
+                self.modified += 1
+        return version, etag, not_modified
+
+    def stats(self) -> Dict[str, Any]:
+        """Version counters for monitoring"""
+        checks = self.not_modified + self.modified
+        return {
+            "bumps": self.bumps,
+            "not_modified": self.not_modified,
+            "modified": self.modified,
+            "not_modified_ratio": round(self.not_modified / checks, 4) if checks else 0.0
+        }
+
+list_versions = ListVersions()
+
+# ==================== Write listeners ====================
+# Tenant, company and branch writes bump ("orgs", tenant_id) from the
+# org_directory listeners, which already resolve the owning tenant.
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    list_versions.bump(connection, ("users", target.tenant_id))
+    history = inspect(target).attrs["tenant_id"].history
+    if history.deleted and history.deleted[0] is not None:
+        list_versions.bump(connection, ("users", history.deleted[0]))
+
+@event.listens_for(Tenant, "after_insert")
+@event.listens_for(Tenant, "after_update")
+@event.listens_for(Tenant, "after_delete")
+def _tenant_changed(mapper, connection, target):
+    list_versions.bump(connection, ("tenants",))
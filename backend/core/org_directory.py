@@ -0,0 +1,164 @@
+"""
+Org Directory
+
+Keeps the org_directory table in sync with tenants, companies and branches
+through ORM flush listeners (same transaction as the change), and resolves
+org_ids against it with one indexed query instead of probing all three
+tables. The same listeners invalidate the cached tenant org scopes and keep
+the denormalized agents.tenant_id correct when a company or branch moves,
+and bump the tenant's org list version (ETags of /tenant/companies and
+/tenant/org-ids).
+"""
+from typing import Iterable, Optional, Set
+from sqlalchemy import event, select, update, or_, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, object_session
+from backend.core.agent_cache import agent_token_cache
+from backend.core.list_versions import list_versions
+from backend.core.tenant_scope import tenant_scope_cache
+from backend.models.agent import Agent, OrgType
+from backend.models.branch import Branch
+from backend.models.company import Company
+from backend.models.org_directory import OrgDirectory
+from backend.models.tenant import Tenant
+
+def lookup_org(db: Session, org_id: str) -> Optional[OrgDirectory]:
+    """
+    Resolve an org_id to its directory entry
+
+    Args:
+        db: Database session
+        org_id: Tenant, company or branch org_id
+
+    Returns:
+        OrgDirectory entry (org_type, tenant_id, entity_id, is_active) or None
+    """
+    return db.get(OrgDirectory, org_id)
+
+def existing_org_ids(db: Session, org_ids: Iterable[str]) -> Set[str]:
+    """Return the subset of org_ids that are already taken, in one query"""
+    org_ids = list(org_ids)
+    if not org_ids:
+        return set()
+    rows = db.execute(select(OrgDirectory.org_id).where(OrgDirectory.org_id.in_(org_ids)))
+    return {row[0] for row in rows}
+
+# ==================== Sync listeners ====================
+
+def _upsert(connection, org_id: str, org_type: OrgType, tenant_id: int, entity_id: int, is_active: bool) -> None:
+    table = OrgDirectory.__table__
+    stmt = mysql_insert(table).values(
+        org_id=org_id,
+        org_type=org_type,
+        tenant_id=tenant_id,
+        entity_id=entity_id,
+        is_active=bool(is_active)
+    )
+    connection.execute(stmt.on_duplicate_key_update(
+        org_type=stmt.inserted.org_type,
+        tenant_id=stmt.inserted.tenant_id,
+        entity_id=stmt.inserted.entity_id,
+        is_active=stmt.inserted.is_active
+    ))
+
+def _delete(connection, org_id: str) -> None:
+    table = OrgDirectory.__table__
+    connection.execute(table.delete().where(table.c.org_id == org_id))
+
+def _branch_tenant_id(connection, branch: Branch) -> int:
+    return connection.execute(
+        select(Company.tenant_id).where(Company.id == branch.company_id)
+    ).scalar()
+
+def _changed(target, connection, tenant_id: int) -> None:
+    """A tenant's set of orgs may have changed: drop its cached scope and list ETags"""
+    tenant_scope_cache.invalidate_on_commit(object_session(target), tenant_id)
+    if tenant_id is not None:
+        list_versions.bump(connection, ("orgs", tenant_id))
+
+def _previous_value(target, attr: str):
+    """Value of attr before this flush, or None if it did not change"""
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+def _move_agents(target, connection, org_ids_clause, tenant_id: int) -> None:
+    """Re-point agents.tenant_id for agents of orgs that changed tenant"""
+    agents = Agent.__table__
+    agent_ids = [row[0] for row in connection.execute(
+        select(agents.c.id).where(org_ids_clause(agents.c.org_id))
+    )]
+    if not agent_ids:
+        return
+    connection.execute(
+        update(agents)
+        .where(agents.c.id.in_(agent_ids))
+        .values(tenant_id=tenant_id)
+    )
+    # Cached principals carry tenant_id (presence counts and dashboard events are routed by it)
+    agent_token_cache.invalidate_agents_on_commit(object_session(target), agent_ids)
+
+@event.listens_for(Tenant, "after_insert")
+@event.listens_for(Tenant, "after_update")
+def _sync_tenant(mapper, connection, target):
+    _upsert(connection, target.tenant_org_id, OrgType.TENANT, target.id, target.id, target.is_active)
+    _changed(target, connection, target.id)
+
+@event.listens_for(Company, "after_insert")
+@event.listens_for(Company, "after_update")
+def _sync_company(mapper, connection, target):
+    _upsert(connection, target.company_org_id, OrgType.COMPANY, target.tenant_id, target.id, target.is_active)
+    _changed(target, connection, target.tenant_id)
+    
+    old_tenant_id = _previous_value(target, "tenant_id")
+    if old_tenant_id is not None and old_tenant_id != target.tenant_id:
+        # The company moved to another tenant, taking its branches and agents along
+        directory = OrgDirectory.__table__
+        branch_org_ids = select(Branch.branch_org_id).where(Branch.company_id == target.id)
+        connection.execute(
+            update(directory).where(directory.c.org_id.in_(branch_org_ids)).values(tenant_id=target.tenant_id)
+        )
+        _move_agents(
+            target,
+            connection,
+            lambda org_id: or_(org_id == target.company_org_id, org_id.in_(branch_org_ids)),
+            target.tenant_id
+        )
+        _changed(target, connection, old_tenant_id)
+
+@event.listens_for(Branch, "after_insert")
+@event.listens_for(Branch, "after_update")
+def _sync_branch(mapper, connection, target):
+    tenant_id = _branch_tenant_id(connection, target)
+    old_tenant_id = None
+    if _previous_value(target, "company_id") is not None:
+        old_tenant_id = connection.execute(
+            select(OrgDirectory.tenant_id).where(OrgDirectory.org_id == target.branch_org_id)
+        ).scalar()
+    
+    _upsert(connection, target.branch_org_id, OrgType.BRANCH, tenant_id, target.id, target.is_active)
+    _changed(target, connection, tenant_id)
+    
+    if old_tenant_id is not None and old_tenant_id != tenant_id:
+        # The branch moved to a company of another tenant
+        _move_agents(target, connection, lambda org_id: org_id == target.branch_org_id, tenant_id)
+        _changed(target, connection, old_tenant_id)
+
+@event.listens_for(Tenant, "after_delete")
+def _remove_tenant(mapper, connection, target):
+    _delete(connection, target.tenant_org_id)
+    _changed(target, connection, target.id)
+
+@event.listens_for(Company, "after_delete")
+def _remove_company(mapper, connection, target):
+    _delete(connection, target.company_org_id)
+    _changed(target, connection, target.tenant_id)
+
+@event.listens_for(Branch, "after_delete")
+def _remove_branch(mapper, connection, target):
+    # The parent company may already be gone in the same flush; read the tenant from the directory
+    table = OrgDirectory.__table__
+    tenant_id = connection.execute(
+        select(table.c.tenant_id).where(table.c.org_id == target.branch_org_id)
+    ).scalar()
+    _delete(connection, target.branch_org_id)
+    _changed(target, connection, tenant_id)
@@ -0,0 +1,100 @@
+"""
+Keyset Pagination
+
+Opaque cursors for list endpoints ordered by (sort column, id). A cursor
+encodes the sort key of the last row of a page; the next page is selected
+with a WHERE on that key instead of OFFSET, so page N costs the same index
+range read as page 1 no matter how deep the client pages.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import and_, or_
+
+# Largest page a cursor-paginated list endpoint serves
+MAX_PAGE_LIMIT = 1000
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded"""
+    pass
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """
+    Encode the sort key of a row as an opaque cursor
+
+    Args:
+        sort_value: Value of the sort column (datetime, int or None)
+        row_id: Primary key of the row (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    payload = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        (sort_value, row_id)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        if not isinstance(row_id, int):
+            raise TypeError("row id must be an integer")
+        if not isinstance(sort_value, (datetime, int, float, str, type(None))):
+            raise TypeError("unsupported sort value")
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    return sort_value, row_id
+
+def after_cursor_desc(sort_column, id_column, cursor: str, nulls_last: bool = False):
+    """
+    WHERE clause selecting rows after a cursor in (sort_column DESC, id DESC) order
+
+    Written as an OR of range predicates (not a row-value comparison) so MySQL
+    uses the index on the sort column. With nulls_last, NULL sort values sort
+    after every non-NULL value (MySQL's order for DESC).
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    sort_value, row_id = decode_cursor(cursor)
+    if sort_value is None:
+        if not nulls_last:
+            raise InvalidCursor("Invalid cursor: missing sort value")
+        return and_(sort_column.is_(None), id_column < row_id)
+    clause = or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+    if nulls_last:
+        clause = or_(clause, sort_column.is_(None))
+    return clause
+
+def page_with_cursor(rows: List[Any], limit: int, sort_attr: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim a limit + 1 result to one page and build the next cursor
+
+    Args:
+        rows: Rows fetched with limit + 1
+        limit: Page size
+        sort_attr: Name of the sort attribute on the rows
+
+    Returns:
+        (page rows, next cursor or None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    if not rows:
+        return rows, None
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_attr), last.id)
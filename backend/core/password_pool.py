@@ -0,0 +1,114 @@
+"""
+Password Hashing Pool
+
+bcrypt costs ~250 ms of CPU per call at 12 rounds. Endpoints hash and verify
+passwords through a small dedicated worker pool instead of doing it on the
+request thread, so a burst of logins is capped at PASSWORD_HASH_WORKERS
+cores and at most PASSWORD_HASH_MAX_PENDING request threads wait on it; the
+rest of the request threadpool stays free for agent ingestion.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, TypeVar
+from backend.core.config import settings
+from backend.core.security import hash_password, verify_password
+
+T = TypeVar("T")
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many hash/verify calls are already pending"""
+    pass
+
+class PasswordHashPool:
+    """Bounded worker pool for bcrypt hashing and verification with queueing metrics"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        # bcrypt releases the GIL, so threads give real parallelism
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+        # Counters
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def _run(self, fn: Callable[..., T], *args) -> T:
+        """Run fn on the pool and wait for the result (called from a request thread)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy("Too many pending password operations")
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self.pending += 1
+
+        def task() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                wait_ms = (started - submitted) * 1000.0
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run_ms += (time.perf_counter() - started) * 1000.0
+
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password on the pool
+
+        Raises:
+            PasswordPoolBusy: If max_pending calls are already in progress
+        """
+        return self._run(verify_password, plain_password, hashed_password)
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password on the pool
+
+        Raises:
+            PasswordPoolBusy: If max_pending calls are already in progress
+        """
+        return self._run(hash_password, password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters for monitoring (pending includes running calls)"""
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "queued": self.pending - self.running,
+                "running": self.running,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_ms / completed, 3) if completed else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "avg_run_ms": round(self.total_run_ms / completed, 3) if completed else 0.0
+            }
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
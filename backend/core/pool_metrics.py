@@ -0,0 +1,138 @@
+"""
+Connection Pool Instrumentation
+
+QueuePool subclass that records how long each checkout waited for a
+connection (including connect time for new ones), how many connections are
+in use, and how often checkouts spilled into overflow connections or timed
+out, tagged by the API route that requested the connection. The route comes
+from a context variable set by RouteTagMiddleware for every HTTP request;
+connections taken outside a request (background workers, scripts) are tagged
+"background".
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+BACKGROUND_ROUTE = "background"
+
+# ASGI scope of the request being served; FastAPI stores the matched route in it
+_current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+def current_route() -> str:
+    """Path template of the route being served (e.g. /api/v1/agent/telemetry)"""
+    scope = _current_scope.get()
+    if scope is None:
+        return BACKGROUND_ROUTE
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class RouteTagMiddleware:
+    """Pure ASGI middleware that makes the request scope visible to the pool"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+class PoolMetrics:
+    """Per-route checkout counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def record(self, route: str, wait_ms: float, overflow: bool, timed_out: bool) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "checkouts": 0,
+                    "in_use": 0,
+                    "wait_ms_total": 0.0,
+                    "wait_ms_max": 0.0,
+                    "overflow": 0,
+                    "timeouts": 0
+                }
+            if timed_out:
+                entry["timeouts"] += 1
+                self.timeouts += 1
+                return
+            entry["checkouts"] += 1
+            entry["in_use"] += 1
+            entry["wait_ms_total"] += wait_ms
+            entry["wait_ms_max"] = max(entry["wait_ms_max"], wait_ms)
+            if overflow:
+                entry["overflow"] += 1
+                self.overflow_events += 1
+
+    def release(self, route: str) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is not None and entry["in_use"] > 0:
+                entry["in_use"] -= 1
+
+    def stats(self, pool: Optional[QueuePool] = None) -> Dict[str, Any]:
+        """Pool gauges plus per-route checkout statistics"""
+        with self._lock:
+            routes = {
+                route: {
+                    "checkouts": int(entry["checkouts"]),
+                    "in_use": int(entry["in_use"]),
+                    "avg_wait_ms": round(entry["wait_ms_total"] / entry["checkouts"], 3) if entry["checkouts"] else 0.0,
+                    "max_wait_ms": round(entry["wait_ms_max"], 3),
+                    "overflow": int(entry["overflow"]),
+                    "timeouts": int(entry["timeouts"])
+                }
+                for route, entry in sorted(self._routes.items())
+            }
+            result = {
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "routes": routes
+            }
+        if pool is not None:
+            result.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        return result
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait, overflow and timeouts to pool_metrics"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(current_route(), 0.0, overflow=False, timed_out=True)
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000.0
+        route = current_route()
+        connection.info["checkout_route"] = route
+        # More connections out than the core pool holds: this checkout used overflow
+        pool_metrics.record(route, wait_ms, overflow=self.checkedout() > self.size(), timed_out=False)
+        return connection
+
+    def _do_return_conn(self, record):
+        route = record.info.pop("checkout_route", None)
+        if route is not None:
+            pool_metrics.release(route)
+        super()._do_return_conn(record)
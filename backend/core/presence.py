@@ -0,0 +1,171 @@
+"""
+Agent Presence Recorder
+
+Heartbeats (and telemetry submissions) record agent presence into an
+in-memory map instead of issuing an UPDATE per call. A background task
+flushes the map periodically as a single batched CASE-based UPDATE for all
+agents that checked in during the window. Check-ins are also forwarded to the
+presence tracker, which marks agents OFFLINE when they stop checking in.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import update, case
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.core.presence_tracker import PresenceTracker, presence_tracker
+from backend.models.agent import Agent, AgentStatus
+
+logger = logging.getLogger(__name__)
+
+class PresenceRecorder:
+    """Coalesces agent last_seen/status writes into periodic batched UPDATEs"""
+
+    def __init__(self, flush_interval: float, batch_size: int = 1000,
+                 tracker: Optional[PresenceTracker] = None):
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.tracker = tracker
+
+        self._pending: Dict[int, Tuple[datetime, AgentStatus]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters
+        self.heartbeats_recorded = 0
+        self.rows_flushed = 0
+        self.flush_count = 0
+        self.flush_failures = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, agent_id: int, status: AgentStatus = AgentStatus.ONLINE,
+               seen_at: Optional[datetime] = None, tenant_id: Optional[int] = None) -> None:
+        """
+        Record that an agent checked in
+
+        Args:
+            agent_id: Agent ID
+            status: Status reported by the agent
+            seen_at: Check-in time (default: now, UTC)
+            tenant_id: Owning tenant (for the tracker's per-tenant online counts)
+        """
+        if seen_at is None:
+            seen_at = datetime.now(timezone.utc)
+        with self._lock:
+            self._pending[agent_id] = (seen_at, status)
+            self.heartbeats_recorded += 1
+        if self.tracker is not None:
+            if status == AgentStatus.OFFLINE:
+                self.tracker.mark_offline(agent_id)
+            else:
+                self.tracker.touch(agent_id, tenant_id)
+
+    def pending(self) -> int:
+        """Number of agents waiting to be flushed"""
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Presence counters for monitoring"""
+        return {
+            "pending_agents": self.pending(),
+            "flush_interval_seconds": self.flush_interval,
+            "heartbeats_recorded": self.heartbeats_recorded,
+            "rows_flushed": self.rows_flushed,
+            "flush_count": self.flush_count,
+            "flush_failures": self.flush_failures,
+            "last_flush_ms": round(self.last_flush_ms, 3)
+        }
+
+    def _write(self, entries: Dict[int, Tuple[datetime, AgentStatus]]) -> None:
+        """Apply presence entries with one CASE-based UPDATE per batch (runs in a worker thread)"""
+        items = list(entries.items())
+        db = SessionLocal()
+        try:
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                last_seen_map = {agent_id: seen_at for agent_id, (seen_at, _) in batch}
+                status_map = {agent_id: status for agent_id, (_, status) in batch}
+                db.execute(
+                    update(Agent)
+                    .where(Agent.id.in_(list(last_seen_map.keys())))
+                    .values(
+                        last_seen=case(last_seen_map, value=Agent.id),
+                        status=case(status_map, value=Agent.id)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        """
+        Flush recorded presence to the agents table
+
+        Returns:
+            Number of agents updated
+        """
+        async with self._flush_lock:
+            with self._lock:
+                entries = self._pending
+                self._pending = {}
+            if not entries:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, entries)
+            except Exception:
+                self.flush_failures += 1
+                logger.exception("Presence flush failed; %d agents re-queued", len(entries))
+                with self._lock:
+                    # Newer check-ins recorded during the failed flush win
+                    for agent_id, entry in entries.items():
+                        self._pending.setdefault(agent_id, entry)
+                return 0
+
+            self.rows_flushed += len(entries)
+            self.flush_count += 1
+            self.last_flush_ms = (time.perf_counter() - started) * 1000.0
+            return len(entries)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def start(self) -> None:
+        """Start the periodic flusher (call from the application lifespan)"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flusher and flush what is left"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+presence_recorder = PresenceRecorder(
+    flush_interval=settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.HEARTBEAT_FLUSH_BATCH_SIZE,
+    tracker=presence_tracker
+)
@@ -0,0 +1,293 @@
+"""
+Agent Presence Tracker
+
+Detects agents that stopped checking in and flips them to OFFLINE. Every
+check-in (re)schedules the agent on a timing wheel at now +
+AGENT_OFFLINE_AFTER_SECONDS; a background task advances the wheel every
+PRESENCE_TICK_SECONDS and expires only the agents in the slots it passes, so
+each tick costs O(expired) regardless of fleet size. Expired agents are
+marked OFFLINE with one batched UPDATE per tick, and the tracker keeps live
+per-tenant online counts in memory. Every ONLINE/OFFLINE transition is pushed
+to the tenant's open dashboards through the event hub.
+
+With several API worker processes each tracker only sees the check-ins its
+own process served: the OFFLINE UPDATE is guarded by agents.last_seen so an
+agent heard by another worker is never marked offline, but the in-memory
+counts are per process.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Set, Tuple
+from sqlalchemy import update, select, or_
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.core.tenant_events import tenant_events
+from backend.models.agent import Agent, AgentStatus
+
+logger = logging.getLogger(__name__)
+
+class PresenceTracker:
+    """Timing wheel of agent check-in deadlines with per-tenant online counts"""
+
+    def __init__(self, offline_after: float, tick_seconds: float, batch_size: int = 1000):
+        self.offline_after = offline_after
+        self.tick_seconds = max(0.1, tick_seconds)
+        self.batch_size = max(1, batch_size)
+        # A deadline is at most ticks_ahead + 1 ticks past the cursor, so every
+        # slot holds a single deadline between two visits
+        self._ticks_ahead = max(1, math.ceil(offline_after / self.tick_seconds))
+        self._slots: List[Set[int]] = [set() for _ in range(self._ticks_ahead + 2)]
+        self._deadlines: Dict[int, int] = {}
+        self._tenants: Dict[int, Optional[int]] = {}
+        self._online: Dict[Optional[int], int] = defaultdict(int)
+        self._cursor = self._tick(time.monotonic())
+        self._offline_pending: List[int] = []
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters
+        self.came_online = 0
+        self.expired = 0
+        self.rows_marked_offline = 0
+        self.write_failures = 0
+        self.last_tick_ms = 0.0
+
+    def _tick(self, now: float) -> int:
+        return int(now // self.tick_seconds)
+
+    def _remove(self, agent_id: int) -> Optional[int]:
+        """Drop an agent from the wheel and the online counts (caller holds the lock); returns its tenant"""
+        deadline = self._deadlines.pop(agent_id)
+        self._slots[deadline % len(self._slots)].discard(agent_id)
+        tenant_id = self._tenants.pop(agent_id, None)
+        self._online[tenant_id] -= 1
+        if self._online[tenant_id] <= 0:
+            del self._online[tenant_id]
+        return tenant_id
+
+    def _announce(self, changes: List[Tuple[int, Optional[int], int]], status: AgentStatus) -> None:
+        """Push (agent_id, tenant_id, tenant online count) transitions to dashboards"""
+        for agent_id, tenant_id, online in changes:
+            tenant_events.publish(tenant_id, "agent_status", {
+                "agent_id": agent_id,
+                "status": status.value,
+                "online": online
+            })
+
+    def touch(self, agent_id: int, tenant_id: Optional[int], age_seconds: float = 0.0) -> bool:
+        """
+        Record a check-in and push the agent's offline deadline forward
+
+        Args:
+            agent_id: Agent ID
+            tenant_id: Owning tenant (for the per-tenant online counts)
+            age_seconds: How long ago the check-in happened
+
+        Returns:
+            True if the agent was not online before
+        """
+        deadline = self._tick(time.monotonic() - age_seconds) + self._ticks_ahead + 1
+        with self._lock:
+            deadline = max(deadline, self._cursor)
+            came_online = agent_id not in self._deadlines
+            if came_online:
+                self.came_online += 1
+            else:
+                self._remove(agent_id)
+            self._deadlines[agent_id] = deadline
+            self._slots[deadline % len(self._slots)].add(agent_id)
+            self._tenants[agent_id] = tenant_id
+            self._online[tenant_id] += 1
+            online = self._online[tenant_id]
+        if came_online:
+            self._announce([(agent_id, tenant_id, online)], AgentStatus.ONLINE)
+        return came_online
+
+    def mark_offline(self, agent_id: int) -> bool:
+        """Forget an agent that reported itself offline; returns True if it was online"""
+        with self._lock:
+            if agent_id not in self._deadlines:
+                return False
+            tenant_id = self._remove(agent_id)
+            online = self._online.get(tenant_id, 0)
+        self._announce([(agent_id, tenant_id, online)], AgentStatus.OFFLINE)
+        return True
+
+    def expire(self, now: Optional[float] = None) -> List[int]:
+        """
+        Advance the wheel to now and drop agents whose deadline passed
+
+        Returns:
+            IDs of agents that just went offline
+        """
+        current = self._tick(time.monotonic() if now is None else now)
+        expired: List[int] = []
+        tenants: List[Optional[int]] = []
+        with self._lock:
+            # After a stall longer than one revolution, visiting each slot once is enough
+            end = min(current, self._cursor + len(self._slots) - 1)
+            for tick in range(self._cursor, end + 1):
+                slot = self._slots[tick % len(self._slots)]
+                due = [agent_id for agent_id in slot if self._deadlines[agent_id] <= current]
+                for agent_id in due:
+                    tenants.append(self._remove(agent_id))
+                expired.extend(due)
+            self._cursor = max(self._cursor, current + 1)
+            self.expired += len(expired)
+            changes = [
+                (agent_id, tenant_id, self._online.get(tenant_id, 0))
+                for agent_id, tenant_id in zip(expired, tenants)
+            ]
+        self._announce(changes, AgentStatus.OFFLINE)
+        return expired
+
+    def is_online(self, agent_id: int) -> bool:
+        with self._lock:
+            return agent_id in self._deadlines
+
+    def online_count(self, tenant_id: Optional[int]) -> int:
+        """Number of online agents of a tenant (no database access)"""
+        with self._lock:
+            return self._online.get(tenant_id, 0)
+
+    def online_counts(self) -> Dict[Optional[int], int]:
+        """tenant_id -> number of online agents"""
+        with self._lock:
+            return dict(self._online)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tracker counters for monitoring"""
+        with self._lock:
+            online = len(self._deadlines)
+            tenants = len(self._online)
+            offline_pending = len(self._offline_pending)
+        return {
+            "online_agents": online,
+            "tenants_online": tenants,
+            "offline_after_seconds": self.offline_after,
+            "tick_seconds": self.tick_seconds,
+            "came_online": self.came_online,
+            "expired": self.expired,
+            "rows_marked_offline": self.rows_marked_offline,
+            "offline_pending": offline_pending,
+            "write_failures": self.write_failures,
+            "last_tick_ms": round(self.last_tick_ms, 3)
+        }
+
+    def _write_offline(self, agent_ids: List[int]) -> int:
+        """Mark agents OFFLINE in batches unless they checked in recently (runs in a worker thread)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.offline_after)
+        updated = 0
+        db = SessionLocal()
+        try:
+            for start in range(0, len(agent_ids), self.batch_size):
+                batch = agent_ids[start:start + self.batch_size]
+                result = db.execute(
+                    update(Agent)
+                    .where(
+                        Agent.id.in_(batch),
+                        Agent.status == AgentStatus.ONLINE,
+                        or_(Agent.last_seen == None, Agent.last_seen < cutoff)
+                    )
+                    .values(status=AgentStatus.OFFLINE)
+                    .execution_options(synchronize_session=False)
+                )
+                updated += result.rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return updated
+
+    def _load(self) -> List[int]:
+        """Schedule agents the database lists as ONLINE; return those already past their deadline"""
+        now = datetime.now(timezone.utc)
+        stale = []
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Agent.id, Agent.tenant_id, Agent.last_seen).where(Agent.status == AgentStatus.ONLINE)
+            ).all()
+        finally:
+            db.close()
+        for agent_id, tenant_id, last_seen in rows:
+            if last_seen is None:
+                stale.append(agent_id)
+                continue
+            if last_seen.tzinfo is None:
+                last_seen = last_seen.replace(tzinfo=timezone.utc)
+            age = (now - last_seen).total_seconds()
+            if age >= self.offline_after:
+                stale.append(agent_id)
+            else:
+                self.touch(agent_id, tenant_id, age_seconds=max(0.0, age))
+        return stale
+
+    async def tick(self) -> int:
+        """
+        Expire overdue agents and mark them OFFLINE in the database
+
+        Returns:
+            Number of agents that expired
+        """
+        started = time.perf_counter()
+        expired = self.expire()
+        with self._lock:
+            pending = self._offline_pending + expired
+            self._offline_pending = []
+        if pending:
+            try:
+                self.rows_marked_offline += await asyncio.to_thread(self._write_offline, pending)
+            except Exception:
+                self.write_failures += 1
+                logger.exception("Marking %d agents offline failed; will retry", len(pending))
+                with self._lock:
+                    self._offline_pending.extend(pending)
+        self.last_tick_ms = (time.perf_counter() - started) * 1000.0
+        return len(expired)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+            await self.tick()
+
+    async def start(self) -> None:
+        """Load online agents and start the wheel (call from the application lifespan)"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        try:
+            stale = await asyncio.to_thread(self._load)
+        except Exception:
+            logger.exception("Loading online agents failed; presence starts empty")
+            stale = []
+        with self._lock:
+            self._offline_pending.extend(stale)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the wheel (agents keep their status until the next start)"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+presence_tracker = PresenceTracker(
+    offline_after=settings.AGENT_OFFLINE_AFTER_SECONDS,
+    tick_seconds=settings.PRESENCE_TICK_SECONDS,
+    batch_size=settings.HEARTBEAT_FLUSH_BATCH_SIZE
+)
@@ -0,0 +1,207 @@
+"""
+Telemetry Retention Job
+
+Deletes raw telemetry older than each tenant's retention period (falling back
+to TELEMETRY_RETENTION_DAYS) in small index-friendly chunks, and expires
+minute/hour activity rollups on their own, longer schedules. Day rollups are
+kept forever, so expired raw data stays available in downsampled form.
+
+Run it from one place only: scripts/run_retention.py from cron, or the
+in-process loop (RETENTION_JOB_ENABLED, off by default) on a single API
+worker. Every worker that enables the loop runs its own deletes.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy import delete, select, func
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.models.agent import Agent
+from backend.models.tenant import Tenant
+from backend.models.telemetry import Telemetry
+from backend.models.activity_rollup import ActivityRollupMinute, ActivityRollupHour
+
+logger = logging.getLogger(__name__)
+
+class RetentionJob:
+    """Chunked retention deletes with progress counters and a dry-run mode"""
+
+    def __init__(self, interval: float, chunk_size: int, chunk_pause: float):
+        self.interval = interval
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_pause = chunk_pause
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Progress / counters
+        self.runs = 0
+        self.running = False
+        self.current_target: Optional[str] = None
+        self.rows_deleted = 0
+        self.chunks_deleted = 0
+        self.last_run_started: Optional[datetime] = None
+        self.last_run_ms = 0.0
+        self.last_run_rows: Dict[str, int] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Retention progress for monitoring"""
+        return {
+            "running": self.running,
+            "current_target": self.current_target,
+            "runs": self.runs,
+            "rows_deleted": self.rows_deleted,
+            "chunks_deleted": self.chunks_deleted,
+            "last_run_started": self.last_run_started.isoformat() if self.last_run_started else None,
+            "last_run_ms": round(self.last_run_ms, 3),
+            "last_run_rows": dict(self.last_run_rows)
+        }
+
+    # ==================== Targets ====================
+
+    @staticmethod
+    def _tenant_agent_ids(db: Session, tenant: Tenant) -> List[int]:
+        """All agent IDs of a tenant (agents.tenant_id, the same rule tenant listings use)"""
+        rows = db.execute(select(Agent.id).where(Agent.tenant_id == tenant.id)).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _cutoff(days: int) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(days=days)
+
+    # ==================== Deletes ====================
+
+    def _delete_chunked(self, db: Session, table, where, dry_run: bool) -> int:
+        """
+        Delete matching rows LIMIT chunk_size at a time, committing after each chunk
+
+        Never issues one unbounded DELETE, so locks are held briefly and
+        replication lag stays low. In dry-run mode only counts the rows.
+        """
+        if dry_run:
+            return db.execute(select(func.count()).select_from(table).where(*where)).scalar() or 0
+
+        total = 0
+        while not self._stopping:
+            result = db.execute(
+                delete(table).where(*where).with_dialect_options(mysql_limit=self.chunk_size)
+            )
+            db.commit()
+            deleted = result.rowcount or 0
+            total += deleted
+            self.rows_deleted += deleted
+            self.chunks_deleted += 1
+            if deleted < self.chunk_size:
+                break
+            if self.chunk_pause:
+                time.sleep(self.chunk_pause)
+        return total
+
+    def _expire_tenant(self, db: Session, tenant: Tenant, dry_run: bool) -> int:
+        # An explicit per-tenant 0 keeps data forever; only NULL falls back to the global setting
+        days = (
+            tenant.telemetry_retention_days
+            if tenant.telemetry_retention_days is not None
+            else settings.TELEMETRY_RETENTION_DAYS
+        )
+        if not days or days <= 0:
+            return 0
+
+        cutoff = self._cutoff(days)
+        table = Telemetry.__table__
+        total = 0
+        # Per agent, so each DELETE walks the (agent_id, timestamp) index range
+        for agent_id in self._tenant_agent_ids(db, tenant):
+            total += self._delete_chunked(
+                db, table, [table.c.agent_id == agent_id, table.c.timestamp < cutoff], dry_run
+            )
+        return total
+
+    def _expire_rollups(self, db: Session, model, days: int, dry_run: bool) -> int:
+        if days <= 0:
+            return 0
+        cutoff = self._cutoff(days).replace(tzinfo=None)  # rollup buckets are naive UTC
+        table = model.__table__
+        return self._delete_chunked(db, table, [table.c.bucket_start < cutoff], dry_run)
+
+    def run_once(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Run one retention pass (blocking)
+
+        Args:
+            dry_run: Count the rows that would be deleted without deleting them
+
+        Returns:
+            Dict of target -> rows deleted (or that would be deleted)
+        """
+        self.running = True
+        self.last_run_started = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        results: Dict[str, int] = {}
+        db = SessionLocal()
+        try:
+            for tenant in db.query(Tenant).all():
+                self.current_target = f"tenant:{tenant.id}"
+                results[self.current_target] = self._expire_tenant(db, tenant, dry_run)
+
+            for name, model, days in (
+                ("activity_rollup_minute", ActivityRollupMinute, settings.ROLLUP_MINUTE_RETENTION_DAYS),
+                ("activity_rollup_hour", ActivityRollupHour, settings.ROLLUP_HOUR_RETENTION_DAYS)
+            ):
+                self.current_target = name
+                results[name] = self._expire_rollups(db, model, days, dry_run)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            self.running = False
+            self.current_target = None
+
+        self.runs += 1
+        self.last_run_ms = (time.perf_counter() - started) * 1000.0
+        self.last_run_rows = results
+        logger.info(
+            "Retention pass%s finished in %.0f ms: %d rows",
+            " (dry run)" if dry_run else "", self.last_run_ms, sum(results.values())
+        )
+        return results
+
+    # ==================== Background loop ====================
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                logger.exception("Retention pass failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """Start the periodic retention job (call from the application lifespan)"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the retention job after the current chunk"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+retention_job = RetentionJob(
+    interval=settings.RETENTION_JOB_INTERVAL_SECONDS,
+    chunk_size=settings.RETENTION_DELETE_CHUNK_SIZE,
+    chunk_pause=settings.RETENTION_CHUNK_PAUSE_SECONDS
+)
@@ -0,0 +1,89 @@
+"""
+Activity Rollups
+
+Maintains per agent / bucket / process active and idle sample counts at
+minute, hour and day granularity. Rollups are updated in the same transaction
+as the telemetry insert, so reports never have to aggregate raw telemetry.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Tuple
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+from backend.models.activity_rollup import ActivityRollupMinute, ActivityRollupHour, ActivityRollupDay
+
+ROLLUP_MODELS = {
+    "minute": ActivityRollupMinute,
+    "hour": ActivityRollupHour,
+    "day": ActivityRollupDay
+}
+
+UNKNOWN_PROCESS_ID = 0
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """
+    Truncate a timestamp to the start of its bucket (naive UTC)
+
+    Args:
+        timestamp: Sample timestamp (naive values are assumed to be UTC)
+        granularity: "minute", "hour" or "day"
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(second=0, microsecond=0)
+
+def aggregate_rows(rows: List[Dict[str, Any]], granularity: str) -> List[Dict[str, Any]]:
+    """
+    Aggregate encoded telemetry rows into rollup rows for one granularity
+
+    Args:
+        rows: Telemetry rows with agent_id, process_id, timestamp and is_idle
+        granularity: "minute", "hour" or "day"
+
+    Returns:
+        Rollup row dicts sorted by primary key (keeps upsert lock order stable)
+    """
+    counts: Dict[Tuple[int, datetime, int], List[int]] = defaultdict(lambda: [0, 0])
+    for row in rows:
+        key = (
+            row["agent_id"],
+            bucket_start(row["timestamp"], granularity),
+            row["process_id"] or UNKNOWN_PROCESS_ID
+        )
+        counts[key][1 if row["is_idle"] else 0] += 1
+
+    return [
+        {
+            "agent_id": agent_id,
+            "bucket_start": bucket,
+            "process_id": process_id,
+            "active_count": active,
+            "idle_count": idle
+        }
+        for (agent_id, bucket, process_id), (active, idle) in sorted(counts.items())
+    ]
+
+def apply_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add a batch of encoded telemetry rows to every rollup table
+
+    Uses INSERT ... ON DUPLICATE KEY UPDATE count = count + VALUES(count), so
+    each rollup table costs one statement per batch. The caller owns the
+    transaction.
+    """
+    if not rows:
+        return
+
+    for granularity, model in ROLLUP_MODELS.items():
+        rollup_rows = aggregate_rows(rows, granularity)
+        table = model.__table__
+        stmt = mysql_insert(table).values(rollup_rows)
+        stmt = stmt.on_duplicate_key_update(
+            active_count=table.c.active_count + stmt.inserted.active_count,
+            idle_count=table.c.idle_count + stmt.inserted.idle_count
+        )
+        db.execute(stmt)
@@ -0,0 +1,496 @@
+"""
+Write-behind Telemetry Buffer
+
+Accepts validated telemetry rows from the ingestion endpoint, acknowledges
+them immediately and flushes them to the telemetry table in large batches
+from a background task. Memory is bounded; when the buffer is full rows are
+either spilled to disk (if a spill directory is configured) or rejected so
+the agent retries later.
+
+Durability trade-off: acknowledged rows live only in memory until the next
+flush, so a crash or OOM kill loses up to TELEMETRY_BUFFER_MAX_ROWS rows that
+agents will not resend. Write-behind is therefore off by default; enable it
+together with TELEMETRY_SPILL_DIR where ingest throughput matters more.
+
+A failed flush is retried up to TELEMETRY_FLUSH_MAX_RETRIES times; after that
+the batch is written in bisected chunks so rows that can never be inserted
+are isolated and moved to a dead-letter file (spill_dir/dead-letter) instead
+of blocking every row queued behind them.
+
+Rows are buffered (and spilled) as batches that keep their agent's
+batch_seq. The flush transaction claims the sequences together with inserting
+the rows (BatchSequenceTracker.claim_many), so a sequence is only advanced
+once its rows are stored and replays are skipped there. Each spill-file
+replay also records the file name in telemetry_spill_replays in the same
+transaction, so a file left behind by a crash between commit and deletion is
+not inserted again.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from sqlalchemy import insert, select, delete
+from backend.core.batch_sequence import batch_sequences
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.core.telemetry_ingest import bulk_insert_telemetry
+from backend.models.telemetry import TelemetrySpillReplay
+
+logger = logging.getLogger(__name__)
+
+class TelemetryBufferFull(Exception):
+    """Raised when the buffer is full and no spill directory is configured"""
+    pass
+
+class _Batch(NamedTuple):
+    """Rows of one submitted batch; agent_id and seq are None without a batch_seq"""
+    agent_id: Optional[int]
+    seq: Optional[int]
+    rows: List[Dict[str, Any]]
+
+class TelemetryBuffer:
+    """Bounded in-process buffer with a background batch flusher"""
+
+    def __init__(
+        self,
+        max_rows: int,
+        flush_rows: int,
+        flush_interval: float,
+        spill_dir: Optional[str] = None,
+        max_retries: int = 3
+    ):
+        self.max_rows = max(1, max_rows)
+        self.flush_rows = max(1, min(flush_rows, self.max_rows))
+        self.flush_interval = flush_interval
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.dead_letter_dir = self.spill_dir / "dead-letter" if self.spill_dir else None
+        self.max_retries = max(1, max_retries)
+
+        self._batches: deque = deque()
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._failed_flushes = 0  # consecutive failed flushes of the queued rows
+
+        # Counters
+        self.rows_accepted = 0
+        self.rows_flushed = 0
+        self.rows_spilled = 0
+        self.rows_dead_lettered = 0
+        self.rows_dropped = 0
+        self.flush_count = 0
+        self.flush_failures = 0
+        self.last_flush_ms = 0.0
+
+    # ==================== Producer side ====================
+
+    def submit(self, rows: List[Dict[str, Any]], batch_seq: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Queue telemetry rows for a later batched insert
+
+        Args:
+            rows: Row dicts as produced by build_telemetry_rows
+            batch_seq: Optional (agent_id, seq) claimed when the rows are flushed
+
+        Raises:
+            TelemetryBufferFull: If the buffer is full and spilling is disabled
+        """
+        batch = _Batch(*(batch_seq or (None, None)), rows)
+        with self._lock:
+            if self._pending_rows + len(rows) > self.max_rows:
+                if self.spill_dir is None:
+                    raise TelemetryBufferFull("Telemetry buffer is full")
+                self._spill([batch])
+            else:
+                self._batches.append(batch)
+                self._pending_rows += len(rows)
+            self.rows_accepted += len(rows)
+            pending = self._pending_rows
+
+        if pending >= self.flush_rows and self._wakeup is not None:
+            # Producers run in the request threadpool; asyncio.Event is not thread-safe
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending(self) -> int:
+        """Number of rows currently held in memory"""
+        with self._lock:
+            return self._pending_rows
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer counters for monitoring"""
+        return {
+            "pending_rows": self.pending(),
+            "max_rows": self.max_rows,
+            "rows_accepted": self.rows_accepted,
+            "rows_flushed": self.rows_flushed,
+            "rows_spilled": self.rows_spilled,
+            "rows_dead_lettered": self.rows_dead_lettered,
+            "rows_dropped": self.rows_dropped,
+            "flush_count": self.flush_count,
+            "flush_failures": self.flush_failures,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "spill_enabled": self.spill_dir is not None
+        }
+
+    # ==================== Spill to disk ====================
+
+    @staticmethod
+    def _write_rows_file(directory: Path, batches: List[_Batch]) -> Path:
+        """Write batches (a header line per batch, then its rows) to a new JSONL file (atomic rename)"""
+        directory.mkdir(parents=True, exist_ok=True)
+        # Unique across processes and restarts: the name is the replay key
+        name = f"telemetry-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.jsonl"
+        tmp_path = directory / (name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for batch in batches:
+                f.write(json.dumps({"batch": [batch.agent_id, batch.seq]}) + "\n")
+                for row in batch.rows:
+                    record = dict(row)
+                    record["timestamp"] = record["timestamp"].isoformat()
+                    f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, directory / name)
+        return directory / name
+
+    def _spill(self, batches: List[_Batch]) -> None:
+        """Write batches to a new spill file, replayed by the next flush"""
+        self._write_rows_file(self.spill_dir, batches)
+        self.rows_spilled += sum(len(batch.rows) for batch in batches)
+
+    def _dead_letter(self, rows: List[Dict[str, Any]]) -> None:
+        """Set aside rows that cannot be inserted (kept on disk for inspection and manual replay)"""
+        if self.dead_letter_dir is None:
+            self.rows_dropped += len(rows)
+            logger.error("Dropped %d telemetry rows that could not be inserted", len(rows))
+            return
+        path = self._write_rows_file(self.dead_letter_dir, [_Batch(None, None, rows)])
+        self.rows_dead_lettered += len(rows)
+        logger.error("Moved %d telemetry rows that could not be inserted to %s", len(rows), path)
+
+    def _spill_files(self) -> List[Path]:
+        if self.spill_dir is None or not self.spill_dir.exists():
+            return []
+        return sorted(self.spill_dir.glob("telemetry-*.jsonl"))
+
+    @staticmethod
+    def _load_spill_file(path: Path) -> List[_Batch]:
+        batches: List[_Batch] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if "batch" in record:
+                    batches.append(_Batch(*record["batch"], []))
+                    continue
+                if not batches:
+                    batches.append(_Batch(None, None, []))
+                record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+                batches[-1].rows.append(record)
+        return batches
+
+    # ==================== Flusher ====================
+
+    def _drain(self) -> List[_Batch]:
+        with self._lock:
+            batches = list(self._batches)
+            self._batches.clear()
+            self._pending_rows = 0
+        return batches
+
+    def _requeue(self, batches: List[_Batch]) -> None:
+        """Put batches back after a failed flush, spilling whatever no longer fits"""
+        with self._lock:
+            room = self.max_rows - self._pending_rows
+            keep: List[_Batch] = []
+            overflow: List[_Batch] = []
+            for batch in batches:
+                if len(batch.rows) <= room:
+                    keep.append(batch)
+                    room -= len(batch.rows)
+                else:
+                    overflow.append(batch)
+            self._batches.extendleft(reversed(keep))
+            self._pending_rows += sum(len(batch.rows) for batch in keep)
+            if overflow:
+                if self.spill_dir is not None:
+                    self._spill(overflow)
+                else:
+                    logger.error(
+                        "Dropped %d telemetry rows after failed flush", sum(len(batch.rows) for batch in overflow)
+                    )
+
+    def _write(
+        self,
+        batches: List[_Batch],
+        replayed_file: Optional[str] = None,
+        dry_run: bool = False
+    ) -> int:
+        """
+        Claim batch sequences and insert the rows of new batches in a single transaction
+
+        Runs in a worker thread. Batches whose sequence was already stored
+        (agent retries, a copy flushed by another worker) are skipped.
+
+        Args:
+            batches: Batches to write
+            replayed_file: Spill file name to record as replayed in the same transaction
+            dry_run: Roll back instead of committing (only checks that the rows insert)
+
+        Returns:
+            Number of rows written
+        """
+        db = SessionLocal()
+        try:
+            claimed = batch_sequences.claim_many(
+                db, [(batch.agent_id, batch.seq) for batch in batches if batch.seq is not None]
+            )
+            rows: List[Dict[str, Any]] = []
+            stored = set()
+            for batch in batches:
+                if batch.seq is not None:
+                    key = (batch.agent_id, batch.seq)
+                    if key not in claimed or key in stored:
+                        continue
+                    stored.add(key)
+                rows.extend(batch.rows)
+            bulk_insert_telemetry(db, rows)
+            if replayed_file is not None:
+                db.execute(insert(TelemetrySpillReplay).values(file_name=replayed_file))
+            if dry_run:
+                db.rollback()
+                return len(rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for agent_id, seq in claimed:
+            batch_sequences.accept(agent_id, seq)
+        return len(rows)
+
+    @staticmethod
+    def _already_replayed(file_name: str) -> bool:
+        db = SessionLocal()
+        try:
+            return db.execute(
+                select(TelemetrySpillReplay.file_name).where(TelemetrySpillReplay.file_name == file_name)
+            ).first() is not None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _forget_replay(file_name: str) -> None:
+        """Drop the replay record once the file is deleted (keeps the table tiny)"""
+        db = SessionLocal()
+        try:
+            db.execute(delete(TelemetrySpillReplay).where(TelemetrySpillReplay.file_name == file_name))
+            db.commit()
+        finally:
+            db.close()
+
+    def _find_bad_rows(self, rows: List[Dict[str, Any]]) -> Optional[List[int]]:
+        """
+        Locate rows that cannot be inserted by bisecting trial inserts (runs in a worker thread)
+
+        Failing chunks are halved until the rows that cannot be inserted (e.g.
+        a timestamp outside the TIMESTAMP range, a missing partition, an
+        oversize value) are isolated. Every trial is rolled back. Reaching one
+        bad row costs one failure per halving, so more failures than that
+        before any chunk succeeded means the database itself is failing.
+
+        Returns:
+            Indexes of the bad rows, or None if the database is failing
+        """
+        bad: List[int] = []
+        succeeded = False
+        failures = 0
+        max_failures_before_success = math.ceil(math.log2(max(len(rows), 1))) + 2
+        chunks = [(0, len(rows))]
+        while chunks:
+            start, end = chunks.pop()
+            if not succeeded and failures > max_failures_before_success:
+                return None
+            try:
+                self._write([_Batch(None, None, rows[start:end])], dry_run=True)
+                succeeded = True
+            except Exception:
+                failures += 1
+                if end - start == 1:
+                    bad.append(start)
+                else:
+                    middle = (start + end) // 2
+                    chunks.extend([(middle, end), (start, middle)])
+        if rows and not succeeded:
+            return None
+        return bad
+
+    async def _salvage(self, batches: List[_Batch], replayed_file: Optional[str] = None) -> Optional[int]:
+        """
+        Write the insertable rows of failing batches in one transaction and dead-letter the rest
+
+        Returns:
+            Rows written, or None if nothing could be written (database unavailable)
+        """
+        rows = [row for batch in batches for row in batch.rows]
+        bad = await asyncio.to_thread(self._find_bad_rows, rows)
+        if bad is None:
+            return None
+        bad_indexes = set(bad)
+        good: List[_Batch] = []
+        index = 0
+        for batch in batches:
+            kept = [row for i, row in enumerate(batch.rows, index) if i not in bad_indexes]
+            index += len(batch.rows)
+            good.append(batch._replace(rows=kept))
+        written = await asyncio.to_thread(self._write, good, replayed_file)
+        if bad:
+            self._dead_letter([rows[i] for i in bad])
+        return written
+
+    async def flush(self) -> int:
+        """
+        Flush all buffered rows (and any spilled files) to the database
+
+        Returns:
+            Number of rows written
+        """
+        async with self._flush_lock:
+            written = 0
+            started = time.perf_counter()
+
+            batches = self._drain()
+            if batches:
+                try:
+                    written += await asyncio.to_thread(self._write, batches)
+                    self._failed_flushes = 0
+                except Exception:
+                    self.flush_failures += 1
+                    self._failed_flushes += 1
+                    if self._failed_flushes < self.max_retries:
+                        logger.exception(
+                            "Telemetry flush failed; %d rows re-queued", sum(len(batch.rows) for batch in batches)
+                        )
+                        self._requeue(batches)
+                        return written
+                    logger.exception(
+                        "Telemetry flush failed %d times in a row; isolating rows that cannot be inserted",
+                        self._failed_flushes
+                    )
+                    try:
+                        salvaged = await self._salvage(batches)
+                    except Exception:
+                        logger.exception("Writing the insertable telemetry rows failed")
+                        salvaged = None
+                    if salvaged is None:
+                        self._requeue(batches)
+                        return written
+                    written += salvaged
+                    self._failed_flushes = 0
+
+            for path in self._spill_files():
+                try:
+                    spilled = self._load_spill_file(path)
+                except Exception:
+                    logger.exception("Unreadable spill file %s moved aside", path)
+                    path.replace(path.with_suffix(".corrupt"))
+                    continue
+                try:
+                    already_replayed = await asyncio.to_thread(self._already_replayed, path.name)
+                except Exception:
+                    self.flush_failures += 1
+                    logger.exception("Failed to check replay state of spill file %s", path)
+                    break
+                if already_replayed:
+                    # Committed before a crash prevented the deletion
+                    path.unlink()
+                else:
+                    try:
+                        replayed = await asyncio.to_thread(self._write, spilled, path.name)
+                    except Exception:
+                        self.flush_failures += 1
+                        logger.exception("Failed to replay spill file %s; isolating rows that cannot be inserted", path)
+                        try:
+                            replayed = await self._salvage(spilled, path.name)
+                        except Exception:
+                            logger.exception("Writing the insertable rows of %s failed", path)
+                            replayed = None
+                        if replayed is None:
+                            break
+                    path.unlink()
+                    written += replayed
+                try:
+                    await asyncio.to_thread(self._forget_replay, path.name)
+                except Exception:
+                    # A leftover record is harmless: file names are never reused
+                    logger.warning("Could not delete the replay record of %s", path.name)
+
+            if written:
+                self.rows_flushed += written
+                self.flush_count += 1
+                self.last_flush_ms = (time.perf_counter() - started) * 1000.0
+            return written
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        """Start the background flusher (call from the application lifespan)"""
+        if self._task is not None:
+            return
+        if self.spill_dir is None:
+            logger.warning(
+                "Telemetry write-behind is enabled without TELEMETRY_SPILL_DIR; "
+                "buffered rows are lost if the process dies"
+            )
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and flush everything still buffered"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        batches = self._drain()
+        if batches:
+            rows = sum(len(batch.rows) for batch in batches)
+            if self.spill_dir is not None:
+                with self._lock:
+                    self._spill(batches)
+                logger.warning("Spilled %d unflushed telemetry rows to disk at shutdown", rows)
+            else:
+                logger.error("Dropped %d unflushed telemetry rows at shutdown", rows)
+
+telemetry_buffer = TelemetryBuffer(
+    max_rows=settings.TELEMETRY_BUFFER_MAX_ROWS,
+    flush_rows=settings.TELEMETRY_FLUSH_ROWS,
+    flush_interval=settings.TELEMETRY_FLUSH_INTERVAL_SECONDS,
+    spill_dir=settings.TELEMETRY_SPILL_DIR or None,
+    max_retries=settings.TELEMETRY_FLUSH_MAX_RETRIES
+)
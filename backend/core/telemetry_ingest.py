@@ -0,0 +1,179 @@
+"""
+Telemetry Ingestion Helpers
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import List, Dict, Any, Iterable, Optional, AsyncIterator, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.interning import process_dictionary, window_title_dictionary
+from backend.core.rollups import apply_rollups
+from backend.models.telemetry import Telemetry
+from backend.schemas.agent import TelemetryData, TelemetryColumnarSubmit
+
+logger = logging.getLogger(__name__)
+
+class NDJSONLineTooLong(Exception):
+    """Raised when a streamed NDJSON line exceeds the configured maximum"""
+    pass
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a stream of byte chunks into newline-delimited records
+
+    Only the current partial line is held in memory. Blank lines are skipped.
+
+    Args:
+        chunks: Body chunks (already decompressed)
+        max_line_bytes: Longest accepted line
+
+    Yields:
+        (line_number, line) tuples, line numbers starting at 1
+
+    Raises:
+        NDJSONLineTooLong: If a line exceeds max_line_bytes
+    """
+    pending = b""
+    line_number = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise NDJSONLineTooLong(f"Line {line_number} exceeds {max_line_bytes} bytes")
+            if line.strip():
+                yield line_number, line
+        if len(pending) > max_line_bytes:
+            raise NDJSONLineTooLong(f"Line {line_number + 1} exceeds {max_line_bytes} bytes")
+    if pending.strip():
+        yield line_number + 1, pending
+
+def build_telemetry_rows(agent_id: int, records: Iterable[TelemetryData]) -> List[Dict[str, Any]]:
+    """
+    Convert validated telemetry records into plain row dicts for a Core insert
+
+    Args:
+        agent_id: ID of the agent that submitted the records
+        records: Validated TelemetryData records
+
+    Returns:
+        List of column -> value dicts
+    """
+    return [
+        {
+            "agent_id": agent_id,
+            "window_title": record.window_title,
+            "process_name": record.process_name,
+            "timestamp": record.timestamp,
+            "is_idle": record.is_idle,
+            "screenshot_url": record.screenshot_url
+        }
+        for record in records
+    ]
+
+def build_columnar_rows(agent_id: int, batch: TelemetryColumnarSubmit) -> List[Dict[str, Any]]:
+    """
+    Decode a columnar-v1 telemetry batch into row dicts for a Core insert
+
+    Args:
+        agent_id: ID of the agent that submitted the batch
+        batch: Validated columnar batch
+
+    Returns:
+        List of column -> value dicts
+    """
+    strings = batch.strings
+    screenshot_urls = batch.screenshot_url or [None] * len(batch.ts_delta)
+    timestamps = accumulate(batch.ts_delta, initial=batch.base_ts)
+    next(timestamps)  # skip the base itself
+
+    return [
+        {
+            "agent_id": agent_id,
+            "window_title": strings[title] if title is not None else None,
+            "process_name": strings[process] if process is not None else None,
+            "timestamp": datetime.fromtimestamp(ts / 1000.0, tz=timezone.utc),
+            "is_idle": is_idle,
+            "screenshot_url": strings[url] if url is not None else None
+        }
+        for ts, title, process, is_idle, url in zip(
+            timestamps, batch.window_title, batch.process_name, batch.is_idle, screenshot_urls
+        )
+    ]
+
+def bulk_insert_telemetry(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Insert telemetry rows using multi-row INSERT statements
+
+    Bypasses the ORM unit of work entirely: each chunk becomes a single
+    INSERT ... VALUES (...), (...) statement. Process names and window titles
+    are dictionary-encoded to integer IDs on the way in, and the activity
+    rollups are updated in the same transaction. The caller owns the
+    transaction and is responsible for committing.
+
+    Args:
+        db: Database session
+        rows: Row dicts as produced by build_telemetry_rows
+        chunk_size: Maximum rows per INSERT statement (default: settings.TELEMETRY_INSERT_CHUNK_SIZE)
+
+    Returns:
+        Dict with rows inserted, number of statements, insert and rollup latency in milliseconds
+    """
+    if chunk_size is None:
+        chunk_size = settings.TELEMETRY_INSERT_CHUNK_SIZE
+    chunk_size = max(1, chunk_size)
+
+    table = Telemetry.__table__
+    chunks = 0
+    started = time.perf_counter()
+
+    process_ids = process_dictionary.ids_for(db, (row["process_name"] for row in rows))
+    title_ids = window_title_dictionary.ids_for(db, (row["window_title"] for row in rows))
+    encoded = [
+        {
+            "agent_id": row["agent_id"],
+            "process_id": process_ids.get(row["process_name"]),
+            "window_title_id": title_ids.get(row["window_title"]),
+            "timestamp": row["timestamp"],
+            "is_idle": row["is_idle"],
+            "screenshot_url": row["screenshot_url"]
+        }
+        for row in rows
+    ]
+
+    for start in range(0, len(encoded), chunk_size):
+        chunk = encoded[start:start + chunk_size]
+        db.execute(insert(table).values(chunk))
+        chunks += 1
+
+    insert_ms = (time.perf_counter() - started) * 1000.0
+
+    rollup_ms = 0.0
+    if settings.ACTIVITY_ROLLUPS_ENABLED:
+        rollup_started = time.perf_counter()
+        apply_rollups(db, encoded)
+        rollup_ms = (time.perf_counter() - rollup_started) * 1000.0
+
+    if rows:
+        logger.info(
+            "Inserted %d telemetry rows in %d statement(s) in %.2f ms (rollups %.2f ms)",
+            len(rows), chunks, insert_ms, rollup_ms
+        )
+
+    return {
+        "rows": len(rows),
+        "chunks": chunks,
+        "insert_ms": round(insert_ms, 3),
+        "rollup_ms": round(rollup_ms, 3)
+    }
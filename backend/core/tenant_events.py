@@ -0,0 +1,133 @@
+"""
+Tenant Event Hub
+
+In-process publish/subscribe channel that pushes agent status changes and
+telemetry summaries to open tenant dashboards (GET /tenant/events, Server-Sent
+Events). Events are published straight from the ingestion path and the
+presence tracker, so a live dashboard costs no database reads after it has
+loaded.
+
+Publishers may run on request threads; delivery is handed to the event loop
+with call_soon_threadsafe. Each subscriber has a bounded queue: a dashboard
+that falls behind gets its backlog replaced by a single "resync" event
+(telling it to refetch) instead of blocking publishers or growing memory.
+
+Like the presence tracker, the hub is per process: with several API workers
+a dashboard only sees events handled by the worker it is connected to.
+"""
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Set
+from backend.core.config import settings
+
+RESYNC_EVENT = ("resync", {})
+
+class TenantEventHub:
+    """Per-tenant fan-out of dashboard events to bounded subscriber queues"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = max(1, queue_size)
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    def subscribe(self, tenant_id: int) -> asyncio.Queue:
+        """Register a dashboard connection (call from the event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(tenant_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, tenant_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(tenant_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[tenant_id]
+
+    def has_subscribers(self, tenant_id: Optional[int]) -> bool:
+        """Cheap check so publishers can skip building events nobody will see"""
+        return tenant_id in self._subscribers
+
+    def publish(self, tenant_id: Optional[int], event: str, data: Dict[str, Any]) -> None:
+        """
+        Send an event to every dashboard of a tenant (safe from any thread)
+
+        Args:
+            tenant_id: Tenant whose dashboards receive the event
+            event: Event name (e.g. "agent_status", "telemetry")
+            data: JSON-serializable payload
+        """
+        with self._lock:
+            queues = list(self._subscribers.get(tenant_id, ()))
+            loop = self._loop
+        if not queues or loop is None:
+            return
+        self.published += 1
+        try:
+            loop.call_soon_threadsafe(self._deliver, queues, (event, data))
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _deliver(self, queues: List[asyncio.Queue], item: tuple) -> None:
+        for queue in queues:
+            try:
+                queue.put_nowait(item)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Too far behind: drop the backlog and ask the dashboard to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+                self.resyncs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hub counters for monitoring"""
+        with self._lock:
+            tenants = len(self._subscribers)
+            subscribers = sum(len(queues) for queues in self._subscribers.values())
+        return {
+            "tenants": tenants,
+            "subscribers": subscribers,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs
+        }
+
+tenant_events = TenantEventHub(queue_size=settings.EVENT_STREAM_QUEUE_SIZE)
+
+def publish_telemetry_summary(tenant_id: Optional[int], agent_id: int, rows: List[Dict[str, Any]]) -> None:
+    """
+    Publish a summary of a telemetry batch (counts plus the newest record)
+
+    Args:
+        tenant_id: Owning tenant of the agent
+        agent_id: Agent that submitted the batch
+        rows: Row dicts as produced by build_telemetry_rows
+    """
+    if not rows or not tenant_events.has_subscribers(tenant_id):
+        return
+    idle = sum(1 for row in rows if row["is_idle"])
+    # Agents send records in capture order
+    latest = rows[-1]
+    tenant_events.publish(tenant_id, "telemetry", {
+        "agent_id": agent_id,
+        "records": len(rows),
+        "active": len(rows) - idle,
+        "idle": idle,
+        "latest": {
+            "timestamp": latest["timestamp"].isoformat(),
+            "process_name": latest["process_name"],
+            "window_title": latest["window_title"],
+            "is_idle": latest["is_idle"]
+        }
+    })
@@ -0,0 +1,142 @@
+"""
+Tenant Org Scope Cache
+
+Caches, per tenant, the set of org_ids in its scope (the tenant itself plus
+its active companies and branches) and its deactivated company/branch
+org_ids. Loaded with one query on org_directory and invalidated whenever a
+tenant, company or branch row is written, so agent views check visibility
+with set lookups instead of reloading every company and branch on each
+request.
+
+An agent is visible to a tenant when agents.tenant_id is the tenant and its
+org is not a deactivated company or branch. tenant_agent_criteria() applies
+that rule in SQL (listings, counts) and TenantScope.sees() to a loaded agent
+(detail views), so both always agree.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Dict, Any
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend.core.commit_hooks import invalidate_on_commit
+from backend.core.config import settings
+from backend.models.agent import Agent, OrgType
+from backend.models.org_directory import OrgDirectory
+from backend.models.tenant import Tenant
+
+@dataclass(frozen=True)
+class TenantScope:
+    """Org_ids of one tenant: active ones (org_ids) and deactivated companies/branches"""
+    tenant_id: int
+    org_ids: FrozenSet[str]
+    inactive_org_ids: FrozenSet[str] = frozenset()
+
+    def __contains__(self, org_id: str) -> bool:
+        return org_id in self.org_ids
+
+    def sees(self, agent: Agent) -> bool:
+        """Whether the tenant may see an agent (same rule as tenant_agent_criteria)"""
+        return agent.tenant_id == self.tenant_id and agent.org_id not in self.inactive_org_ids
+
+def tenant_agent_criteria(tenant_id: int) -> list:
+    """
+    WHERE criteria selecting the agents visible to a tenant
+
+    Filters on the denormalized agents.tenant_id, so the (tenant_id, last_seen)
+    and (tenant_id, status) indexes serve tenant-wide listings; agents of
+    deactivated companies/branches (usually few) are excluded by an anti-join.
+    TenantScope.sees() is the same rule for a loaded agent.
+    """
+    inactive_org_ids = select(OrgDirectory.org_id).where(
+        OrgDirectory.tenant_id == tenant_id,
+        OrgDirectory.is_active == False,
+        OrgDirectory.org_type != OrgType.TENANT
+    )
+    return [Agent.tenant_id == tenant_id, Agent.org_id.notin_(inactive_org_ids)]
+
+class TenantScopeCache:
+    """Thread-safe LRU + TTL cache of tenant_id -> TenantScope"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, tenant: Tenant) -> TenantScope:
+        """
+        Return the org scope of a tenant, loading it on a miss
+
+        Args:
+            db: Database session (only used on a miss)
+            tenant: Authenticated tenant
+
+        Returns:
+            TenantScope with the tenant's org_id set
+        """
+        with self._lock:
+            entry = self._entries.get(tenant.id)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._entries.move_to_end(tenant.id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        rows = db.execute(
+            select(OrgDirectory.org_id, OrgDirectory.org_type, OrgDirectory.is_active)
+            .where(OrgDirectory.tenant_id == tenant.id)
+        ).all()
+        # The tenant's own org_id is always in scope, even before the directory is synced
+        active = [org_id for org_id, org_type, is_active in rows if is_active or org_type == OrgType.TENANT]
+        inactive = [org_id for org_id, org_type, is_active in rows if not is_active and org_type != OrgType.TENANT]
+        scope = TenantScope(tenant.id, frozenset([tenant.tenant_org_id] + active), frozenset(inactive))
+
+        if self.max_size:
+            with self._lock:
+                self._entries[tenant.id] = (scope, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(tenant.id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return scope
+
+    def invalidate(self, tenant_id: int) -> None:
+        """Drop a tenant's cached scope"""
+        with self._lock:
+            if self._entries.pop(tenant_id, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_on_commit(self, session: Optional[Session], tenant_id: Optional[int]) -> None:
+        """Invalidate now and again after the session commits (see commit_hooks)"""
+        if tenant_id is not None:
+            invalidate_on_commit(session, self.invalidate, tenant_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+tenant_scope_cache = TenantScopeCache(
+    max_size=settings.TENANT_SCOPE_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TENANT_SCOPE_CACHE_TTL_SECONDS
+)
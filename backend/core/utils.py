@@ -5,9 +5,10 @@ import random
 import string
 from typing import Optional
 from sqlalchemy.orm import Session
-from backend.models.tenant import Tenant
-from backend.models.company import Company
-from backend.models.branch import Branch
+from backend.core.org_directory import existing_org_ids
+
+# Candidates checked per directory query
+_CANDIDATES_PER_QUERY = 10
 
 def generate_org_id(prefix: str = "", length: Optional[int] = None, db: Optional[Session] = None) -> str:
     """
@@ -31,25 +32,18 @@ def generate_org_id(prefix: str = "", length: Optional[int] = None, db: Optional
     chars = string.ascii_uppercase + string.digits
     
     max_attempts = 100
-    for _ in range(max_attempts):
-        # Generate random part
+    for _ in range(max_attempts // _CANDIDATES_PER_QUERY):
+        # Generate a batch of candidates and check them in one directory query
         random_part_length = length - len(prefix)
-        random_part = ''.join(random.choices(chars, k=random_part_length))
-        org_id = prefix + random_part
-        
-        # Check uniqueness if database session provided
-        if db is not None:
-            # Check in tenants
-            if db.query(Tenant).filter(Tenant.tenant_org_id == org_id).first():
-                continue
-            # Check in companies
-            if db.query(Company).filter(Company.company_org_id == org_id).first():
-                continue
-            # Check in branches
-            if db.query(Branch).filter(Branch.branch_org_id == org_id).first():
-                continue
+        candidates = [
+            prefix + ''.join(random.choices(chars, k=random_part_length))
+            for _ in range(_CANDIDATES_PER_QUERY)
+        ]
         
-        return org_id
+        taken = existing_org_ids(db, candidates) if db is not None else set()
+        for org_id in candidates:
+            if org_id not in taken:
+                return org_id
     
     # Fallback: add timestamp if uniqueness can't be achieved
     import time
@@ -58,7 +52,7 @@ def generate_org_id(prefix: str = "", length: Optional[int] = None, db: Optional
 
 def is_org_id_unique(org_id: str, db: Session) -> bool:
     """
-    Check if org_id is globally unique across all tables
+    Check if org_id is globally unique across tenants, companies and branches
     
     Args:
         org_id: The org_id to check
@@ -67,15 +61,4 @@ def is_org_id_unique(org_id: str, db: Session) -> bool:
     Returns:
         True if unique, False otherwise
     """
-    # Check tenants
-    if db.query(Tenant).filter(Tenant.tenant_org_id == org_id).first():
-        return False
-    # Check companies
-    if db.query(Company).filter(Company.company_org_id == org_id).first():
-        return False
-    # Check branches
-    if db.query(Branch).filter(Branch.branch_org_id == org_id).first():
-        return False
-    
-    return True
-
+    return not existing_org_ids(db, [org_id])
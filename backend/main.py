@@ -1,19 +1,58 @@
 """
 PrismTrack - Main FastAPI Application
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from backend.core.config import settings
 from backend.api.v1 import api_router
+from backend.core.telemetry_buffer import telemetry_buffer
+from backend.core.agent_cache import agent_token_cache
+from backend.core.presence import presence_recorder
+from backend.core.presence_tracker import presence_tracker
+from backend.core.interning import process_dictionary, window_title_dictionary
+from backend.core.retention import retention_job
+from backend.core.batch_sequence import batch_sequences
+from backend.core.password_pool import password_pool, PasswordPoolBusy
+from backend.core.database import engine
+from backend.core.pool_metrics import pool_metrics, RouteTagMiddleware
+from backend.core.tenant_scope import tenant_scope_cache
+from backend.core.pagination import InvalidCursor
+from backend.core.count_cache import count_cache
+from backend.core.list_versions import list_versions
+from backend.core.tenant_stats import tenant_stats_cache
+from backend.core.tenant_events import tenant_events
+from backend.core.dependencies import require_metrics_access
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and drain them on shutdown"""
+    # Endpoints are plain `def` functions and run in this pool; size it for concurrent DB calls
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    await presence_recorder.start()
+    await presence_tracker.start()
+    if settings.TELEMETRY_WRITE_BEHIND:
+        await telemetry_buffer.start()
+    if settings.RETENTION_JOB_ENABLED:
+        await retention_job.start()
+    yield
+    await retention_job.stop()
+    # Flush any buffered telemetry and presence before the process exits
+    await telemetry_buffer.stop()
+    await presence_recorder.stop()
+    await presence_tracker.stop()
 
 app = FastAPI(
     title="PrismTrack API",
     description="Multi-tenant Employee Tracking System",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Mount static files directory for agent downloads
@@ -38,9 +77,25 @@ app.add_middleware(
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Tag DB pool checkouts with the route being served (outermost, so it wraps everything)
+app.add_middleware(RouteTagMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    """Shed login/password bursts instead of letting them queue up request threads"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many concurrent login attempts, retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 async def root():
     return {
@@ -53,6 +108,27 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """In-process cache and buffer counters (platform admins and METRICS_ALLOWED_IPS only)"""
+    return {
+        "agent_token_cache": agent_token_cache.stats(),
+        "tenant_scope_cache": tenant_scope_cache.stats(),
+        "count_cache": count_cache.stats(),
+        "list_versions": list_versions.stats(),
+        "tenant_stats_cache": tenant_stats_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "db_pool": pool_metrics.stats(engine.pool),
+        "presence": presence_recorder.stats(),
+        "presence_tracker": presence_tracker.stats(),
+        "tenant_events": tenant_events.stats(),
+        "process_dictionary": process_dictionary.stats(),
+        "window_title_dictionary": window_title_dictionary.stats(),
+        "batch_sequences": batch_sequences.stats(),
+        "retention": retention_job.stats(),
+        "telemetry_buffer": telemetry_buffer.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
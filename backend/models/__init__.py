@@ -5,7 +5,12 @@ from backend.models.company import Company
 from backend.models.branch import Branch
 from backend.models.user import User
 from backend.models.agent import Agent
-from backend.models.telemetry import Telemetry
+from backend.models.telemetry import Telemetry, TelemetrySpillReplay
+from backend.models.process import Process
+from backend.models.window_title import WindowTitle
+from backend.models.activity_rollup import ActivityRollupMinute, ActivityRollupHour, ActivityRollupDay
+from backend.models.org_directory import OrgDirectory
+from backend.models.list_version import ListVersion
 
 __all__ = [
     "PlatformAdmin",
@@ -14,6 +19,14 @@ __all__ = [
     "Branch",
     "User",
     "Agent",
-    "Telemetry"
+    "Telemetry",
+    "TelemetrySpillReplay",
+    "Process",
+    "WindowTitle",
+    "ActivityRollupMinute",
+    "ActivityRollupHour",
+    "ActivityRollupDay",
+    "OrgDirectory",
+    "ListVersion"
 ]
 
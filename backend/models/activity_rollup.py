@@ -0,0 +1,24 @@
+"""
+Activity Rollup Models
+
+Per agent, per time bucket, per process sample counts, maintained
+incrementally as telemetry is ingested (see backend/core/rollups.py).
+"""
+from sqlalchemy import Column, Integer, DateTime
+from backend.core.database import Base
+
+class ActivityRollupMixin:
+    agent_id = Column(Integer, primary_key=True, autoincrement=False)
+    bucket_start = Column(DateTime, primary_key=True, index=True)  # UTC, truncated to the bucket size
+    process_id = Column(Integer, primary_key=True, autoincrement=False, default=0)  # 0 = unknown process
+    active_count = Column(Integer, nullable=False, default=0)
+    idle_count = Column(Integer, nullable=False, default=0)
+
+class ActivityRollupMinute(ActivityRollupMixin, Base):
+    __tablename__ = "activity_rollup_minute"
+
+class ActivityRollupHour(ActivityRollupMixin, Base):
+    __tablename__ = "activity_rollup_hour"
+
+class ActivityRollupDay(ActivityRollupMixin, Base):
+    __tablename__ = "activity_rollup_day"
@@ -1,7 +1,7 @@
 """
 Agent Model
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.core.database import Base
@@ -22,13 +22,20 @@ class Agent(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     org_id = Column(String(8), nullable=False, index=True)  # Can be tenant, company, or branch org_id
     org_type = Column(SQLEnum(OrgType), nullable=False)
+    tenant_id = Column(Integer, nullable=True)  # Owning tenant of org_id (denormalized from org_directory)
     machine_name = Column(String(255), nullable=False)
     hardware_uuid = Column(String(255), unique=True, index=True, nullable=False)
     agent_token = Column(String(255), unique=True, index=True, nullable=False)
     last_seen = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(SQLEnum(AgentStatus), default=AgentStatus.OFFLINE, nullable=False)
     registered_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_batch_seq = Column(BigInteger, default=0, server_default="0", nullable=False)  # Highest accepted telemetry batch_seq
     
     # Relationships
     telemetry = relationship("Telemetry", back_populates="agent", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("idx_tenant_last_seen", "tenant_id", "last_seen"),
+        Index("idx_tenant_status", "tenant_id", "status"),
+    )
 
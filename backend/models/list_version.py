@@ -0,0 +1,17 @@
+"""
+List Version Model
+"""
+from sqlalchemy import Column, String, BigInteger
+from backend.core.database import Base
+
+class ListVersion(Base):
+    """
+    Version counter of one cached list (ETags of the list endpoints)
+
+    Bumped by ORM listeners in backend/core/list_versions.py in the same
+    transaction as the change, so every API worker sees the same version.
+    """
+    __tablename__ = "list_versions"
+
+    list_key = Column(String(64), primary_key=True)  # e.g. "orgs:12", "users:12", "tenants"
+    version = Column(BigInteger, default=0, server_default="0", nullable=False)
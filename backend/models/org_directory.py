@@ -0,0 +1,22 @@
+"""
+Org Directory Model
+"""
+from sqlalchemy import Column, Integer, String, Boolean, Enum as SQLEnum
+from backend.core.database import Base
+from backend.models.agent import OrgType
+
+class OrgDirectory(Base):
+    """
+    One row per org_id across tenants, companies and branches
+    
+    Resolves any org_id to its type, owning tenant and active flag with a
+    single primary-key lookup. Maintained by ORM listeners in
+    backend/core/org_directory.py; never write to it directly.
+    """
+    __tablename__ = "org_directory"
+    
+    org_id = Column(String(8), primary_key=True)
+    org_type = Column(SQLEnum(OrgType), nullable=False)
+    tenant_id = Column(Integer, nullable=False, index=True)
+    entity_id = Column(Integer, nullable=False)  # tenants.id / companies.id / branches.id
+    is_active = Column(Boolean, default=True, nullable=False)
@@ -0,0 +1,11 @@
+"""
+Process Model (dictionary of process names referenced by telemetry)
+"""
+from sqlalchemy import Column, Integer, String
+from backend.core.database import Base
+
+class Process(Base):
+    __tablename__ = "processes"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(255, collation="utf8mb4_bin"), unique=True, nullable=False)
@@ -1,23 +1,54 @@
 """
 Telemetry Model
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.core.database import Base
 
 class Telemetry(Base):
     __tablename__ = "telemetry"
+    # Per-agent pages, counts and retention deletes filter on agent_id and range/sort on
+    # timestamp; InnoDB appends the primary key, so the index also orders the (timestamp, id)
+    # cursor and makes the per-agent COUNT index-only. It replaces the agent_id-only index.
+    __table_args__ = (
+        Index("idx_agent_timestamp", "agent_id", "timestamp"),
+    )
     
+    # The table is range-partitioned on timestamp, so the primary key is (id, timestamp)
+    # and the foreign keys below are ORM-only (MySQL cannot enforce them on partitioned tables)
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False, index=True)
-    window_title = Column(String(500))
-    process_name = Column(String(255))
-    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
+    # Process names and window titles are dictionary-encoded (see Process / WindowTitle)
+    window_title_id = Column(Integer, ForeignKey("window_titles.id"))
+    process_id = Column(Integer, ForeignKey("processes.id"), index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, nullable=False, index=True)
     is_idle = Column(Boolean, default=False, nullable=False)
     screenshot_url = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     agent = relationship("Agent", back_populates="telemetry")
+    process = relationship("Process", lazy="joined")
+    title = relationship("WindowTitle", lazy="joined")
+    
+    @property
+    def process_name(self):
+        return self.process.name if self.process else None
+    
+    @property
+    def window_title(self):
+        return self.title.title if self.title else None
 
+class TelemetrySpillReplay(Base):
+    """
+    Spill files already replayed into telemetry
+
+    Written in the same transaction as the replayed rows, so a file left on
+    disk by a crash between that commit and its deletion is recognized and
+    not inserted a second time.
+    """
+    __tablename__ = "telemetry_spill_replays"
+    
+    file_name = Column(String(128), primary_key=True)
+    replayed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
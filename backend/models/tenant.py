@@ -18,6 +18,7 @@ class Tenant(Base):
     created_by = Column(Integer, ForeignKey("platform_admins.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True, nullable=False)
+    telemetry_retention_days = Column(Integer, nullable=True)  # None = TELEMETRY_RETENTION_DAYS
     
     # Relationships
     companies = relationship("Company", back_populates="tenant", cascade="all, delete-orphan")
@@ -0,0 +1,11 @@
+"""
+Window Title Model (dictionary of window titles referenced by telemetry)
+"""
+from sqlalchemy import Column, Integer, String
+from backend.core.database import Base
+
+class WindowTitle(Base):
+    __tablename__ = "window_titles"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    title = Column(String(500, collation="utf8mb4_bin"), unique=True, nullable=False)
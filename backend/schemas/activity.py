@@ -0,0 +1,37 @@
+"""
+Activity Report Schemas (served from the activity rollup tables)
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List, Literal
+
+Granularity = Literal["minute", "hour", "day"]
+
+class ActivityBucket(BaseModel):
+    bucket_start: datetime
+    active_samples: int
+    idle_samples: int
+
+class ApplicationUsage(BaseModel):
+    process_id: int
+    process_name: Optional[str] = None
+    active_samples: int
+    idle_samples: int
+
+class AgentActivityResponse(BaseModel):
+    agent_id: int
+    granularity: Granularity
+    start: datetime
+    end: datetime
+    buckets: List[ActivityBucket]
+
+class ActivityReportResponse(BaseModel):
+    org_id: str
+    granularity: Granularity
+    start: datetime
+    end: datetime
+    agents: int
+    active_samples: int
+    idle_samples: int
+    applications: List[ApplicationUsage]
+    buckets: List[ActivityBucket]
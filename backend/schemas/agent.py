@@ -1,9 +1,10 @@
 """
 Agent Schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
+from backend.schemas.common import ListTotalResponse
 from backend.models.agent import OrgType, AgentStatus
 
 class AgentRegister(BaseModel):
@@ -31,6 +32,43 @@ class TelemetryData(BaseModel):
 class TelemetrySubmit(BaseModel):
     agent_token: str
     telemetry: List[TelemetryData]
+    batch_seq: Optional[int] = Field(default=None, ge=0)  # Strictly increasing per agent; replays are ignored
+
+class TelemetryColumnarSubmit(BaseModel):
+    """
+    Compact columnar telemetry batch ("columnar-v1")
+    
+    Each field is a parallel array with one entry per sample. Timestamps are
+    epoch milliseconds, delta-encoded against base_ts (the first delta is
+    relative to base_ts, every following one to the previous sample). String
+    columns hold indexes into the per-batch strings dictionary (null for None).
+    """
+    agent_token: str
+    format: Literal["columnar-v1"]
+    base_ts: int
+    ts_delta: List[int]
+    strings: List[str] = []
+    window_title: List[Optional[int]]
+    process_name: List[Optional[int]]
+    is_idle: List[bool]
+    screenshot_url: Optional[List[Optional[int]]] = None
+    batch_seq: Optional[int] = Field(default=None, ge=0)
+    
+    @model_validator(mode="after")
+    def check_columns(self):
+        count = len(self.ts_delta)
+        columns = [self.window_title, self.process_name, self.is_idle]
+        if self.screenshot_url is not None:
+            columns.append(self.screenshot_url)
+        if any(len(column) != count for column in columns):
+            raise ValueError("All columns must have the same length as ts_delta")
+        
+        size = len(self.strings)
+        for column in (self.window_title, self.process_name, self.screenshot_url or []):
+            indexes = [i for i in column if i is not None]
+            if indexes and (min(indexes) < 0 or max(indexes) >= size):
+                raise ValueError("String index out of range")
+        return self
 
 class HeartbeatResponse(BaseModel):
     status: str
@@ -41,6 +79,21 @@ class TelemetryResponse(BaseModel):
     status: str
     message: str
     records_count: int
+    insert_ms: Optional[float] = None
+    queued: bool = False
+    duplicate: bool = False
+    timestamp: str
+
+class TelemetryStreamError(BaseModel):
+    line: int
+    detail: str
+
+class TelemetryStreamResponse(BaseModel):
+    status: str
+    records_count: int
+    invalid_count: int
+    chunks: int
+    errors: List[TelemetryStreamError] = []
     timestamp: str
 
 class AgentResponse(BaseModel):
@@ -56,9 +109,14 @@ class AgentResponse(BaseModel):
     class Config:
         from_attributes = True
 
-class AgentListResponse(BaseModel):
+class AgentListResponse(ListTotalResponse):
     agents: List[AgentResponse]
-    total: int
+    # Pass as ?cursor= to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class OnlineAgentsResponse(BaseModel):
+    online: int
+    offline_after_seconds: float
 
 class TelemetryRecord(BaseModel):
     id: int
@@ -73,8 +131,9 @@ class TelemetryRecord(BaseModel):
     class Config:
         from_attributes = True
 
-class TelemetryListResponse(BaseModel):
+class TelemetryListResponse(ListTotalResponse):
     agent_id: int
     telemetry: List[TelemetryRecord]
-    total: int
+    # Pass as ?cursor= to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
 
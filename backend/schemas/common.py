@@ -0,0 +1,16 @@
+"""
+Shared Schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ListTotalResponse(BaseModel):
+    """Base of list responses that report the total number of matching rows"""
+    total: Optional[int] = Field(
+        default=None,
+        description="Matching rows; None when requested with include_total=false"
+    )
+    approximate: bool = Field(
+        default=False,
+        description="True when the total is a cached count that may be up to COUNT_CACHE_TTL_SECONDS old"
+    )
@@ -4,6 +4,7 @@ Company Schemas
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List
+from backend.schemas.common import ListTotalResponse
 
 class CompanyBase(BaseModel):
     name: str
@@ -25,7 +26,6 @@ class CompanyResponse(CompanyBase):
     class Config:
         from_attributes = True
 
-class CompanyListResponse(BaseModel):
+class CompanyListResponse(ListTotalResponse):
     companies: List[CompanyResponse]
-    total: int
 
@@ -1,9 +1,10 @@
 """
 Tenant Schemas
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
+from backend.schemas.common import ListTotalResponse
 
 class TenantBase(BaseModel):
     name: str
@@ -23,6 +24,7 @@ class TenantUpdate(BaseModel):
     name: Optional[str] = None
     admin_email: Optional[EmailStr] = None
     is_active: Optional[bool] = None
+    telemetry_retention_days: Optional[int] = Field(default=None, ge=0)
 
 class TenantResponse(TenantBase):
     id: int
@@ -31,11 +33,24 @@ class TenantResponse(TenantBase):
     created_by: int
     created_at: datetime
     is_active: bool
+    telemetry_retention_days: Optional[int] = None
     
     class Config:
         from_attributes = True
 
-class TenantListResponse(BaseModel):
+class TenantStatistics(BaseModel):
+    companies: int
+    branches: int
+    users: int
+    agents: int
+
+class TenantStatsItem(BaseModel):
+    tenant_id: int
+    statistics: TenantStatistics
+
+class TenantStatsListResponse(BaseModel):
+    stats: List[TenantStatsItem]
+
+class TenantListResponse(ListTotalResponse):
     tenants: List[TenantResponse]
-    total: int
 
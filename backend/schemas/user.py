@@ -4,6 +4,7 @@ User Schemas (Client Admin Users)
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from typing import Optional, List
+from backend.schemas.common import ListTotalResponse
 
 class UserBase(BaseModel):
     username: str
@@ -29,7 +30,6 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
-class UserListResponse(BaseModel):
+class UserListResponse(ListTotalResponse):
     users: List[UserResponse]
-    total: int
 
@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS tenants (
     created_by INT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT TRUE NOT NULL,
+    telemetry_retention_days INT NULL,
     INDEX idx_tenant_org_id (tenant_org_id),
     INDEX idx_admin_email (admin_email),
     INDEX idx_admin_api_key (admin_api_key),
@@ -62,6 +63,25 @@ CREATE TABLE IF NOT EXISTS branches (
     FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Org directory: every tenant/company/branch org_id, resolved with one PK lookup
+-- (maintained by the application on insert/update/delete)
+CREATE TABLE IF NOT EXISTS org_directory (
+    org_id VARCHAR(8) PRIMARY KEY,
+    org_type ENUM('TENANT', 'COMPANY', 'BRANCH') NOT NULL,
+    tenant_id INT NOT NULL,
+    entity_id INT NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE NOT NULL,
+    INDEX idx_tenant_id (tenant_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- List Versions
+-- Version counter per cached list (ETags of the tenant and platform list
+-- endpoints), bumped in the transaction that changes the list.
+CREATE TABLE IF NOT EXISTS list_versions (
+    list_key VARCHAR(64) PRIMARY KEY,
+    version BIGINT DEFAULT 0 NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Users Table (Client Admin Users)
 CREATE TABLE IF NOT EXISTS users (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -83,31 +103,97 @@ CREATE TABLE IF NOT EXISTS agents (
     id INT AUTO_INCREMENT PRIMARY KEY,
     org_id VARCHAR(8) NOT NULL,
     org_type ENUM('TENANT', 'COMPANY', 'BRANCH') NOT NULL,
+    tenant_id INT NULL,
     machine_name VARCHAR(255) NOT NULL,
     hardware_uuid VARCHAR(255) UNIQUE NOT NULL,
     agent_token VARCHAR(255) UNIQUE NOT NULL,
-    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,  -- written explicitly by registration and the presence recorder
     status ENUM('ONLINE', 'OFFLINE') DEFAULT 'OFFLINE' NOT NULL,
     registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_batch_seq BIGINT DEFAULT 0 NOT NULL,
     INDEX idx_org_id (org_id),
     INDEX idx_hardware_uuid (hardware_uuid),
     INDEX idx_agent_token (agent_token),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_tenant_last_seen (tenant_id, last_seen),
+    INDEX idx_tenant_status (tenant_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Processes Table (dictionary of telemetry process names)
+CREATE TABLE IF NOT EXISTS processes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) COLLATE utf8mb4_bin NOT NULL,
+    UNIQUE INDEX idx_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Window Titles Table (dictionary of telemetry window titles)
+CREATE TABLE IF NOT EXISTS window_titles (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    title VARCHAR(500) COLLATE utf8mb4_bin NOT NULL,
+    UNIQUE INDEX idx_title (title)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Telemetry Table
+-- Range-partitioned by timestamp. MySQL does not support foreign keys on
+-- partitioned tables, and every unique key must include the partition column.
+-- Run scripts/manage_partitions.py after creation (and then daily) to
+-- pre-create upcoming partitions and drop expired ones.
 CREATE TABLE IF NOT EXISTS telemetry (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     agent_id INT NOT NULL,
-    window_title VARCHAR(500),
-    process_name VARCHAR(255),
+    window_title_id INT,
+    process_id INT,
     timestamp TIMESTAMP NOT NULL,
     is_idle BOOLEAN DEFAULT FALSE NOT NULL,
     screenshot_url VARCHAR(500),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_agent_id (agent_id),
-    INDEX idx_timestamp (timestamp),
-    FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+    PRIMARY KEY (id, timestamp),
+    INDEX idx_agent_timestamp (agent_id, timestamp),
+    INDEX idx_process_id (process_id),
+    INDEX idx_timestamp (timestamp)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- Telemetry spill files already replayed (written in the replay transaction, so a
+-- crash between commit and file deletion does not insert the file twice)
+CREATE TABLE IF NOT EXISTS telemetry_spill_replays (
+    file_name VARCHAR(128) PRIMARY KEY,
+    replayed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Activity Rollup Tables
+-- Per agent / bucket / process sample counts, updated on telemetry ingestion.
+-- bucket_start is UTC truncated to the minute, hour or day; process_id 0 = unknown.
+CREATE TABLE IF NOT EXISTS activity_rollup_minute (
+    agent_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    process_id INT NOT NULL DEFAULT 0,
+    active_count INT NOT NULL DEFAULT 0,
+    idle_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (agent_id, bucket_start, process_id),
+    INDEX idx_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS activity_rollup_hour (
+    agent_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    process_id INT NOT NULL DEFAULT 0,
+    active_count INT NOT NULL DEFAULT 0,
+    idle_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (agent_id, bucket_start, process_id),
+    INDEX idx_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS activity_rollup_day (
+    agent_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    process_id INT NOT NULL DEFAULT 0,
+    active_count INT NOT NULL DEFAULT 0,
+    idle_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (agent_id, bucket_start, process_id),
+    INDEX idx_bucket_start (bucket_start)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create initial platform admin user
@@ -81,6 +81,67 @@ class API {
         localStorage.setItem('refreshToken', refreshToken);
     }
 
+    /**
+     * Subscribe to live tenant events (Server-Sent Events read through fetch so
+     * the bearer token stays in the Authorization header). Reconnects with
+     * backoff; returns a function that closes the stream.
+     */
+    streamEvents(onEvent) {
+        const controller = new AbortController();
+        let retryDelay = 1000;
+
+        const connect = async () => {
+            while (!controller.signal.aborted) {
+                try {
+                    const response = await fetch(`${API_BASE}/tenant/events`, {
+                        headers: { 'Authorization': `Bearer ${this.token}` },
+                        mode: 'cors',
+                        credentials: 'include',
+                        signal: controller.signal
+                    });
+                    if (response.status === 401 && !(await this.refresh())) {
+                        return;
+                    }
+                    if (response.ok) {
+                        retryDelay = 1000;
+                        await this.readEventStream(response, onEvent);
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    console.error('Event stream error:', error);
+                }
+                await new Promise(resolve => setTimeout(resolve, retryDelay));
+                retryDelay = Math.min(retryDelay * 2, 30000);
+            }
+        };
+        connect();
+        return () => controller.abort();
+    }
+
+    async readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) return;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                const data = [];
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+                });
+                // Lines starting with ':' are keepalive comments
+                if (data.length) onEvent(event, JSON.parse(data.join('\n')));
+            }
+        }
+    }
+
     logout() {
         this.token = null;
         this.refreshToken = null;
@@ -152,6 +213,10 @@ class API {
         return this.request(`/platform-admin/tenants/${tenantId}/stats`);
     }
 
+    async getTenantsStats(skip = 0, limit = 100) {
+        return this.request(`/platform-admin/tenants/stats?skip=${skip}&limit=${limit}`);
+    }
+
     // Tenant Admin
     async getCompanies() {
         return this.request('/tenant/companies');
@@ -190,16 +255,18 @@ class API {
         return this.request('/tenant/org-ids');
     }
 
-    async getTenantAgents(skip = 0, limit = 100) {
-        return this.request(`/tenant/agents?skip=${skip}&limit=${limit}`);
+    async getTenantAgents(skip = 0, limit = 100, cursor = null) {
+        const page = cursor ? `cursor=${encodeURIComponent(cursor)}` : `skip=${skip}`;
+        return this.request(`/tenant/agents?${page}&limit=${limit}`);
     }
 
     async getTenantAgent(agentId) {
         return this.request(`/tenant/agents/${agentId}`);
     }
 
-    async getAgentTelemetry(agentId, skip = 0, limit = 100) {
-        return this.request(`/tenant/agents/${agentId}/telemetry?skip=${skip}&limit=${limit}`);
+    async getAgentTelemetry(agentId, skip = 0, limit = 100, cursor = null) {
+        const page = cursor ? `cursor=${encodeURIComponent(cursor)}` : `skip=${skip}`;
+        return this.request(`/tenant/agents/${agentId}/telemetry?${page}&limit=${limit}`);
     }
 
     async downloadAgent(orgId) {
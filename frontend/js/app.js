@@ -5,6 +5,8 @@ class App {
     constructor() {
         this.api = api;
         this.currentView = null;
+        this.currentAgentId = null;
+        this.stopEvents = null;
         this.init();
     }
 
@@ -89,15 +91,21 @@ class App {
 
     showLogin() {
         this.currentView = 'login';
+        this.stopLiveUpdates();
         document.getElementById('content').innerHTML = this.getLoginHTML();
         document.getElementById('nav-buttons').innerHTML = '';
     }
 
     async showPlatformDashboard() {
         this.currentView = 'platform-dashboard';
+        this.stopLiveUpdates();
         try {
-            const data = await this.api.getTenants();
-            document.getElementById('content').innerHTML = this.getPlatformDashboardHTML(data);
+            // Same page of tenants: stats for every row in one request
+            const [data, stats] = await Promise.all([
+                this.api.getTenants(),
+                this.api.getTenantsStats().catch(() => ({ stats: [] }))
+            ]);
+            document.getElementById('content').innerHTML = this.getPlatformDashboardHTML(data, stats);
             document.getElementById('nav-buttons').innerHTML = `
                 <button onclick="app.showCreateTenant()" class="bg-indigo-600 text-white px-4 py-2 rounded hover:bg-indigo-700">
                     Create Tenant
@@ -113,6 +121,7 @@ class App {
 
     async showCreateTenant() {
         this.currentView = 'create-tenant';
+        this.stopLiveUpdates();
         document.getElementById('content').innerHTML = this.getCreateTenantHTML();
         document.getElementById('nav-buttons').innerHTML = `
             <button onclick="app.showPlatformDashboard()" class="text-gray-600 hover:text-gray-900">
@@ -155,6 +164,7 @@ class App {
 
     async showTenantDashboard() {
         this.currentView = 'tenant-dashboard';
+        this.startLiveUpdates();
         try {
             const [companies, users, orgIds, agentsData] = await Promise.all([
                 this.api.getCompanies(),
@@ -268,8 +278,11 @@ class App {
         }
     }
 
-    getPlatformDashboardHTML(data) {
+    getPlatformDashboardHTML(data, stats = { stats: [] }) {
         const tenants = data.tenants || [];
+        const statsById = {};
+        (stats.stats || []).forEach(item => { statsById[item.tenant_id] = item.statistics; });
+        const count = (tenantId, key) => statsById[tenantId] ? statsById[tenantId][key] : '-';
         return `
             <div class="fade-in">
                 <h2 class="text-3xl font-bold mb-6">Platform Admin Dashboard</h2>
@@ -283,6 +296,9 @@ class App {
                                     <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Name</th>
                                     <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Org ID</th>
                                     <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Email</th>
+                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Companies</th>
+                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Users</th>
+                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Agents</th>
                                     <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Status</th>
                                     <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Actions</th>
                                 </tr>
@@ -293,6 +309,9 @@ class App {
                                         <td class="px-6 py-4 whitespace-nowrap">${tenant.name}</td>
                                         <td class="px-6 py-4 whitespace-nowrap"><code class="bg-gray-100 px-2 py-1 rounded">${tenant.tenant_org_id}</code></td>
                                         <td class="px-6 py-4 whitespace-nowrap">${tenant.admin_email}</td>
+                                        <td class="px-6 py-4 whitespace-nowrap">${count(tenant.id, 'companies')}</td>
+                                        <td class="px-6 py-4 whitespace-nowrap">${count(tenant.id, 'users')}</td>
+                                        <td class="px-6 py-4 whitespace-nowrap">${count(tenant.id, 'agents')}</td>
                                         <td class="px-6 py-4 whitespace-nowrap">
                                             <span class="px-2 py-1 text-xs rounded ${tenant.is_active ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800'}">
                                                 ${tenant.is_active ? 'Active' : 'Inactive'}
@@ -466,7 +485,7 @@ class App {
                     <div class="bg-white shadow rounded-lg p-6 cursor-pointer hover:shadow-lg transition-shadow" onclick="app.showAgents()">
                         <h3 class="text-sm font-medium text-gray-500 mb-2">Agents</h3>
                         <p class="text-3xl font-bold text-indigo-600">${agentsData.total || 0}</p>
-                        <p class="text-sm text-gray-500 mt-2">View connected agents →</p>
+                        <p class="text-sm text-gray-500 mt-2"><span id="agents-online" class="text-green-600 font-medium">–</span> online · View connected agents →</p>
                     </div>
                 </div>
                 
@@ -593,6 +612,7 @@ class App {
 
     async showAgents() {
         this.currentView = 'agents';
+        this.startLiveUpdates();
         try {
             const agentsData = await this.api.getTenantAgents();
             document.getElementById('content').innerHTML = this.getAgentsHTML(agentsData);
@@ -624,6 +644,8 @@ class App {
         }
 
         this.currentView = 'agent-details';
+        this.currentAgentId = parseInt(agentId);
+        this.startLiveUpdates();
         try {
             const [agent, telemetryData] = await Promise.all([
                 this.api.getTenantAgent(parseInt(agentId)),
@@ -690,23 +712,14 @@ class App {
                                             <p class="text-sm text-gray-500 mt-1">Type: ${agent.org_type}</p>
                                         </div>
                                         <div class="ml-4">
-                                            <span class="inline-flex items-center px-3 py-1 rounded-full text-xs font-medium ${
-                                                isOnline 
-                                                    ? 'bg-green-100 text-green-800' 
-                                                    : 'bg-gray-100 text-gray-800'
-                                            }">
-                                                <span class="w-2 h-2 rounded-full mr-2 ${
-                                                    isOnline ? 'bg-green-500' : 'bg-gray-400'
-                                                }"></span>
-                                                ${agent.status}
-                                            </span>
+                                            ${this.statusBadgeHTML(agent.id, isOnline, agent.status)}
                                         </div>
                                     </div>
                                     
                                     <div class="border-t pt-4 mt-4">
                                         <div class="flex justify-between text-sm">
                                             <span class="text-gray-500">Last Seen:</span>
-                                            <span class="text-gray-900 font-medium">${lastSeenText}</span>
+                                            <span id="agent-last-seen-${agent.id}" class="text-gray-900 font-medium">${lastSeenText}</span>
                                         </div>
                                         <div class="flex justify-between text-sm mt-2">
                                             <span class="text-gray-500">Registered:</span>
@@ -762,16 +775,7 @@ class App {
                             <div class="space-y-2 text-sm">
                                 <div class="flex items-center">
                                     <span class="text-gray-500 w-32">Status:</span>
-                                    <span class="inline-flex items-center px-3 py-1 rounded-full text-xs font-medium ${
-                                        isOnline 
-                                            ? 'bg-green-100 text-green-800' 
-                                            : 'bg-gray-100 text-gray-800'
-                                    }">
-                                        <span class="w-2 h-2 rounded-full mr-2 ${
-                                            isOnline ? 'bg-green-500' : 'bg-gray-400'
-                                        }"></span>
-                                        ${agent.status}
-                                    </span>
+                                    ${this.statusBadgeHTML(agent.id, isOnline, agent.status)}
                                 </div>
                                 <div class="flex items-center">
                                     <span class="text-gray-500 w-32">Org ID:</span>
@@ -787,7 +791,7 @@ class App {
                                 </div>
                                 <div class="flex items-center">
                                     <span class="text-gray-500 w-32">Last Seen:</span>
-                                    <span class="text-gray-900">${lastSeenText} (${lastSeen.toLocaleString()})</span>
+                                    <span id="agent-last-seen-${agent.id}" class="text-gray-900">${lastSeenText} (${lastSeen.toLocaleString()})</span>
                                 </div>
                                 <div class="flex items-center">
                                     <span class="text-gray-500 w-32">Registered:</span>
@@ -836,32 +840,8 @@ class App {
                                         <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Status</th>
                                     </tr>
                                 </thead>
-                                <tbody class="bg-white divide-y divide-gray-200">
-                                    ${telemetry.map(tel => {
-                                        const telTime = new Date(tel.timestamp);
-                                        return `
-                                            <tr class="hover:bg-gray-50">
-                                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                                    ${telTime.toLocaleTimeString()}
-                                                </td>
-                                                <td class="px-6 py-4 text-sm text-gray-900">
-                                                    ${tel.window_title ? this.escapeHtml(tel.window_title.substring(0, 60)) + (tel.window_title.length > 60 ? '...' : '') : '<span class="text-gray-400">N/A</span>'}
-                                                </td>
-                                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-600">
-                                                    <code class="bg-gray-100 px-2 py-1 rounded">${tel.process_name || 'N/A'}</code>
-                                                </td>
-                                                <td class="px-6 py-4 whitespace-nowrap">
-                                                    <span class="px-2 py-1 text-xs rounded ${
-                                                        tel.is_idle 
-                                                            ? 'bg-gray-100 text-gray-800' 
-                                                            : 'bg-green-100 text-green-800'
-                                                    }">
-                                                        ${tel.is_idle ? 'Idle' : 'Active'}
-                                                    </span>
-                                                </td>
-                                            </tr>
-                                        `;
-                                    }).join('')}
+                                <tbody id="telemetry-rows" class="bg-white divide-y divide-gray-200">
+                                    ${telemetry.map(tel => this.telemetryRowHTML(tel)).join('')}
                                 </tbody>
                             </table>
                         </div>
@@ -871,6 +851,95 @@ class App {
         `;
     }
 
+    statusBadgeHTML(agentId, isOnline, status) {
+        return `
+            <span id="agent-status-${agentId}" class="inline-flex items-center px-3 py-1 rounded-full text-xs font-medium ${
+                isOnline 
+                    ? 'bg-green-100 text-green-800' 
+                    : 'bg-gray-100 text-gray-800'
+            }">
+                <span class="w-2 h-2 rounded-full mr-2 ${
+                    isOnline ? 'bg-green-500' : 'bg-gray-400'
+                }"></span>
+                ${status}
+            </span>
+        `;
+    }
+
+    telemetryRowHTML(tel) {
+        const telTime = new Date(tel.timestamp);
+        return `
+            <tr class="hover:bg-gray-50">
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                    ${telTime.toLocaleTimeString()}
+                </td>
+                <td class="px-6 py-4 text-sm text-gray-900">
+                    ${tel.window_title ? this.escapeHtml(tel.window_title.substring(0, 60)) + (tel.window_title.length > 60 ? '...' : '') : '<span class="text-gray-400">N/A</span>'}
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-600">
+                    <code class="bg-gray-100 px-2 py-1 rounded">${tel.process_name ? this.escapeHtml(tel.process_name) : 'N/A'}</code>
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap">
+                    <span class="px-2 py-1 text-xs rounded ${
+                        tel.is_idle 
+                            ? 'bg-gray-100 text-gray-800' 
+                            : 'bg-green-100 text-green-800'
+                    }">
+                        ${tel.is_idle ? 'Idle' : 'Active'}
+                    </span>
+                </td>
+            </tr>
+        `;
+    }
+
+    // Live dashboard updates (GET /tenant/events)
+
+    startLiveUpdates() {
+        // One stream is shared by all tenant views
+        if (this.stopEvents) return;
+        this.stopEvents = this.api.streamEvents((event, data) => this.handleLiveEvent(event, data));
+    }
+
+    stopLiveUpdates() {
+        if (this.stopEvents) {
+            this.stopEvents();
+            this.stopEvents = null;
+        }
+    }
+
+    handleLiveEvent(event, data) {
+        if (event === 'resync') {
+            // Events were dropped while the tab was behind: reload the current view
+            if (this.currentView === 'tenant-dashboard') this.showTenantDashboard();
+            else if (this.currentView === 'agents') this.showAgents();
+            else if (this.currentView === 'agent-details') this.showAgentDetails(this.currentAgentId);
+            return;
+        }
+
+        if (event === 'hello' || event === 'agent_status') {
+            const online = document.getElementById('agents-online');
+            if (online) online.textContent = data.online;
+        }
+
+        if (event === 'agent_status') {
+            this.setAgentStatus(data.agent_id, data.status);
+        } else if (event === 'telemetry') {
+            this.setAgentStatus(data.agent_id, 'ONLINE');
+            const lastSeen = document.getElementById(`agent-last-seen-${data.agent_id}`);
+            if (lastSeen) lastSeen.textContent = 'Just now';
+
+            const rows = document.getElementById('telemetry-rows');
+            if (rows && this.currentView === 'agent-details' && this.currentAgentId === data.agent_id) {
+                rows.insertAdjacentHTML('afterbegin', this.telemetryRowHTML(data.latest));
+            }
+        }
+    }
+
+    setAgentStatus(agentId, status) {
+        const badge = document.getElementById(`agent-status-${agentId}`);
+        if (badge) badge.outerHTML = this.statusBadgeHTML(agentId, status === 'ONLINE', status);
+    }
+
     escapeHtml(text) {
         if (!text) return '';
         const map = {
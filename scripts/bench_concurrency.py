@@ -0,0 +1,132 @@
+"""
+Benchmark: concurrent request throughput under a simulated agent fleet
+Runs against a live server and reports agent request throughput/latency and
+the latency of GET /health probes issued while the fleet is active
+
+/health does no I/O, so its latency under load shows how long requests wait
+for the event loop. Run once per build to compare (e.g. before and after
+moving endpoints off the event loop):
+
+    python scripts/bench_concurrency.py --org-id ABCD1234 --agents 200 --label before
+    python scripts/bench_concurrency.py --org-id ABCD1234 --agents 200 --label after
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+def register_agent(api_base: str, org_id: str, org_type: str, index: int) -> str:
+    """Register one simulated agent and return its token"""
+    response = requests.post(f"{api_base}/agent/register", json={
+        "org_id": org_id,
+        "org_type": org_type,
+        "machine_name": f"bench-agent-{index:05d}",
+        "hardware_uuid": f"bench-{uuid.uuid5(uuid.NAMESPACE_DNS, f'{org_id}-{index}')}"
+    }, timeout=30)
+    response.raise_for_status()
+    return response.json()["agent_token"]
+
+def agent_loop(api_base: str, token: str, records: int, deadline: float, results: list, lock: threading.Lock):
+    """Alternate heartbeats and telemetry batches until the deadline"""
+    session = requests.Session()
+    session.headers.update({"X-Agent-Token": token})
+    latencies, errors = [], 0
+    seq = time.time_ns() // 1000
+    while time.perf_counter() < deadline:
+        now = datetime.now(timezone.utc).isoformat()
+        seq += 1
+        for url, payload in (
+            (f"{api_base}/agent/heartbeat", {"agent_token": token, "status": "ONLINE"}),
+            (f"{api_base}/agent/telemetry", {
+                "agent_token": token,
+                "batch_seq": seq,
+                "telemetry": [
+                    {"window_title": "Bench - Notepad", "process_name": "notepad.exe",
+                     "timestamp": now, "is_idle": False}
+                ] * records
+            })
+        ):
+            started = time.perf_counter()
+            try:
+                response = session.post(url, json=payload, timeout=60)
+                if response.status_code >= 400:
+                    errors += 1
+            except requests.RequestException:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+    with lock:
+        results.append((latencies, errors))
+
+def health_probe(server: str, deadline: float, interval: float, latencies: list):
+    """Measure /health latency while the fleet is running"""
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            session.get(f"{server}/health", timeout=60)
+        except requests.RequestException:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent agent fleet benchmark")
+    parser.add_argument("--server", default="http://localhost:8000", help="Server base URL")
+    parser.add_argument("--org-id", required=True, help="Org ID to register simulated agents under")
+    parser.add_argument("--org-type", default="TENANT", choices=["TENANT", "COMPANY", "BRANCH"])
+    parser.add_argument("--agents", type=int, default=100, help="Number of simulated agents")
+    parser.add_argument("--records", type=int, default=10, help="Telemetry records per batch")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--label", default="", help="Label printed with the results")
+    args = parser.parse_args()
+
+    api_base = f"{args.server}/api/v1"
+    print(f"Registering {args.agents} agents...")
+    with ThreadPoolExecutor(max_workers=min(args.agents, 32)) as pool:
+        tokens = list(pool.map(
+            lambda i: register_agent(api_base, args.org_id, args.org_type, i), range(args.agents)
+        ))
+
+    results, health = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=agent_loop, args=(api_base, token, args.records, deadline, results, lock))
+        for token in tokens
+    ]
+    threads.append(threading.Thread(target=health_probe, args=(args.server, deadline, 0.05, health)))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [value for agent_latencies, _ in results for value in agent_latencies]
+    errors = sum(agent_errors for _, agent_errors in results)
+
+    print()
+    print(f"Results {args.label}".strip())
+    print("-" * 60)
+    print(f"{'agents':<22}{args.agents}")
+    print(f"{'requests':<22}{len(latencies)} ({errors} errors)")
+    print(f"{'throughput':<22}{len(latencies) / elapsed:.1f} req/s")
+    print(f"{'agent latency ms':<22}p50 {percentile(latencies, 50):.1f}  "
+          f"p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}")
+    print(f"{'/health latency ms':<22}p50 {percentile(health, 50):.1f}  "
+          f"p95 {percentile(health, 95):.1f}  max {max(health, default=0.0):.1f}  "
+          f"(mean {statistics.fmean(health) if health else 0.0:.1f})")
+
+if __name__ == "__main__":
+    main()
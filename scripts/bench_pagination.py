@@ -0,0 +1,114 @@
+"""
+Benchmark: deep-page latency of OFFSET vs cursor pagination
+Runs against a live server and times GET /tenant/agents/{id}/telemetry at
+increasing page depths, once with ?skip= and once with the equivalent ?cursor=
+
+OFFSET pages get slower linearly with depth (MySQL reads and discards every
+skipped row); cursor pages should stay flat. For a representative run, seed
+the agent with a large table first (this writes directly to the database
+configured in .env, doubling the agent's existing rows until the target):
+
+    python scripts/bench_pagination.py --email admin@example.com --password ... --agent-id 1 --seed-rows 50000000
+    python scripts/bench_pagination.py --email admin@example.com --password ... --agent-id 1 --depths 0,10000,1000000,10000000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+import requests
+from backend.core.pagination import encode_cursor
+
+SEED_CHUNK_ROWS = 1000000
+
+def seed_rows(agent_id: int, target: int):
+    """Grow an agent's telemetry to at least target rows by repeatedly copying it further into the past"""
+    from sqlalchemy import text
+    from backend.core.database import engine
+
+    with engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM telemetry WHERE agent_id = :a"), {"a": agent_id}).scalar()
+        if count == 0:
+            conn.execute(text("""
+                INSERT INTO telemetry (agent_id, timestamp, is_idle)
+                VALUES (:a, UTC_TIMESTAMP(), FALSE)
+            """), {"a": agent_id})
+            conn.commit()
+            count = 1
+
+        while count < target:
+            lo, hi, span = conn.execute(text("""
+                SELECT MIN(id), MAX(id), TIMESTAMPDIFF(SECOND, MIN(timestamp), MAX(timestamp)) + 1
+                FROM telemetry WHERE agent_id = :a
+            """), {"a": agent_id}).one()
+            # Copy in id ranges so no single transaction holds millions of rows
+            for start in range(lo, hi + 1, SEED_CHUNK_ROWS):
+                conn.execute(text("""
+                    INSERT INTO telemetry (agent_id, window_title_id, process_id, timestamp, is_idle)
+                    SELECT agent_id, window_title_id, process_id, timestamp - INTERVAL :span SECOND, is_idle
+                    FROM telemetry
+                    WHERE agent_id = :a AND id >= :start AND id < :end AND id <= :hi
+                """), {"a": agent_id, "span": span, "start": start, "end": start + SEED_CHUNK_ROWS, "hi": hi})
+                conn.commit()
+            count *= 2
+            print(f"  ... ~{count} rows")
+
+def timed_get(session: requests.Session, url: str, params: dict, repeat: int):
+    """Median latency (ms) of repeated GETs and the last response body"""
+    latencies, body = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = session.get(url, params=params, timeout=600)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        response.raise_for_status()
+        body = response.json()
+    return statistics.median(latencies), body
+
+def main():
+    parser = argparse.ArgumentParser(description="OFFSET vs cursor pagination benchmark")
+    parser.add_argument("--server", default="http://localhost:8000", help="Server base URL")
+    parser.add_argument("--email", required=True, help="Tenant admin email")
+    parser.add_argument("--password", required=True, help="Tenant admin password")
+    parser.add_argument("--agent-id", type=int, required=True, help="Agent whose telemetry is paged")
+    parser.add_argument("--depths", default="0,1000,10000,100000,1000000", help="Comma-separated row offsets")
+    parser.add_argument("--limit", type=int, default=100, help="Page size")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests per measurement (median is reported)")
+    parser.add_argument("--seed-rows", type=int, default=0, help="Grow the agent's telemetry to this many rows first")
+    args = parser.parse_args()
+
+    if args.seed_rows:
+        print(f"Seeding agent {args.agent_id} to {args.seed_rows} telemetry rows...")
+        seed_rows(args.agent_id, args.seed_rows)
+
+    api_base = f"{args.server}/api/v1"
+    session = requests.Session()
+    login = session.post(f"{api_base}/auth/tenant/login", json={"email": args.email, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    session.headers.update({"Authorization": f"Bearer {login.json()['access_token']}"})
+    url = f"{api_base}/tenant/agents/{args.agent_id}/telemetry"
+
+    print()
+    print(f"{'depth':>12}{'skip ms':>12}{'cursor ms':>12}")
+    print("-" * 36)
+    for depth in (int(value) for value in args.depths.split(",")):
+        skip_ms, _ = timed_get(session, url, {"skip": depth, "limit": args.limit}, args.repeat)
+        if depth == 0:
+            cursor_ms, _ = timed_get(session, url, {"limit": args.limit}, args.repeat)
+        else:
+            # The cursor for this depth is the sort key of the row just before it (not timed)
+            _, previous = timed_get(session, url, {"skip": depth - 1, "limit": 1}, 1)
+            if not previous["telemetry"]:
+                print(f"{depth:>12}  (past the end of the agent's telemetry)")
+                continue
+            row = previous["telemetry"][0]
+            # Timestamps are stored as naive UTC
+            timestamp = datetime.fromisoformat(row["timestamp"].replace("Z", "+00:00")).replace(tzinfo=None)
+            cursor = encode_cursor(timestamp, row["id"])
+            cursor_ms, _ = timed_get(session, url, {"cursor": cursor, "limit": args.limit}, args.repeat)
+        print(f"{depth:>12}{skip_ms:>12.1f}{cursor_ms:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: row vs columnar telemetry payloads
+Compares payload size and parse + validate + row-building cost per 1,000 records
+"""
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "PrismTrackAgent"))
+
+import gzip
+import json
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+from api_client import ApiClient
+from backend.schemas.agent import TelemetrySubmit, TelemetryColumnarSubmit
+from backend.core.telemetry_ingest import build_telemetry_rows, build_columnar_rows
+
+PROCESSES = ["chrome.exe", "OUTLOOK.EXE", "Teams.exe", "EXCEL.EXE", "Code.exe", "explorer.exe"]
+TITLES = [
+    "Inbox - user@example.com - Outlook",
+    "Quarterly Report.xlsx - Excel",
+    "Daily standup | Microsoft Teams",
+    "PrismTrack Dashboard - Google Chrome",
+    "main.py - Visual Studio Code",
+    "Downloads"
+]
+
+def make_records(count: int):
+    """Generate a realistic, highly repetitive telemetry backlog"""
+    start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=30 * count)
+    records = []
+    for i in range(count):
+        j = random.randrange(len(PROCESSES))
+        records.append({
+            "window_title": TITLES[j],
+            "process_name": PROCESSES[j],
+            "timestamp": (start + timedelta(seconds=30 * i)).isoformat(),
+            "is_idle": random.random() < 0.1
+        })
+    return records
+
+def main(count: int = 1000, repeat: int = 20):
+    client = ApiClient("http://localhost:8000/api/v1", "x" * 43)
+    records = make_records(count)
+
+    rows_body = json.dumps({"agent_token": client.agent_token, "telemetry": records}).encode()
+    columnar_body = json.dumps(client._to_columnar(records), separators=(',', ':')).encode()
+
+    def parse_rows():
+        batch = TelemetrySubmit.model_validate(json.loads(rows_body))
+        return build_telemetry_rows(1, batch.telemetry)
+
+    def parse_columnar():
+        batch = TelemetryColumnarSubmit.model_validate(json.loads(columnar_body))
+        return build_columnar_rows(1, batch)
+
+    # Both formats must decode to the same rows
+    assert parse_rows() == parse_columnar()
+
+    print("=" * 60)
+    print(f"Telemetry payload benchmark ({count} records, best of {repeat})")
+    print("=" * 60)
+    for name, body, func in (("rows", rows_body, parse_rows), ("columnar-v1", columnar_body, parse_columnar)):
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        per_1000 = best * 1000.0 * (1000.0 / count)
+        print(f"{name:12} raw={len(body):>8} B  gzip={len(gzip.compress(body)):>7} B  "
+              f"parse+validate={per_1000:8.3f} ms / 1,000 records")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark telemetry wire formats")
+    parser.add_argument("--count", type=int, default=1000, help="Records per batch")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions")
+
+    args = parser.parse_args()
+    main(args.count, args.repeat)
@@ -0,0 +1,192 @@
+"""
+Telemetry Partition Manager
+Pre-creates future range partitions on telemetry.timestamp and drops expired ones
+
+Run periodically (e.g. daily from cron / Task Scheduler):
+    python scripts/manage_partitions.py
+    python scripts/manage_partitions.py --retention-days 90 --dry-run
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, text
+from backend.core.config import settings
+
+FUTURE_PARTITION = "p_future"
+
+def get_engine():
+    """Get database engine"""
+    return create_engine(settings.database_url, pool_pre_ping=True)
+
+def period_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a UTC datetime to the start of its day or month"""
+    moment = moment.astimezone(timezone.utc)
+    if granularity == "month":
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    """Start of the period following the one beginning at start"""
+    if granularity == "month":
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start + timedelta(days=1)
+
+def partition_name(start: datetime, granularity: str) -> str:
+    """Partition name for the period beginning at start (p20261018 / p202610)"""
+    return start.strftime("p%Y%m" if granularity == "month" else "p%Y%m%d")
+
+def partition_definitions(first: datetime, last: datetime, granularity: str):
+    """
+    Build partition definitions covering [first, last] periods
+
+    Each partition holds one period and is bounded by the epoch of the next
+    period start, matching PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)).
+
+    Returns:
+        List of (name, upper_bound_epoch) tuples
+    """
+    definitions = []
+    start = period_start(first, granularity)
+    last = period_start(last, granularity)
+    while start <= last:
+        end = next_period(start, granularity)
+        definitions.append((partition_name(start, granularity), int(end.timestamp())))
+        start = end
+    return definitions
+
+def render_partitions(definitions, include_future: bool = True) -> str:
+    """Render partition definitions as SQL"""
+    parts = [f"PARTITION {name} VALUES LESS THAN ({bound})" for name, bound in definitions]
+    if include_future:
+        parts.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return ",\n    ".join(parts)
+
+def get_partitions(engine):
+    """
+    List telemetry partitions in order
+
+    Returns:
+        List of (name, upper_bound) tuples, upper_bound is None for MAXVALUE.
+        Empty list if the table is not partitioned.
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM INFORMATION_SCHEMA.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'telemetry'
+            AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """)).fetchall()
+    return [
+        (name, None if description == "MAXVALUE" else int(description))
+        for name, description in rows
+    ]
+
+def ensure_future_partitions(engine, granularity: str, ahead: int, dry_run: bool = False) -> int:
+    """
+    Make sure partitions exist for the current period and `ahead` periods after it
+
+    New partitions are split off the (empty) p_future catch-all partition, which
+    is a metadata-only operation while p_future holds no rows.
+
+    Returns:
+        Number of partitions created
+    """
+    partitions = get_partitions(engine)
+    if not partitions:
+        print("⚠️  telemetry is not partitioned. Run scripts/migrate_database.py first.")
+        return 0
+
+    bounded = [bound for _, bound in partitions if bound is not None]
+    now = datetime.now(timezone.utc)
+    target = period_start(now, granularity)
+    for _ in range(ahead):
+        target = next_period(target, granularity)
+
+    if bounded:
+        first = datetime.fromtimestamp(max(bounded), tz=timezone.utc)
+    else:
+        first = period_start(now, granularity)
+
+    definitions = partition_definitions(first, target, granularity) if first <= target else []
+    if not definitions:
+        print(f"✅ Partitions already exist through {partition_name(target, granularity)}")
+        return 0
+
+    sql = f"""
+        ALTER TABLE telemetry REORGANIZE PARTITION {FUTURE_PARTITION} INTO (
+            {render_partitions(definitions)}
+        )
+    """
+    names = ", ".join(name for name, _ in definitions)
+    if dry_run:
+        print(f"[dry-run] Would create partitions: {names}")
+        return len(definitions)
+
+    with engine.connect() as conn:
+        conn.execute(text(sql))
+        conn.commit()
+    print(f"✅ Created partitions: {names}")
+    return len(definitions)
+
+def drop_expired_partitions(engine, retention_days: int, dry_run: bool = False) -> int:
+    """
+    Drop partitions whose rows are all older than retention_days
+
+    Dropping a partition discards its data file in O(1), unlike a DELETE.
+
+    Returns:
+        Number of partitions dropped
+    """
+    if retention_days <= 0:
+        print("Retention disabled (retention_days <= 0), nothing to drop")
+        return 0
+
+    cutoff = int((datetime.now(timezone.utc) - timedelta(days=retention_days)).timestamp())
+    bounded = [(name, bound) for name, bound in get_partitions(engine) if bound is not None]
+    # Always keep at least one bounded partition so the range stays anchored
+    expired = [name for name, bound in bounded[:-1] if bound <= cutoff]
+
+    if not expired:
+        print(f"✅ No partitions older than {retention_days} days")
+        return 0
+
+    names = ", ".join(expired)
+    if dry_run:
+        print(f"[dry-run] Would drop partitions: {names}")
+        return len(expired)
+
+    with engine.connect() as conn:
+        conn.execute(text(f"ALTER TABLE telemetry DROP PARTITION {names}"))
+        conn.commit()
+    print(f"✅ Dropped partitions: {names}")
+    return len(expired)
+
+def main(granularity: str, ahead: int, retention_days: int, dry_run: bool):
+    print("=" * 60)
+    print("Telemetry Partition Manager")
+    print("=" * 60)
+
+    engine = get_engine()
+    ensure_future_partitions(engine, granularity, ahead, dry_run)
+    drop_expired_partitions(engine, retention_days, dry_run)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage telemetry range partitions")
+    parser.add_argument("--granularity", choices=["day", "month"],
+                        default=settings.TELEMETRY_PARTITION_GRANULARITY,
+                        help="Partition period (must match the existing layout)")
+    parser.add_argument("--ahead", type=int, default=settings.TELEMETRY_PARTITIONS_AHEAD,
+                        help="Number of future periods to pre-create")
+    parser.add_argument("--retention-days", type=int, default=settings.TELEMETRY_PARTITION_RETENTION_DAYS,
+                        help="Drop partitions older than this many days (0 keeps everything)")
+    parser.add_argument("--dry-run", action="store_true", help="Print actions without executing them")
+
+    args = parser.parse_args()
+    main(args.granularity, args.ahead, args.retention_days, args.dry_run)
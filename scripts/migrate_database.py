@@ -6,8 +6,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from datetime import datetime, timezone
 from sqlalchemy import create_engine, text, inspect
 from backend.core.config import settings
+from manage_partitions import (
+    get_partitions,
+    partition_definitions,
+    render_partitions,
+    next_period,
+    period_start
+)
 
 def get_engine():
     """Get database engine"""
@@ -24,6 +32,11 @@ def check_table_exists(engine, table_name):
     inspector = inspect(engine)
     return table_name in inspector.get_table_names()
 
+def check_index_exists(engine, table_name, index_name):
+    """Check if an index exists on a table"""
+    inspector = inspect(engine)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
 def get_enum_values(engine, table_name, column_name):
     """Get current enum values for a column"""
     with engine.connect() as conn:
@@ -43,6 +56,26 @@ def get_enum_values(engine, table_name, column_name):
                 return [v.strip() for v in values]
         return None
 
+def migrate_agent_last_seen(engine):
+    """Drop ON UPDATE CURRENT_TIMESTAMP from agents.last_seen"""
+    print("\nChecking agents.last_seen...")
+    
+    with engine.connect() as conn:
+        extra = conn.execute(text("""
+            SELECT EXTRA
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'agents'
+            AND COLUMN_NAME = 'last_seen'
+        """)).scalar() or ""
+        if "on update" not in extra.lower():
+            print("✅ agents.last_seen is only written explicitly")
+            return
+        # Otherwise every UPDATE of an agent row (status, tenant, batch sequence) resets it
+        conn.execute(text("ALTER TABLE agents MODIFY last_seen TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP"))
+        conn.commit()
+    print("✅ Removed ON UPDATE CURRENT_TIMESTAMP from agents.last_seen")
+
 def migrate_agents_enum(engine):
     """Update agents table enum values to uppercase"""
     print("Checking agents table enum values...")
@@ -127,6 +160,354 @@ def update_existing_agent_data(engine):
             print(f"⚠️  Error updating status data: {e}")
             conn.rollback()
 
+def get_max_id(engine, table_name):
+    """Get the highest primary key in a table (0 if empty)"""
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}")).scalar()
+
+def migrate_telemetry_dictionaries(engine, chunk_size=50000):
+    """Dictionary-encode telemetry process names and window titles into lookup tables"""
+    print("\nChecking telemetry dictionary encoding...")
+    
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS processes (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) COLLATE utf8mb4_bin NOT NULL,
+                UNIQUE INDEX idx_name (name)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS window_titles (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                title VARCHAR(500) COLLATE utf8mb4_bin NOT NULL,
+                UNIQUE INDEX idx_title (title)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """))
+        conn.commit()
+    
+    if not check_column_exists(engine, 'telemetry', 'process_name'):
+        print("✅ telemetry is already dictionary-encoded")
+        return
+    
+    with engine.connect() as conn:
+        if not check_column_exists(engine, 'telemetry', 'process_id'):
+            print("Adding process_id / window_title_id columns...")
+            conn.execute(text("""
+                ALTER TABLE telemetry
+                ADD COLUMN window_title_id INT NULL AFTER agent_id,
+                ADD COLUMN process_id INT NULL AFTER window_title_id
+            """))
+            conn.commit()
+        
+        print("Populating processes and window_titles...")
+        conn.execute(text("""
+            INSERT IGNORE INTO processes (name)
+            SELECT DISTINCT TRIM(TRAILING ' ' FROM process_name) FROM telemetry
+            WHERE process_name IS NOT NULL
+        """))
+        conn.execute(text("""
+            INSERT IGNORE INTO window_titles (title)
+            SELECT DISTINCT TRIM(TRAILING ' ' FROM window_title) FROM telemetry
+            WHERE window_title IS NOT NULL
+        """))
+        conn.commit()
+    
+    # Backfill foreign keys in primary-key ranges to keep each transaction small
+    max_id = get_max_id(engine, 'telemetry')
+    print(f"Backfilling telemetry rows 1..{max_id} in chunks of {chunk_size}...")
+    start = 0
+    while start < max_id:
+        end = start + chunk_size
+        with engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE telemetry t
+                LEFT JOIN processes p ON p.name = t.process_name COLLATE utf8mb4_bin
+                LEFT JOIN window_titles w ON w.title = t.window_title COLLATE utf8mb4_bin
+                SET t.process_id = p.id, t.window_title_id = w.id
+                WHERE t.id > :start AND t.id <= :end
+            """), {"start": start, "end": end})
+            conn.commit()
+        start = end
+        print(f"  ... {min(start, max_id)}/{max_id}")
+    
+    # No foreign keys: telemetry is range-partitioned (see migrate_telemetry_partitioning)
+    print("Indexing process_id and dropping string columns...")
+    with engine.connect() as conn:
+        conn.execute(text("""
+            ALTER TABLE telemetry
+            ADD INDEX idx_process_id (process_id),
+            DROP COLUMN window_title,
+            DROP COLUMN process_name
+        """))
+        conn.commit()
+    print("✅ telemetry process names and window titles are dictionary-encoded")
+
+def migrate_telemetry_partitioning(engine, granularity=None, ahead=None):
+    """Range-partition telemetry by timestamp (rebuilds the table once)"""
+    print("\nChecking telemetry partitioning...")
+    
+    if get_partitions(engine):
+        print("✅ telemetry is already partitioned")
+        return
+    
+    granularity = granularity or settings.TELEMETRY_PARTITION_GRANULARITY
+    ahead = settings.TELEMETRY_PARTITIONS_AHEAD if ahead is None else ahead
+    
+    with engine.connect() as conn:
+        # MySQL does not allow foreign keys on partitioned tables
+        foreign_keys = [row[0] for row in conn.execute(text("""
+            SELECT CONSTRAINT_NAME
+            FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'telemetry'
+        """))]
+        if foreign_keys:
+            print(f"Dropping foreign keys: {', '.join(foreign_keys)}")
+            drops = ", ".join(f"DROP FOREIGN KEY {name}" for name in foreign_keys)
+            conn.execute(text(f"ALTER TABLE telemetry {drops}"))
+            conn.commit()
+        
+        # Every unique key (including the primary key) must contain the partition column
+        print("Changing primary key to (id, timestamp)...")
+        conn.execute(text("""
+            ALTER TABLE telemetry DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)
+        """))
+        conn.commit()
+        
+        oldest = conn.execute(text("SELECT MIN(timestamp) FROM telemetry")).scalar()
+    
+    now = datetime.now(timezone.utc)
+    first = oldest.replace(tzinfo=timezone.utc) if oldest else now
+    last = period_start(now, granularity)
+    for _ in range(ahead):
+        last = next_period(last, granularity)
+    definitions = partition_definitions(first, last, granularity)
+    
+    print(f"Partitioning telemetry by {granularity} ({len(definitions)} partitions, this rebuilds the table)...")
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE telemetry
+            PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+                {render_partitions(definitions)}
+            )
+        """))
+        conn.commit()
+    print("✅ telemetry is range-partitioned; schedule scripts/manage_partitions.py to maintain it")
+
+def migrate_telemetry_indexes(engine):
+    """Replace the agent_id index on telemetry with the (agent_id, timestamp) composite"""
+    print("\nChecking telemetry indexes...")
+    
+    if check_index_exists(engine, 'telemetry', 'idx_agent_timestamp'):
+        print("✅ telemetry.idx_agent_timestamp exists")
+        return
+    
+    # agent_id is the leading column of the new index, so the old one becomes redundant
+    drop_old = ", DROP INDEX idx_agent_id" if check_index_exists(engine, 'telemetry', 'idx_agent_id') else ""
+    print("Adding idx_agent_timestamp (online; may take a while on large tables)...")
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE telemetry
+            ADD INDEX idx_agent_timestamp (agent_id, timestamp){drop_old},
+            ALGORITHM=INPLACE, LOCK=NONE
+        """))
+        conn.commit()
+    print("✅ Added telemetry.idx_agent_timestamp")
+
+def migrate_activity_rollups(engine):
+    """Create the activity rollup tables"""
+    print("\nChecking activity rollup tables...")
+    
+    created = []
+    with engine.connect() as conn:
+        for granularity in ("minute", "hour", "day"):
+            table = f"activity_rollup_{granularity}"
+            if check_table_exists(engine, table):
+                continue
+            conn.execute(text(f"""
+                CREATE TABLE {table} (
+                    agent_id INT NOT NULL,
+                    bucket_start DATETIME NOT NULL,
+                    process_id INT NOT NULL DEFAULT 0,
+                    active_count INT NOT NULL DEFAULT 0,
+                    idle_count INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (agent_id, bucket_start, process_id),
+                    INDEX idx_bucket_start (bucket_start)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """))
+            created.append(table)
+        conn.commit()
+    
+    if created:
+        print(f"✅ Created {', '.join(created)}")
+        print("   Run scripts/rebuild_rollups.py --start YYYY-MM-DD to backfill existing telemetry")
+    else:
+        print("✅ Activity rollup tables exist")
+    
+    # Tables created before retention was added lack the bucket_start index it deletes by
+    with engine.connect() as conn:
+        for granularity in ("minute", "hour", "day"):
+            table = f"activity_rollup_{granularity}"
+            if not check_index_exists(engine, table, 'idx_bucket_start'):
+                conn.execute(text(f"ALTER TABLE {table} ADD INDEX idx_bucket_start (bucket_start)"))
+                print(f"✅ Added {table}.idx_bucket_start")
+        conn.commit()
+
+def migrate_tenant_retention(engine):
+    """Add per-tenant telemetry retention setting"""
+    print("\nChecking tenant retention column...")
+    
+    if check_column_exists(engine, 'tenants', 'telemetry_retention_days'):
+        print("✅ tenants.telemetry_retention_days exists")
+        return
+    
+    with engine.connect() as conn:
+        conn.execute(text("""
+            ALTER TABLE tenants ADD COLUMN telemetry_retention_days INT NULL AFTER is_active
+        """))
+        conn.commit()
+    print("✅ Added tenants.telemetry_retention_days")
+
+def migrate_agent_batch_sequence(engine):
+    """Add the last accepted telemetry batch sequence per agent"""
+    print("\nChecking agent batch sequence column...")
+    
+    if check_column_exists(engine, 'agents', 'last_batch_seq'):
+        print("✅ agents.last_batch_seq exists")
+        return
+    
+    with engine.connect() as conn:
+        conn.execute(text("""
+            ALTER TABLE agents ADD COLUMN last_batch_seq BIGINT DEFAULT 0 NOT NULL AFTER registered_at
+        """))
+        conn.commit()
+    print("✅ Added agents.last_batch_seq")
+
+def migrate_org_directory(engine):
+    """Create the org directory and (re)sync it from tenants, companies and branches"""
+    print("\nChecking org directory...")
+    
+    with engine.connect() as conn:
+        if not check_table_exists(engine, 'org_directory'):
+            conn.execute(text("""
+                CREATE TABLE org_directory (
+                    org_id VARCHAR(8) PRIMARY KEY,
+                    org_type ENUM('TENANT', 'COMPANY', 'BRANCH') NOT NULL,
+                    tenant_id INT NOT NULL,
+                    entity_id INT NOT NULL,
+                    is_active BOOLEAN DEFAULT TRUE NOT NULL,
+                    INDEX idx_tenant_id (tenant_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """))
+            print("✅ Created org_directory")
+        
+        for select_sql in (
+            "SELECT tenant_org_id, 'TENANT', id, id, is_active FROM tenants",
+            "SELECT company_org_id, 'COMPANY', tenant_id, id, is_active FROM companies",
+            """SELECT b.branch_org_id, 'BRANCH', c.tenant_id, b.id, b.is_active
+               FROM branches b JOIN companies c ON c.id = b.company_id"""
+        ):
+            conn.execute(text(f"""
+                INSERT INTO org_directory (org_id, org_type, tenant_id, entity_id, is_active)
+                {select_sql}
+                ON DUPLICATE KEY UPDATE
+                    org_type = VALUES(org_type),
+                    tenant_id = VALUES(tenant_id),
+                    entity_id = VALUES(entity_id),
+                    is_active = VALUES(is_active)
+            """))
+        conn.commit()
+    
+    print("✅ org_directory synced with tenants, companies and branches")
+
+def migrate_agent_tenant_id(engine, chunk_size=10000):
+    """Denormalize the owning tenant onto agents and backfill it from org_directory"""
+    print("\nChecking agent tenant_id column...")
+    
+    with engine.connect() as conn:
+        if not check_column_exists(engine, 'agents', 'tenant_id'):
+            print("Adding agents.tenant_id and tenant indexes...")
+            conn.execute(text("""
+                ALTER TABLE agents
+                ADD COLUMN tenant_id INT NULL AFTER org_type,
+                ADD INDEX idx_tenant_last_seen (tenant_id, last_seen),
+                ADD INDEX idx_tenant_status (tenant_id, status)
+            """))
+            conn.commit()
+    
+    # Backfill in primary-key ranges; only rows still missing a tenant are touched,
+    # so the migration can be re-run after an interruption
+    max_id = get_max_id(engine, 'agents')
+    print(f"Backfilling agents 1..{max_id} in chunks of {chunk_size}...")
+    start = 0
+    while start < max_id:
+        end = start + chunk_size
+        with engine.connect() as conn:
+            conn.execute(text("""
+                UPDATE agents a
+                JOIN org_directory d ON d.org_id = a.org_id
+                SET a.tenant_id = d.tenant_id
+                WHERE a.id > :start AND a.id <= :end AND a.tenant_id IS NULL
+            """), {"start": start, "end": end})
+            conn.commit()
+        start = end
+        print(f"  ... {min(start, max_id)}/{max_id}")
+    
+    # Agents whose org is missing from org_directory: resolve them from the org tables themselves
+    with engine.connect() as conn:
+        for join in (
+            "JOIN tenants o ON o.tenant_org_id = a.org_id SET a.tenant_id = o.id",
+            "JOIN companies o ON o.company_org_id = a.org_id SET a.tenant_id = o.tenant_id",
+            "JOIN branches b ON b.branch_org_id = a.org_id JOIN companies o ON o.id = b.company_id "
+            "SET a.tenant_id = o.tenant_id"
+        ):
+            conn.execute(text(f"""
+                UPDATE agents a {join}
+                WHERE a.tenant_id IS NULL
+            """))
+        conn.commit()
+        orphans = conn.execute(text("SELECT COUNT(*) FROM agents WHERE tenant_id IS NULL")).scalar()
+    if orphans:
+        print(f"⚠️  {orphans} agents belong to no existing org and stay hidden from every tenant")
+    print("✅ agents.tenant_id backfilled")
+
+def migrate_telemetry_spill_replays(engine):
+    """Create the table that makes telemetry spill file replay idempotent"""
+    print("\nChecking telemetry spill replay table...")
+    
+    if check_table_exists(engine, 'telemetry_spill_replays'):
+        print("✅ telemetry_spill_replays exists")
+        return
+    
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE telemetry_spill_replays (
+                file_name VARCHAR(128) PRIMARY KEY,
+                replayed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """))
+        conn.commit()
+    print("✅ Created telemetry_spill_replays")
+
+def migrate_list_versions(engine):
+    """Create the shared list version table behind the list endpoint ETags"""
+    print("\nChecking list version table...")
+    
+    if check_table_exists(engine, 'list_versions'):
+        print("✅ list_versions exists")
+        return
+    
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE list_versions (
+                list_key VARCHAR(64) PRIMARY KEY,
+                version BIGINT DEFAULT 0 NOT NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """))
+        conn.commit()
+    print("✅ Created list_versions")
+
 def main():
     """Main migration function"""
     print("=" * 60)
@@ -147,12 +528,29 @@ def main():
             print("\n⚠️  Agents table does not exist. Run database/schema.sql first.")
             return
         
+        # Before any UPDATE of agents, so last_seen survives the data migrations
+        migrate_agent_last_seen(engine)
+        
         # Update existing data first (to avoid enum constraint errors)
         update_existing_agent_data(engine)
         
         # Update enum definitions
         migrate_agents_enum(engine)
         
+        # Dictionary-encode telemetry strings
+        if check_table_exists(engine, 'telemetry'):
+            migrate_telemetry_dictionaries(engine)
+            migrate_telemetry_partitioning(engine)
+            migrate_telemetry_indexes(engine)
+        
+        migrate_activity_rollups(engine)
+        migrate_tenant_retention(engine)
+        migrate_agent_batch_sequence(engine)
+        migrate_org_directory(engine)
+        migrate_agent_tenant_id(engine)
+        migrate_telemetry_spill_replays(engine)
+        migrate_list_versions(engine)
+        
         print("\n" + "=" * 60)
         print("Migration Complete!")
         print("=" * 60)
@@ -0,0 +1,117 @@
+"""
+Activity Rollup Rebuild
+Recomputes activity rollups from raw telemetry for a date range
+
+Rollups are maintained incrementally on ingestion; use this script to
+backfill history that predates the rollup tables, or to repair a range.
+Works one UTC day at a time so each transaction stays small.
+
+Raw telemetry past its retention is gone while its rollups are kept, and a
+rebuild replaces rollups with what the raw rows still hold. The start is
+therefore clamped to the first day no retention setting (global, per-tenant
+or partition) can have touched, and days without raw rows are skipped.
+
+    python scripts/rebuild_rollups.py --start 2026-01-01 --end 2026-02-01
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import create_engine, text
+from backend.core.config import settings
+
+BUCKET_EXPRESSIONS = {
+    "minute": "DATE_FORMAT(timestamp, '%Y-%m-%d %H:%i:00')",
+    "hour": "DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00')",
+    "day": "DATE(timestamp)"
+}
+
+def get_engine():
+    """Get database engine (UTC sessions, like the API engine)"""
+    return create_engine(
+        settings.database_url,
+        pool_pre_ping=True,
+        connect_args={"init_command": "SET time_zone = '+00:00'"}  # Rollup buckets are stored in UTC
+    )
+
+def raw_retention_horizon(engine) -> Optional[datetime]:
+    """
+    First UTC day whose raw telemetry is still complete
+
+    Uses the shortest retention in effect anywhere, so no tenant's expired
+    history is rebuilt from a partial day. None when everything is kept.
+    """
+    days = [d for d in (settings.TELEMETRY_RETENTION_DAYS, settings.TELEMETRY_PARTITION_RETENTION_DAYS) if d > 0]
+    with engine.connect() as conn:
+        tenant_days = conn.execute(text(
+            "SELECT MIN(telemetry_retention_days) FROM tenants WHERE telemetry_retention_days > 0"
+        )).scalar()
+    if tenant_days:
+        days.append(int(tenant_days))
+    if not days:
+        return None
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    # The day holding the cutoff is already partial
+    return today - timedelta(days=min(days)) + timedelta(days=1)
+
+def has_raw_rows(engine, day: datetime) -> bool:
+    """True if any raw telemetry exists for the UTC day"""
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT 1 FROM telemetry WHERE timestamp >= :start AND timestamp < :end LIMIT 1"
+        ), {"start": day, "end": day + timedelta(days=1)}).first() is not None
+
+def rebuild_day(engine, day: datetime) -> None:
+    """Replace all rollup rows of one UTC day with values recomputed from telemetry"""
+    params = {"start": day, "end": day + timedelta(days=1)}
+    with engine.connect() as conn:
+        for granularity, bucket in BUCKET_EXPRESSIONS.items():
+            table = f"activity_rollup_{granularity}"
+            conn.execute(text(f"""
+                DELETE FROM {table}
+                WHERE bucket_start >= :start AND bucket_start < :end
+            """), params)
+            conn.execute(text(f"""
+                INSERT INTO {table} (agent_id, bucket_start, process_id, active_count, idle_count)
+                SELECT agent_id, {bucket}, COALESCE(process_id, 0),
+                       SUM(is_idle = FALSE), SUM(is_idle = TRUE)
+                FROM telemetry
+                WHERE timestamp >= :start AND timestamp < :end
+                GROUP BY agent_id, {bucket}, COALESCE(process_id, 0)
+            """), params)
+        conn.commit()
+
+def main(start: datetime, end: datetime):
+    print("=" * 60)
+    print("Activity Rollup Rebuild")
+    print("=" * 60)
+
+    engine = get_engine()
+    horizon = raw_retention_horizon(engine)
+    if horizon is not None and start < horizon:
+        print(f"⚠️  Raw telemetry before {horizon.date()} may have been expired; starting there to keep its rollups")
+        start = horizon
+    day = start
+    while day < end:
+        if has_raw_rows(engine, day):
+            rebuild_day(engine, day)
+            print(f"✅ Rebuilt rollups for {day.date()}")
+        else:
+            print(f"⏭️  No raw telemetry for {day.date()}, keeping its rollups")
+        day += timedelta(days=1)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild activity rollups from raw telemetry")
+    parser.add_argument("--start", required=True, help="First UTC day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", help="UTC day to stop before (YYYY-MM-DD, default: tomorrow)")
+
+    args = parser.parse_args()
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    if args.end:
+        end = datetime.strptime(args.end, "%Y-%m-%d")
+    else:
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    main(start, end)
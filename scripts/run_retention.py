@@ -0,0 +1,34 @@
+"""
+Telemetry Retention
+Runs one retention pass: expires raw telemetry per tenant retention and
+old minute/hour activity rollups, in small chunks
+
+Schedule this script (e.g. hourly from cron) on one host, or enable the
+in-process loop (RETENTION_JOB_ENABLED) on a single API worker. Preview what
+would be deleted with:
+    python scripts/run_retention.py --dry-run
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.retention import retention_job
+
+def main(dry_run: bool):
+    print("=" * 60)
+    print("Telemetry Retention" + (" (dry run)" if dry_run else ""))
+    print("=" * 60)
+
+    results = retention_job.run_once(dry_run=dry_run)
+    verb = "Would delete" if dry_run else "Deleted"
+    for target, rows in results.items():
+        print(f"{verb} {rows} rows from {target}")
+    print(f"✅ Finished in {retention_job.last_run_ms:.0f} ms")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Expire telemetry and rollups past their retention")
+    parser.add_argument("--dry-run", action="store_true", help="Count rows that would be deleted without deleting them")
+
+    args = parser.parse_args()
+    main(args.dry_run)
@@ -0,0 +1,169 @@
+"""Query plan regression tests
+
+Runs EXPLAIN on the queries behind the hot list/telemetry endpoints against
+the database configured in .env and fails (exit code 1) if any of them reads
+a table with a full scan (type ALL) or sorts with a filesort.
+
+The optimizer only picks indexes once tables hold enough rows, so the agent
+under test is seeded with synthetic telemetry first if it has fewer than
+--min-rows (run test_agent.py once to register an agent):
+
+    python "test script/test_query_plans.py"
+    python "test script/test_query_plans.py" --agent-id 12 --min-rows 50000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import event, text, func
+from backend.core.database import SessionLocal
+from backend.core.pagination import encode_cursor, after_cursor_desc
+from backend.core.tenant_scope import tenant_agent_criteria
+from backend.models.agent import Agent
+from backend.models.telemetry import Telemetry
+from backend.models.activity_rollup import ActivityRollupHour
+
+SEED_BATCH_ROWS = 10000
+# Scans and sorts of a handful of rows (e.g. a test tenant's few agents) are not regressions
+SMALL_TABLE_ROWS = 1000
+
+def capture_plan(db, query):
+    """
+    Execute a query and return the EXPLAIN rows of the exact SQL it sent
+
+    EXPLAIN runs on the same cursor just before the statement, after
+    SQLAlchemy has rendered it and processed the bind parameters.
+    """
+    plan = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        cursor.execute("EXPLAIN " + statement, parameters)
+        columns = [column[0] for column in cursor.description]
+        plan.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", explain)
+    try:
+        query.all()
+    finally:
+        event.remove(connection, "before_cursor_execute", explain)
+    return plan
+
+def plan_problems(plan):
+    """Full scans and filesorts of non-trivial row counts in an EXPLAIN result"""
+    problems = []
+    for row in plan:
+        if (row.get("rows") or 0) <= SMALL_TABLE_ROWS:
+            continue
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            problems.append(f"full scan of {row.get('table')}")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {row.get('table')}")
+    return problems
+
+def seed_telemetry(db, agent_id, min_rows):
+    """Top up an agent's telemetry to min_rows, one row per second going back in time"""
+    count = db.query(func.count(Telemetry.id)).filter(Telemetry.agent_id == agent_id).scalar()
+    if count >= min_rows:
+        return count
+
+    print(f"Seeding {min_rows - count} telemetry rows for agent {agent_id}...")
+    oldest = db.query(func.min(Telemetry.timestamp)).filter(Telemetry.agent_id == agent_id).scalar()
+    oldest = oldest or datetime.utcnow()
+    missing = min_rows - count
+    for start in range(0, missing, SEED_BATCH_ROWS):
+        db.execute(Telemetry.__table__.insert(), [
+            {"agent_id": agent_id, "timestamp": oldest - timedelta(seconds=start + i + 1), "is_idle": i % 7 == 0}
+            for i in range(min(SEED_BATCH_ROWS, missing - start))
+        ])
+        db.commit()
+    db.execute(text("ANALYZE TABLE telemetry, agents"))
+    return min_rows
+
+def endpoint_queries(db, agent):
+    """The queries the endpoints run, built the same way the endpoints build them"""
+    now = datetime.utcnow()
+    midpoint = db.query(Telemetry).filter(Telemetry.agent_id == agent.id).order_by(
+        Telemetry.timestamp.desc(), Telemetry.id.desc()
+    ).offset(500).first()
+    telemetry = db.query(Telemetry).filter(Telemetry.agent_id == agent.id)
+    telemetry_page = telemetry.order_by(Telemetry.timestamp.desc(), Telemetry.id.desc())
+    agents = db.query(Agent).filter(*tenant_agent_criteria(agent.tenant_id))
+    agents_page = agents.order_by(Agent.last_seen.desc(), Agent.id.desc())
+
+    queries = {
+        "telemetry page (GET /tenant/agents/{id}/telemetry)": telemetry_page.limit(101),
+        "telemetry page, time range": telemetry_page.filter(
+            Telemetry.timestamp >= now - timedelta(days=7), Telemetry.timestamp < now
+        ).limit(101),
+        "telemetry total": telemetry.order_by(None).with_entities(func.count(Telemetry.id)),
+        "telemetry retention candidates": telemetry.with_entities(Telemetry.id).filter(
+            Telemetry.timestamp < now - timedelta(days=30)
+        ).limit(5000),
+        "tenant agents page (GET /tenant/agents)": agents_page.limit(101),
+        "tenant agents total": agents.with_entities(func.count(Agent.id)),
+        "agent activity (GET /tenant/agents/{id}/activity)": db.query(
+            ActivityRollupHour.bucket_start, func.sum(ActivityRollupHour.active_count)
+        ).filter(
+            ActivityRollupHour.agent_id == agent.id,
+            ActivityRollupHour.bucket_start >= now - timedelta(days=7)
+        ).group_by(ActivityRollupHour.bucket_start).order_by(ActivityRollupHour.bucket_start)
+    }
+    if midpoint is not None:
+        cursor = encode_cursor(midpoint.timestamp, midpoint.id)
+        queries["telemetry cursor page"] = telemetry_page.filter(
+            after_cursor_desc(Telemetry.timestamp, Telemetry.id, cursor)
+        ).limit(101)
+    if agent.last_seen is not None:
+        cursor = encode_cursor(agent.last_seen, agent.id)
+        queries["tenant agents cursor page"] = agents_page.filter(
+            after_cursor_desc(Agent.last_seen, Agent.id, cursor, nulls_last=True)
+        ).limit(101)
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN regression checks for endpoint queries")
+    parser.add_argument("--agent-id", type=int, help="Agent to test with (default: first agent with a tenant)")
+    parser.add_argument("--min-rows", type=int, default=20000, help="Seed the agent's telemetry up to this many rows")
+    parser.add_argument("--verbose", action="store_true", help="Print every EXPLAIN row")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = db.query(Agent).filter(Agent.tenant_id.isnot(None))
+        if args.agent_id:
+            query = query.filter(Agent.id == args.agent_id)
+        agent = query.order_by(Agent.id).first()
+        if agent is None:
+            print("❌ No agent with a tenant found. Register one first (test_agent.py) and run migrate_database.py")
+            sys.exit(1)
+
+        rows = seed_telemetry(db, agent.id, args.min_rows)
+        print(f"Checking query plans for agent {agent.id} ({rows} telemetry rows)")
+
+        failures = 0
+        for name, query in endpoint_queries(db, agent).items():
+            plan = capture_plan(db, query)
+            problems = plan_problems(plan)
+            if problems:
+                failures += 1
+                print(f"❌ {name}: {', '.join(problems)}")
+            else:
+                print(f"✅ {name}")
+            if problems or args.verbose:
+                for row in plan:
+                    print(f"     {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                          f"rows={row.get('rows')} extra={row.get('Extra')}")
+    finally:
+        db.close()
+
+    if failures:
+        print(f"\n❌ {failures} query plan regression(s)")
+        sys.exit(1)
+    print("\n✅ All query plans use indexes without filesort")
+
+if __name__ == "__main__":
+    main()